@@ -1,70 +1,85 @@
 import logging
-import sqlite3
-import yt_dlp
+import os
 from pathlib import Path
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("MetadataBackfill")
 
-DB_PATH = Path("/data/watcher.db") if Path("/data/watcher.db").exists() else Path("data/watcher.db")
+# Sin DATABASE_URL se mantiene el comportamiento anterior: /data/watcher.db si existe
+if "DATABASE_URL" not in os.environ and Path("/data/watcher.db").exists():
+    os.environ["DATABASE_URL"] = "sqlite:////data/watcher.db"
+
+from youtube_watcher.db.database import SessionLocal, engine  # noqa: E402
+from youtube_watcher.db.migrations import run_migrations  # noqa: E402
+from youtube_watcher.db.models import Track  # noqa: E402
+from youtube_watcher.ratelimit import METADATA, YtDlpLogger, rate_limiter  # noqa: E402
+from youtube_watcher.ydl_pool import new_youtube_dl  # noqa: E402
+
+BATCH_SIZE = 500
+
 
 def main():
-    if not DB_PATH.exists():
-        logger.error(f"Base de datos no encontrada en {DB_PATH}")
-        return
+    run_migrations(engine)
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    # Una sesión lee por lotes (cursor en servidor en PostgreSQL) y otra escribe,
+    # para que los commit no cierren el cursor de lectura
+    with SessionLocal() as read_db, SessionLocal() as write_db:
+        total = read_db.query(Track).count()
+        if not total:
+            logger.info("🎉 ¡No hay canciones en la base de datos!")
+            return
 
-    # Obtener todas las canciones completadas para revisar si el artista está mal o falta fecha
-    cursor.execute("SELECT id, youtube_id, title, artist, published_at FROM tracks")
-    tracks = cursor.fetchall()
-    
-    if not tracks:
-        logger.info("🎉 ¡No hay canciones en la base de datos!")
-        return
+        logger.info(f"🔎 Analizando metadatos de {total} canciones en Youtube...")
 
-    logger.info(f"🔎 Analizando metadatos de {len(tracks)} canciones en Youtube...")
+        ydl_opts = {
+            "extract_flat": False,
+            "quiet": True,
+            "no_warnings": True,
+            "nocheckcertificate": True,
+            "logger": YtDlpLogger(METADATA),
+        }
 
-    ydl_opts = {
-        "extract_flat": False,
-        "quiet": True,
-        "no_warnings": True,
-        "nocheckcertificate": True,
-    }
+        rows = (
+            read_db.query(Track.id, Track.youtube_id, Track.title, Track.artist, Track.published_at)
+            .order_by(Track.id)
+            .execution_options(stream_results=True)
+            .yield_per(BATCH_SIZE)
+        )
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        for idx, (db_id, y_id, title, current_artist, current_date) in enumerate(tracks, 1):
-            url = f"https://www.youtube.com/watch?v={y_id}"
-            try:
-                info = ydl.extract_info(url, download=False)
-                upload_date = info.get("upload_date")
-                if upload_date and len(upload_date) == 8:
-                    formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
-                elif upload_date:
-                    formatted_date = upload_date
-                else:
-                    formatted_date = None
-                
-                # Fetch best possible artist
-                yt_artist = (
-                    info.get("artist")
-                    or info.get("channel")
-                    or info.get("uploader", "Unknown Artist")
-                )
+        with new_youtube_dl(ydl_opts) as ydl:
+            for idx, (db_id, y_id, title, current_artist, current_date) in enumerate(rows, 1):
+                url = f"https://www.youtube.com/watch?v={y_id}"
+                try:
+                    # Comparte el límite de peticiones de metadatos (YOUTUBE_RATE_METADATA)
+                    rate_limiter.acquire(METADATA)
+                    info = ydl.extract_info(url, download=False)
+                    rate_limiter.report_success(METADATA)
+                    upload_date = info.get("upload_date")
+                    if upload_date and len(upload_date) == 8:
+                        formatted_date = f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:8]}"
+                    elif upload_date:
+                        formatted_date = upload_date
+                    else:
+                        formatted_date = None
 
-                # Verificamos si hay discrepancia de artista o fecha
-                if current_artist != yt_artist or current_date != formatted_date:
-                    cursor.execute(
-                        "UPDATE tracks SET published_at=?, artist=? WHERE id=?", 
-                        (formatted_date, yt_artist, db_id)
+                    # Fetch best possible artist
+                    yt_artist = (
+                        info.get("artist")
+                        or info.get("channel")
+                        or info.get("uploader", "Unknown Artist")
                     )
-                    conn.commit()
-                    logger.info(f"[{idx}/{len(tracks)}] ✅ DB Actualizada: '{title}' -> Artista: {yt_artist} | Fecha: {formatted_date}")
-            except Exception as e:
-                logger.error(f"[{idx}/{len(tracks)}] ❌ Error con '{title}': {e}")
 
-    conn.close()
+                    # Verificamos si hay discrepancia de artista o fecha
+                    if current_artist != yt_artist or current_date != formatted_date:
+                        track = write_db.get(Track, db_id)
+                        track.published_at = formatted_date
+                        track.artist = yt_artist
+                        write_db.commit()
+                        logger.info(f"[{idx}/{total}] ✅ DB Actualizada: '{title}' -> Artista: {yt_artist} | Fecha: {formatted_date}")
+                except Exception as e:
+                    write_db.rollback()
+                    logger.error(f"[{idx}/{total}] ❌ Error con '{title}': {e}")
+
     logger.info("🚀 Proceso de 'backfill' (retro-relleno) finalizado.")
 
 if __name__ == "__main__":
@@ -1,6 +1,13 @@
-"""Entrypoint para ejecutar como módulo: python -m youtube_watcher"""
+"""Entrypoint para ejecutar como módulo: python -m youtube_watcher [worker]"""
+
+import sys
 
 from .cli import main
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["worker"]:
+        from .worker import main as worker_main
+
+        worker_main()
+    else:
+        main()
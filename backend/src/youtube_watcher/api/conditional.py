@@ -0,0 +1,83 @@
+"""
+Conditional GET for the endpoints the dashboard polls.
+
+Responses carry an ETag built from the ``change_versions`` counters of the data
+they depend on. Those counters live in the database, so every API worker and
+the standalone watcher agree on them. A request whose ``If-None-Match`` still
+matches is answered with ``304 Not Modified`` after that single read, without
+running the route.
+"""
+
+import hashlib
+
+from starlette.concurrency import run_in_threadpool
+
+from ..db.changes import read_versions
+
+# Path -> change channels its response depends on. Only responses built entirely
+# from versioned data belong here: ``/config/cookies`` reports the in-memory
+# health of the cookie pool, which changes without any version bump.
+POLLED_PATHS: dict[str, tuple[str, ...]] = {
+    "/api/sources": ("sources",),
+    "/api/tracks": ("tracks", "sources"),
+    "/api/tracks/stats": ("tracks",),
+    "/api/tracks/artists": ("tracks",),
+    "/api/tracks/years": ("tracks",),
+    "/api/dashboard": ("tracks", "sources", "config"),
+}
+
+
+def _etag(versions: str, path: str, query: bytes) -> str:
+    request_key = hashlib.blake2b(path.encode() + b"?" + query, digest_size=6).hexdigest()
+    return f'W/"{versions}-{request_key}"'
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _not_modified(scope, etag: str) -> bool:
+    if_none_match = _header(scope, b"if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware adding an ETag and answering 304s"""
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+
+    def _versions(self, channels: tuple[str, ...]) -> str:
+        with self.engine.connect() as connection:
+            return read_versions(connection, *channels)
+
+    async def __call__(self, scope, receive, send):
+        channels = POLLED_PATHS.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if not channels or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        # Versions are read before the route runs: a write racing with this
+        # request can only make the client refetch, never miss a change
+        versions = await run_in_threadpool(self._versions, channels)
+        etag = _etag(versions, scope["path"], scope.get("query_string", b""))
+        headers = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+
+        if _not_modified(scope, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
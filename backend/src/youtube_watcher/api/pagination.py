@@ -0,0 +1,56 @@
+"""
+Opaque cursors for keyset pagination of track listings.
+
+A cursor stores the sort key and id of the last row served, so the next page
+is fetched with an indexed range condition instead of ``OFFSET``.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued for a different sort order."""
+
+
+def encode_cursor(sort_by: str, ascending: bool, value: Any, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = {"s": sort_by, "a": ascending, "v": value, "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, ascending: bool) -> tuple[Any, int]:
+    """Return ``(sort_value, row_id)`` stored in ``cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, row_id = payload["v"], int(payload["id"])
+        if payload["s"] != sort_by or payload["a"] != ascending:
+            raise InvalidCursor("Cursor does not match the requested sort order")
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}") from e
+    return value, row_id
+
+
+def keyset_after(column, ascending: bool, value: Any, row_id: int, id_column):
+    """Condition selecting rows after ``(value, row_id)``.
+
+    Matches the listing order: non-null values first (``column`` ascending or
+    descending), NULLs last, ties broken by ``id`` descending.
+    """
+    if value is None:
+        return and_(column.is_(None), id_column < row_id)
+
+    beyond = column > value if ascending else column < value
+    return or_(column.is_(None), beyond, and_(column == value, id_column < row_id))
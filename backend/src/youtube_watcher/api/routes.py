@@ -1,27 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from pathlib import Path
 import logging
+import orjson
 import os
-from pathlib import Path
+import re
+import time
 
-from ..db.database import get_db
-from ..db.models import Source, Track
+from ..db import search as search_index
+from ..db import summary
+from ..db.changes import mark_changed, read_versions
+from ..db.database import begin_read_snapshot, get_db
+from ..db.models import Source, Track, TrackArtistCount, TrackStatusCount, TrackYearCount
+from ..db.workers import list_workers
+from ..events import event_hub
+from ..jobs import INTERACTIVE_LANE, NAVIDROME_LANE, job_registry
+from ..progress import progress_table
+from ..ratelimit import rate_limiter
+from ..scheduler import BACKFILL, INTERACTIVE, download_scheduler
+from ..cookies import pool_dir, pool_files
+from ..worker import cookies_file_path
 from .deps import get_watcher
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_after
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_SOURCE_WEIGHT = 100
+_COOKIE_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
 # --- Schemas ---
 
 class SourceCreate(BaseModel):
     url: str
     name: str
     type: str = "playlist" # playlist, artist, channel
+    # Relative share of downloads when several sources have pending work
+    weight: int = Field(1, ge=1, le=MAX_SOURCE_WEIGHT)
 
 class SourceResponse(BaseModel):
     id: int
@@ -29,8 +50,11 @@ class SourceResponse(BaseModel):
     name: str
     type: str
     status: str
+    weight: int = 1
     navidrome_playlist_id: str | None = None
     created_at: datetime
+    # Set on creation when Navidrome linking runs as a background job
+    job_id: str | None = None
 
     class Config:
         from_attributes = True
@@ -54,12 +78,27 @@ class TrackResponse(BaseModel):
 
 class PaginatedTracks(BaseModel):
     items: List[TrackResponse]
-    total: int
-    page: int
-    pages: int
+    total: int | None
+    page: int | None
+    pages: int | None
+    next_cursor: str | None = None
 
 class SingleDownloadRequest(BaseModel):
     url: str
+
+class TrackFilter(BaseModel):
+    status: str | None = None
+    source_id: int | None = None
+    artist: str | None = None
+    search: str | None = None
+    year: str | None = None
+
+class BulkTrackSelection(BaseModel):
+    ids: List[int] | None = None
+    filter: TrackFilter | None = None
+
+class BulkEnqueueRequest(BaseModel):
+    urls: List[str]
     
 # --- Source Routes ---
 
@@ -77,22 +116,41 @@ def create_source(source: SourceCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Source URL already registered")
     
     new_source = Source(**source.model_dump())
-    
-    # Create Navidrome playlist if configured and source is a playlist/artist
-    if source.type in ("playlist", "artist"):
-        navidrome_id = _create_navidrome_playlist(source.name)
-        if navidrome_id:
-            new_source.navidrome_playlist_id = navidrome_id
-    
     db.add(new_source)
     db.commit()
     db.refresh(new_source)
     
-    # Sync existing tracks to Navidrome playlist after source is created
-    if new_source.navidrome_playlist_id:
-        _sync_existing_tracks_to_navidrome(new_source.id, new_source.navidrome_playlist_id, source.name)
+    response = SourceResponse.model_validate(new_source).model_dump()
+    # Navidrome calls can take minutes on big libraries: run them as a job
+    if source.type in ("playlist", "artist"):
+        job = job_registry.submit(
+            "navidrome.link_source", _link_navidrome_playlist, new_source.id, source.name, lane=NAVIDROME_LANE
+        )
+        response["job_id"] = job.id
     
-    return new_source
+    return response
+
+
+def _link_navidrome_playlist(job, source_id: int, source_name: str):
+    """Job: create the source's Navidrome playlist, store its ID and sync existing tracks"""
+    from ..db.database import SessionLocal
+
+    navidrome_id = _create_navidrome_playlist(source_name)
+    if not navidrome_id:
+        return {"playlist_id": None}
+
+    with SessionLocal() as db:
+        updated = db.query(Source).filter(Source.id == source_id).update(
+            {"navidrome_playlist_id": navidrome_id}
+        )
+        db.commit()
+    if not updated:
+        logger.info(f"Source '{source_name}' was removed before its playlist was linked")
+        return {"playlist_id": navidrome_id}
+
+    # Sync existing tracks to Navidrome playlist after source is linked
+    _sync_existing_tracks_to_navidrome(source_id, navidrome_id, source_name, job=job)
+    return {"playlist_id": navidrome_id}
 
 
 def _create_navidrome_playlist(name: str) -> str | None:
@@ -123,8 +181,8 @@ def _create_navidrome_playlist(name: str) -> str | None:
         return None
 
 
-def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_name: str):
-    """Sync existing tracks from a source to its Navidrome playlist"""
+def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_name: str, job=None):
+    """Sync existing tracks from a source to its Navidrome playlist (reporting to ``job`` if given)"""
     from ..navidrome_client import NavidromeClient
     
     navidrome_url = os.getenv("NAVIDROME_URL")
@@ -142,7 +200,8 @@ def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_
         from ..db.models import Track
         
         with SessionLocal() as db:
-            existing_tracks = db.query(Track).filter(
+            # Plain (youtube_id, title) rows: no ORM objects for large sources
+            existing_tracks = db.query(Track.youtube_id, Track.title).filter(
                 Track.source_id == source_id,
                 Track.download_status == "completed"
             ).all()
@@ -161,6 +220,8 @@ def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_
             return
 
         current_song_ids = {s.get("id") for s in current_songs}
+        if job:
+            job.total = len(existing_tracks)
         
         added_count = 0
         song_ids_to_add = []
@@ -178,6 +239,8 @@ def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_
                 current_song_ids.add(navidrome_song_id)
                 song_ids_to_add.append(navidrome_song_id)
                 added_count += 1
+            if job:
+                job.advance()
         
         if song_ids_to_add:
             success = client.update_playlist(playlist_id, song_ids_to_add=song_ids_to_add)
@@ -191,6 +254,60 @@ def _sync_existing_tracks_to_navidrome(source_id: int, playlist_id: str, source_
     except Exception as e:
         logger.error(f"Error syncing existing tracks to Navidrome: {e}")
 
+def _sync_existing_sources_to_navidrome(job):
+    """Job: create missing Navidrome playlists for existing sources.
+
+    Submitted by the primary watcher when it takes the lead (see
+    ``worker.create_watcher_from_env``), so a single process per database runs it.
+    """
+    from ..navidrome_client import NavidromeClient
+    from ..db.database import SessionLocal
+    from ..db.models import Source
+    
+    navidrome_url = os.getenv("NAVIDROME_URL")
+    navidrome_user = os.getenv("NAVIDROME_USER")
+    navidrome_password = os.getenv("NAVIDROME_PASSWORD")
+    
+    if not all([navidrome_url, navidrome_user, navidrome_password]):
+        return
+    
+    try:
+        client = NavidromeClient(navidrome_url, navidrome_user, navidrome_password)
+        if not client.ping():
+            logger.warning("Could not connect to Navidrome, skipping source sync")
+            return
+        
+        with SessionLocal() as db:
+            sources = db.query(Source).filter(
+                Source.type.in_(["playlist", "artist"]),
+                Source.navidrome_playlist_id.is_(None)
+            ).all()
+        job.total = len(sources)
+        
+        for source in sources:
+            playlist_id = client.ensure_playlist(source.name)
+            if playlist_id:
+                logger.info(f"Ensured Navidrome playlist '{source.name}' with ID: {playlist_id}")
+            
+            if playlist_id:
+                with SessionLocal() as db:
+                    db.query(Source).filter(Source.id == source.id).update(
+                        {"navidrome_playlist_id": playlist_id}
+                    )
+                    db.commit()
+                
+                # Sync existing tracks to the playlist
+                _sync_existing_tracks_to_navidrome(source.id, playlist_id, source.name)
+            job.advance()
+        
+        if sources:
+            logger.info(f"✅ Synced {len(sources)} sources to Navidrome playlists")
+        else:
+            logger.info("All sources already have Navidrome playlists")
+            
+    except Exception as e:
+        logger.error(f"Error syncing sources to Navidrome: {e}")
+
 @router.delete("/sources/{source_id}")
 def delete_source(source_id: int, db: Session = Depends(get_db)):
     """Remove a source and its Navidrome playlist (songs are kept in library)"""
@@ -198,13 +315,20 @@ def delete_source(source_id: int, db: Session = Depends(get_db)):
     if not source:
         raise HTTPException(status_code=404, detail="Source not found")
     
-    # Delete Navidrome playlist before removing source from DB
-    if source.navidrome_playlist_id:
-        _delete_navidrome_playlist(source.navidrome_playlist_id, source.name)
-    
+    playlist_id, source_name = source.navidrome_playlist_id, source.name
     db.delete(source)
     db.commit()
-    return {"status": "success", "message": f"Source {source_id} deleted"}
+    
+    response = {"status": "success", "message": f"Source {source_id} deleted"}
+    # The Navidrome playlist is removed in the background
+    if playlist_id:
+        job = job_registry.submit(
+            "navidrome.delete_playlist",
+            lambda job: _delete_navidrome_playlist(playlist_id, source_name),
+            lane=NAVIDROME_LANE,
+        )
+        response["job_id"] = job.id
+    return response
 
 
 def _delete_navidrome_playlist(playlist_id: str, source_name: str):
@@ -246,8 +370,38 @@ def update_source_status(source_id: int, status: str, db: Session = Depends(get_
     db.commit()
     return {"status": "success", "new_status": status}
 
+@router.put("/sources/{source_id}/weight")
+def update_source_weight(source_id: int, weight: int, db: Session = Depends(get_db)):
+    """Set a source's share of downloads relative to the other sources"""
+    if not 1 <= weight <= MAX_SOURCE_WEIGHT:
+        raise HTTPException(status_code=400, detail=f"Weight must be between 1 and {MAX_SOURCE_WEIGHT}")
+
+    source = db.query(Source).filter(Source.id == source_id).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Source not found")
+
+    source.weight = weight
+    db.commit()
+    return {"status": "success", "new_weight": weight}
+
 # --- Track Routes ---
 
+# Columns served by the track listing; the source is joined in the same query
+_TRACK_LISTING_COLUMNS = (
+    Track.id,
+    Track.youtube_id,
+    Track.title,
+    Track.source_id,
+    Source.name.label("source_name"),
+    Source.type.label("source_type"),
+    Track.file_path,
+    Track.download_status,
+    Track.downloaded_at,
+    Track.created_at,
+    Track.published_at,
+    Track.artist,
+)
+
 @router.get("/tracks", response_model=PaginatedTracks)
 def get_tracks(
     page: int = 1,
@@ -259,21 +413,29 @@ def get_tracks(
     year: str | None = None,
     sort_by: str = "created_at",
     sort_order: str = "desc",
+    cursor: str | None = None,
+    include_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    """List downloaded and pending tracks with optional filters and pagination"""
-    query = db.query(Track)
-    
-    if status and status != 'all':
-        query = query.filter(Track.download_status == status)
-    if source_id:
-        query = query.filter(Track.source_id == source_id)
-    if artist:
-        query = query.filter(Track.artist == artist)
-    if year:
-        query = query.filter(Track.published_at.startswith(year))
-    if search:
-        query = query.filter(Track.title.ilike(f"%{search}%"))
+    """List downloaded and pending tracks with optional filters and pagination.
+
+    ``search`` matches title and artist; ``sort_by=relevance`` ranks those matches.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset pagination:
+    follow ``next_cursor`` until it is null. The total is only counted in that
+    mode when ``include_total`` is set.
+    """
+    return _json_response(_list_tracks(
+        db, page, page_size, status, source_id, artist, search, year,
+        sort_by, sort_order, cursor, include_total,
+    ))
+
+def _list_tracks(db: Session, page: int, page_size: int, status: str | None, source_id: int | None,
+                 artist: str | None, search: str | None, year: str | None, sort_by: str,
+                 sort_order: str, cursor: str | None, include_total: bool) -> dict:
+    """Payload of ``get_tracks``, shared with the dashboard snapshot"""
+    query = db.query(*_TRACK_LISTING_COLUMNS).outerjoin(Source, Source.id == Track.source_id)
+    query, search_score = _filter_tracks(query, db, status, source_id, artist, search, year)
         
     valid_sort_columns = {
         "created_at": Track.created_at, 
@@ -283,38 +445,130 @@ def get_tracks(
         "artist": Track.artist,
         "source_id": Track.source_id
     }
-    sort_column = valid_sort_columns.get(sort_by, Track.created_at)
-    
-    if sort_order.lower() == "asc":
-        query = query.order_by(sort_column.is_(None), sort_column.asc(), Track.id.desc())
+    if sort_by == "relevance" and search_score is not None:
+        # bm25 scores are negative: the lower, the better the match
+        sort_key, sort_column, ascending = "relevance", search_score, True
+        query = query.order_by(sort_column.asc(), Track.id.desc())
     else:
-        query = query.order_by(sort_column.is_(None), sort_column.desc(), Track.id.desc())
+        sort_key = sort_by if sort_by in valid_sort_columns else "created_at"
+        sort_column = valid_sort_columns[sort_key]
+        ascending = sort_order.lower() == "asc"
+        direction = sort_column.asc() if ascending else sort_column.desc()
+        # NULLS LAST instead of an "IS NULL" sort key, so the column index can serve the order
+        query = query.order_by(direction.nulls_last(), Track.id.desc())
+
+    filters = (status, source_id, artist, search, year)
+    if cursor is not None:
+        total = _count_tracks(db, *filters) if include_total else None
+        return _get_tracks_after_cursor(query, cursor, sort_key, sort_column, ascending, page_size, total)
         
-    total = query.count()
+    total = _count_tracks(db, *filters)
     pages = (total + page_size - 1) // page_size if page_size > 0 else 0
     
     skip = (page - 1) * page_size
-    tracks = query.offset(skip).limit(page_size).all()
-    
-    # Enrich with source name
-    result = []
-    for t in tracks:
-        data = TrackResponse.model_validate(t).model_dump()
-        if t.source:
-            data["source_name"] = t.source.name
-            data["source_type"] = t.source.type
-        result.append(data)
+    rows = query.offset(skip).limit(page_size).all()
     
-    return {"items": result, "total": total, "page": page, "pages": pages}
+    return {"items": [row._asdict() for row in rows], "total": total, "page": page, "pages": pages}
+
+def _filter_tracks(query, db: Session, status: str | None, source_id: int | None,
+                   artist: str | None, search: str | None, year: str | None):
+    """Apply the listing filters; returns the query and the search score column (or None)"""
+    if status and status != 'all':
+        query = query.filter(Track.download_status == status)
+    if source_id:
+        query = query.filter(Track.source_id == source_id)
+    if artist:
+        query = query.filter(Track.artist == artist)
+    if year:
+        query = query.filter(_year_condition(year))
+    search_score = None
+    if search:
+        query, search_score = _apply_search(query, db, search)
+    return query, search_score
+
+def _year_condition(year: str):
+    """``published_at`` in ``year`` as a range, which (unlike LIKE) can use its index"""
+    if len(year) == 4 and year.isdigit():
+        return (Track.published_at >= year) & (Track.published_at < str(int(year) + 1))
+    return Track.published_at.startswith(year)
+
+def _get_tracks_after_cursor(query, cursor: str, sort_key: str, sort_column, ascending: bool,
+                             page_size: int, total: int | None):
+    """Keyset pagination: serve the page that follows ``cursor`` ("" = first page)"""
+    if cursor:
+        try:
+            value, last_id = decode_cursor(cursor, sort_key, ascending)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(keyset_after(sort_column, ascending, value, last_id, Track.id))
+
+    rows = query.add_columns(sort_column.label("sort_value")).limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_key, ascending, last.sort_value, last.id)
+
+    items = []
+    for row in rows:
+        item = row._asdict()
+        del item["sort_value"]
+        items.append(item)
+
+    return {"items": items, "total": total, "page": None, "pages": None, "next_cursor": next_cursor}
+
+def _count_tracks(db: Session, status: str | None, source_id: int | None,
+                  artist: str | None, search: str | None, year: str | None) -> int:
+    """COUNT of the listing from the filter conditions alone: no projection subquery
+    and no join to sources (no filter needs it)"""
+    query, _ = _filter_tracks(db.query(func.count(Track.id)).select_from(Track), db,
+                              status, source_id, artist, search, year)
+    return query.scalar()
+
+def _json_response(payload) -> Response:
+    """Serialize straight to JSON with orjson, skipping response_model validation"""
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+def _apply_search(query, db: Session, term: str):
+    """Filter tracks by title or artist, using the FTS index when available.
+
+    Returns the filtered query and the relevance score column (None without FTS).
+    """
+    if search_index.is_enabled(db.get_bind()):
+        matches = search_index.match_subquery(term, db.get_bind().dialect.name)
+        if matches is not None:
+            query = query.join(matches, matches.c.track_id == Track.id)
+            return query, matches.c.score
+
+    pattern = f"%{term}%"
+    return query.filter(or_(Track.title.ilike(pattern), Track.artist.ilike(pattern))), None
 
 @router.get("/tracks/stats")
 def get_track_stats(db: Session = Depends(get_db)):
     """Get global counts of tracks by status"""
-    counts = dict(
-        db.query(Track.download_status, func.count(Track.id))
-        .group_by(Track.download_status)
-        .all()
-    )
+    return _track_stats(db)
+
+@router.get("/tracks/artists", response_model=List[str])
+def get_artists(db: Session = Depends(get_db)):
+    """Get unique list of artists for filtering"""
+    return _artists(db)
+
+@router.get("/tracks/years", response_model=List[str])
+def get_years(db: Session = Depends(get_db)):
+    """Get unique list of years for filtering"""
+    return _years(db)
+
+def _track_stats(db: Session) -> dict:
+    if summary.is_enabled(db.get_bind()):
+        counts = dict(db.query(TrackStatusCount.status, TrackStatusCount.count).all())
+    else:
+        counts = dict(
+            db.query(Track.download_status, func.count(Track.id))
+            .group_by(Track.download_status)
+            .all()
+        )
     return {
         "completed": counts.get("completed", 0),
         "pending": counts.get("pending", 0),
@@ -322,17 +576,19 @@ def get_track_stats(db: Session = Depends(get_db)):
         "ignored": counts.get("ignored", 0),
     }
 
-@router.get("/tracks/artists", response_model=List[str])
-def get_artists(db: Session = Depends(get_db)):
-    """Get unique list of artists for filtering"""
+def _artists(db: Session) -> List[str]:
+    if summary.is_enabled(db.get_bind()):
+        return [a for (a,) in db.query(TrackArtistCount.artist).order_by(TrackArtistCount.artist)]
+
     artists = db.query(Track.artist).filter(Track.artist.isnot(None)).distinct().all()
     # Filter out empty strings if any crept in
     valid_artists = [a[0] for a in artists if a[0] and a[0].strip()]
     return sorted(valid_artists)
 
-@router.get("/tracks/years", response_model=List[str])
-def get_years(db: Session = Depends(get_db)):
-    """Get unique list of years for filtering"""
+def _years(db: Session) -> List[str]:
+    if summary.is_enabled(db.get_bind()):
+        return [y for (y,) in db.query(TrackYearCount.year).order_by(TrackYearCount.year.desc())]
+
     dates = db.query(Track.published_at).filter(Track.published_at.isnot(None)).distinct().all()
     # Extract years (YYYY from YYYY-MM-DD or YYYY)
     years = set()
@@ -341,20 +597,25 @@ def get_years(db: Session = Depends(get_db)):
             years.add(d[0][:4])
     return sorted(list(years), reverse=True)
 
+@router.get("/tracks/active")
+def get_active_downloads():
+    """Live progress of the downloads currently in flight, in this or any other process"""
+    return progress_table.snapshot()
+
+@router.get("/tracks/lanes")
+def get_download_lanes():
+    """Running and waiting downloads per priority lane"""
+    return download_scheduler.snapshot()
+
 @router.post("/tracks/download-single")
 def trigger_single_download(req: SingleDownloadRequest, db: Session = Depends(get_db)):
     """Extract video info and trigger download immediately"""
-    import re
-    import threading
-    
     # Extract youtube video ID from URL
     url = req.url.strip()
-    match = re.search(r'(?:v=|youtu\.be/)([a-zA-Z0-9_-]{11})', url)
-    if not match:
+    video_id = _parse_video_id(url)
+    if not video_id:
         raise HTTPException(status_code=400, detail="URL de YouTube no válida")
     
-    video_id = match.group(1)
-    
     # Check if already exists
     existing = db.query(Track).filter(Track.youtube_id == video_id).first()
     if existing:
@@ -362,7 +623,6 @@ def trigger_single_download(req: SingleDownloadRequest, db: Session = Depends(ge
             return {"status": "already_exists", "title": existing.title}
         if existing.download_status == "ignored":
             existing.download_status = "pending"
-            db.commit()
     
     if not existing:
         # Create pending record — the title will be updated after download
@@ -373,24 +633,22 @@ def trigger_single_download(req: SingleDownloadRequest, db: Session = Depends(ge
             download_status="pending"
         )
         db.add(existing)
-        db.commit()
-    
-    # Trigger download via the watcher in a background thread
-    watcher = get_watcher()
-    if watcher:
-        video_data = {"id": video_id, "title": existing.title, "url": url}
-        def _download():
-            try:
-                from ..db.database import SessionLocal
-                with SessionLocal() as bg_db:
-                    watcher._process_video(video_data, source_id=None, db=bg_db)
-            except Exception as e:
-                import logging
-                logging.getLogger(__name__).error(f"Error descargando {video_id}: {e}")
-        
-        threading.Thread(target=_download, daemon=True).start()
+    # Workers claim it ahead of the pending backlog, on the interactive lane
+    existing.priority = 1
+    db.commit()
+
+    if not get_watcher():
+        # WATCHER_MODE=api: a worker process picks it up within seconds
+        return {"status": "queued", "video_id": video_id, "job_id": None, "attached": False}
     
-    return {"status": "downloading", "video_id": video_id}
+    # Download in a job keyed by video: a second request (double click, or the same
+    # URL while it is still downloading) attaches to the running job instead.
+    # The interactive lane starts it ahead of any bulk backlog.
+    job, attached = job_registry.submit_once(
+        f"download:{video_id}", "tracks.download", _download_videos, [video_id], INTERACTIVE,
+        total=1, lane=INTERACTIVE_LANE,
+    )
+    return {"status": "downloading", "video_id": video_id, "job_id": job.id, "attached": attached}
 
 @router.delete("/tracks/{track_id}")
 def delete_track(track_id: int, db: Session = Depends(get_db)):
@@ -421,57 +679,342 @@ def restore_track(track_id: int, db: Session = Depends(get_db)):
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
     
-    # 1. Reset status to pending
+    # Pending tracks bypass the 24h retry back-off of failed ones
     track.download_status = "pending"
+    track.failed_at = None
     db.commit()
     
-    # 2. Clear from watcher's failed cache to bypass the 24h block list
-    watcher = get_watcher()
-    if watcher and track.youtube_id in watcher.failed_downloads:
-        watcher.failed_downloads.pop(track.youtube_id, None)
-    
     return {"status": "success", "message": f"Track {track_id} queued for re-download"}
 
+# --- Bulk Track Routes ---
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+_BULK_CHUNK = 500
+
+@router.post("/tracks/bulk/delete")
+def bulk_delete_tracks(selection: BulkTrackSelection, db: Session = Depends(get_db)):
+    """Ignore many tracks in one transaction; their files are removed by a background job"""
+    rows = _select_tracks(db, selection, Track.id, Track.file_path)
+    ids = [row.id for row in rows]
+    for chunk in _chunks(ids):
+        db.query(Track).filter(Track.id.in_(chunk)).update(
+            {Track.download_status: "ignored", Track.file_path: None}, synchronize_session=False
+        )
+    db.commit()
+
+    files = [row.file_path for row in rows if row.file_path]
+    job = job_registry.submit("tracks.delete_files", _remove_files, files, total=len(files))
+    return {"status": "success", "updated": len(ids), "job_id": job.id}
+
+@router.post("/tracks/bulk/restore")
+def bulk_restore_tracks(selection: BulkTrackSelection, db: Session = Depends(get_db)):
+    """Queue many ignored or failed tracks for re-download in one transaction; they are
+    downloaded by a background job"""
+    rows = _select_tracks(db, selection, Track.id, Track.youtube_id, Track.download_status)
+    rows = [row for row in rows if row.download_status in ("ignored", "failed")]
+    for chunk in _chunks([row.id for row in rows]):
+        db.query(Track).filter(Track.id.in_(chunk)).update(
+            {Track.download_status: "pending", Track.failed_at: None}, synchronize_session=False
+        )
+    db.commit()
+
+    if not get_watcher():
+        # WATCHER_MODE=api: the worker processes drain the pending tracks
+        return {"status": "queued", "updated": len(rows), "job_id": None}
+
+    video_ids = [row.youtube_id for row in rows]
+    job = job_registry.submit("tracks.download", _download_videos, video_ids, total=len(video_ids))
+    return {"status": "success", "updated": len(rows), "job_id": job.id}
+
+@router.post("/tracks/bulk/enqueue")
+def bulk_enqueue_tracks(req: BulkEnqueueRequest, db: Session = Depends(get_db)):
+    """Create pending tracks for a list of URLs in one transaction and download them in a job"""
+    invalid = []
+    video_ids = []
+    for url in req.urls:
+        video_id = _parse_video_id(url.strip())
+        if not video_id:
+            invalid.append(url)
+        elif video_id not in video_ids:
+            video_ids.append(video_id)
+
+    existing = {}
+    for chunk in _chunks(video_ids):
+        existing.update({t.youtube_id: t for t in db.query(Track).filter(Track.youtube_id.in_(chunk))})
+
+    queued, already_exists = [], []
+    for video_id in video_ids:
+        track = existing.get(video_id)
+        if track is None:
+            db.add(Track(
+                youtube_id=video_id,
+                title=f"Descargando... ({video_id})",
+                source_id=None,
+                download_status="pending"
+            ))
+        elif track.download_status == "completed":
+            already_exists.append(video_id)
+            continue
+        else:
+            track.download_status = "pending"
+        queued.append(video_id)
+    db.commit()
+
+    if not get_watcher():
+        # WATCHER_MODE=api: the worker processes drain the pending tracks
+        return {
+            "status": "queued",
+            "queued": len(queued),
+            "already_exists": already_exists,
+            "invalid": invalid,
+            "job_id": None,
+        }
+
+    job = job_registry.submit("tracks.download", _download_videos, queued, total=len(queued))
+    return {
+        "status": "success",
+        "queued": len(queued),
+        "already_exists": already_exists,
+        "invalid": invalid,
+        "job_id": job.id,
+    }
+
+def _select_tracks(db: Session, selection: BulkTrackSelection, *columns):
+    """Rows (with ``columns``) picked by an ID list and/or a listing filter"""
+    if selection.ids is None and selection.filter is None:
+        raise HTTPException(status_code=400, detail="Provide 'ids' or 'filter'")
+    criteria = selection.filter.model_dump(exclude_none=True) if selection.filter else {}
+    if selection.filter is not None and not criteria:
+        # An empty filter would select the whole library
+        raise HTTPException(status_code=400, detail="Filter must set at least one field")
+
+    query, _ = _filter_tracks(
+        db.query(*columns), db, criteria.get("status"), criteria.get("source_id"),
+        criteria.get("artist"), criteria.get("search"), criteria.get("year"),
+    )
+    if selection.ids is None:
+        return query.all()
+    rows = []
+    for chunk in _chunks(selection.ids):
+        rows.extend(query.filter(Track.id.in_(chunk)).all())
+    return rows
+
+def _chunks(items: list):
+    for start in range(0, len(items), _BULK_CHUNK):
+        yield items[start:start + _BULK_CHUNK]
+
+def _remove_files(job, paths: List[str]):
+    removed = 0
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            job.add_error(f"{path}: {e}")
+        job.advance()
+    return {"removed": removed}
+
+def _download_videos(job, video_ids: List[str], lane: str = BACKFILL):
+    watcher = get_watcher()
+    if not watcher:
+        # Only submitted with an in-process watcher; without one the tracks stay pending
+        raise RuntimeError("No in-process watcher: the tracks stay queued for the workers")
+
+    from ..db.database import SessionLocal
+    downloaded = 0
+    for video_id in video_ids:
+        try:
+            with SessionLocal() as bg_db:
+                track = bg_db.query(Track).filter(Track.youtube_id == video_id).first()
+                video_data = {"id": video_id, "title": track.title if track else video_id,
+                              "url": f"https://www.youtube.com/watch?v={video_id}"}
+                watcher._process_video(video_data, source_id=None, db=bg_db, lane=lane)
+                downloaded += 1
+        except Exception as e:
+            job.add_error(f"{video_id}: {e}")
+        job.advance()
+    return {"downloaded": downloaded}
+
+def _parse_video_id(url: str) -> str | None:
+    match = re.search(r'(?:v=|youtu\.be/)([a-zA-Z0-9_-]{11})', url)
+    return match.group(1) if match else None
+
+@router.get("/ratelimit")
+def get_rate_limits():
+    """Current rate, throttle count and waiting time of each YouTube request class"""
+    return rate_limiter.snapshot()
+
+# --- Worker Routes ---
+
+@router.get("/workers")
+def get_workers(db: Session = Depends(get_db)):
+    """Download workers sharing this database, with liveness and throughput"""
+    return list_workers(db)
+
+# --- Job Routes ---
+
+@router.get("/jobs")
+def list_jobs():
+    """Recent background jobs of every API process, newest first"""
+    return job_registry.describe_all()
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status and progress of a background job, whichever API process runs it"""
+    job = job_registry.describe(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# --- Dashboard ---
+
+@router.get("/dashboard")
+def get_dashboard(
+    page: int = 1,
+    page_size: int = 50,
+    status: str | None = None,
+    source_id: int | None = None,
+    artist: str | None = None,
+    search: str | None = None,
+    year: str | None = None,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    cursor: str | None = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Everything the dashboard renders, read from a single consistent snapshot.
+
+    Accepts the same filters as ``GET /tracks``. Per-section durations are
+    reported in the ``Server-Timing`` header.
+    """
+    begin_read_snapshot(db)
+    # Read inside the snapshot: the version matches exactly the data returned
+    version = read_versions(db.connection(), "tracks", "sources", "config")
+
+    timings = []
+    def timed(name, compute):
+        started = time.perf_counter()
+        result = compute()
+        timings.append(f"{name};dur={(time.perf_counter() - started) * 1000:.1f}")
+        return result
+
+    payload = {
+        "version": version,
+        "tracks": timed("tracks", lambda: _list_tracks(
+            db, page, page_size, status, source_id, artist, search, year,
+            sort_by, sort_order, cursor, include_total,
+        )),
+        "stats": timed("stats", lambda: _track_stats(db)),
+        "artists": timed("artists", lambda: _artists(db)),
+        "years": timed("years", lambda: _years(db)),
+        "sources": timed("sources", lambda: [
+            SourceResponse.model_validate(source).model_dump() for source in db.query(Source).all()
+        ]),
+        "cookies": {"exists": _cookies_exist()},
+    }
+    response = _json_response(payload)
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return response
+
+# --- Event Stream ---
+
+# Idle connections get a comment line this often so proxies keep them open
+_SSE_KEEPALIVE_SECONDS = 15
+
+def _sse_message(event_id: int | None, event_type: str, data) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\n".encode() + b"data: " + orjson.dumps(data) + b"\n\n"
+
+@router.get("/events")
+async def stream_events(request: Request):
+    """Server-Sent Events stream of track, source and stats changes.
+
+    Event types: ``track.created``, ``track.updated``, ``track.deleted``,
+    ``source.updated``, ``stats.delta`` (per-status count deltas) and ``resync``
+    (the client fell behind or rows changed in bulk: reload the affected data).
+    """
+    subscription = event_hub.subscribe()
+
+    async def _stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while not await request.is_disconnected():
+                events, overflowed = await subscription.get(timeout=_SSE_KEEPALIVE_SECONDS)
+                if overflowed:
+                    yield _sse_message(None, "resync", {"channels": ["tracks", "sources"]})
+                elif not events:
+                    yield b": keep-alive\n\n"
+                for event_id, event_type, data in events:
+                    yield _sse_message(event_id, event_type, data)
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- Config Routes ---
 
 @router.get("/config/cookies")
 def get_cookies_status():
-    """Check if a custom cookies.txt is currently loaded"""
-    # Use the mounted volume at /data if inside docker, fallback to local path otherwise
-    base_dir = "/data" if os.path.exists("/data") else str(Path(__file__).parent.parent.parent.parent / "data")
-    cookies_path = Path(base_dir) / "cookies.txt"
-    exists = cookies_path.exists()
-    return {"status": "success", "exists": exists}
+    """Check which cookie files are loaded; with an embedded watcher, also their health"""
+    files = [path.name for path in pool_files(cookies_file_path())]
+    watcher = get_watcher()
+    return {
+        "status": "success",
+        "exists": bool(files),
+        "files": files,
+        "health": watcher.cookie_pool.snapshot() if watcher else None,
+    }
+
+def _cookies_exist() -> bool:
+    return bool(pool_files(cookies_file_path()))
+
+def _cookie_file(name: str | None) -> Path:
+    """The main cookies.txt, or a named file of the rotation pool in cookies.d/"""
+    if name is None:
+        return cookies_file_path()
+    if not _COOKIE_NAME.fullmatch(name):
+        raise HTTPException(status_code=400, detail="Cookie name may only contain letters, digits, '-' and '_'")
+    return pool_dir(cookies_file_path()) / f"{name}.txt"
+
+def _reload_watcher_cookies(db: Session):
+    # Other processes pick the change up from the files on their next scan;
+    # the shared version tells every API worker that cached responses are stale
+    mark_changed(db, "config")
+    db.commit()
+    watcher = get_watcher()
+    if watcher:
+        watcher.set_cookie_files([str(path) for path in pool_files(cookies_file_path())])
 
 @router.post("/config/cookies")
-async def upload_cookies(file: UploadFile = File(...)):
-    """Upload a cookies.txt file and reload the watcher instance"""
+def upload_cookies(file: UploadFile = File(...), name: str | None = None, db: Session = Depends(get_db)):
+    """Upload cookies.txt, or with ``name`` add one more account to the rotation pool"""
     if not file.filename.endswith(".txt"):
         raise HTTPException(status_code=400, detail="Only .txt files are allowed")
 
-    base_dir = "/data" if os.path.exists("/data") else str(Path(__file__).parent.parent.parent.parent / "data")
-    cookies_path = Path(base_dir) / "cookies.txt"
+    cookies_path = _cookie_file(name)
     cookies_path.parent.mkdir(parents=True, exist_ok=True)
     
     # Save the file
     try:
-        content = await file.read()
+        # Sync route (runs in the threadpool): the file write and the commit below block
+        content = file.file.read()
         cookies_path.write_bytes(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save cookies: {str(e)}")
         
-    # Reload watcher instance
-    watcher = get_watcher()
-    if watcher:
-        watcher.update_cookies(str(cookies_path))
-        
+    _reload_watcher_cookies(db)
     return {"status": "success", "message": "Cookies uploaded and watcher reloaded."}
 
 @router.delete("/config/cookies")
-def delete_cookies():
-    """Delete the custom cookies.txt file and reload the watcher instance"""
-    base_dir = "/data" if os.path.exists("/data") else str(Path(__file__).parent.parent.parent.parent / "data")
-    cookies_path = Path(base_dir) / "cookies.txt"
+def delete_cookies(name: str | None = None, db: Session = Depends(get_db)):
+    """Delete cookies.txt (or the pool file ``name``) and reload the watcher instance"""
+    cookies_path = _cookie_file(name)
     
     if cookies_path.exists():
         try:
@@ -479,9 +1022,5 @@ def delete_cookies():
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to delete cookies: {str(e)}")
             
-    # Reload watcher instance removing cookies
-    watcher = get_watcher()
-    if watcher:
-        watcher.update_cookies(None)
-        
+    _reload_watcher_cookies(db)
     return {"status": "success", "message": "Cookies deleted and watcher reloaded."}
@@ -8,6 +8,8 @@ import logging
 import argparse
 from pathlib import Path
 
+from .db.database import engine
+from .db.migrations import run_migrations
 from .watcher import YouTubeWatcher
 
 
@@ -173,6 +175,9 @@ def main():
         sys.exit(1)
 
     try:
+        # El watcher usa reservas, versiones de cambios y turnos: el esquema debe estar al día
+        run_migrations(engine)
+
         # Crear watcher
         watcher = YouTubeWatcher(
             download_path=download_path,
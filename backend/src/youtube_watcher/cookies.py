@@ -0,0 +1,175 @@
+"""
+Conjunto de ficheros de cookies con rotación y control de salud.
+
+Además del ``cookies.txt`` principal se pueden subir más ficheros (uno por
+cuenta) a ``cookies.d/`` junto a él. Cada petición a YouTube usa la cookie
+menos usada recientemente entre las que no están apartadas; una cookie que
+acumula ``bench_after`` bloqueos (403/429) seguidos queda apartada durante
+``bench_seconds``, el doble en cada recaída hasta ``max_bench_seconds``.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+POOL_DIR_NAME = "cookies.d"
+
+
+def pool_dir(primary: Path) -> Path:
+    """Carpeta de cookies adicionales, junto al ``cookies.txt`` principal"""
+    return primary.parent / POOL_DIR_NAME
+
+
+def pool_files(primary: Path) -> List[Path]:
+    """Ficheros de cookies existentes: el principal primero y luego ``cookies.d/*.txt``"""
+    files = [primary] if primary.is_file() else []
+    directory = pool_dir(primary)
+    if directory.is_dir():
+        files.extend(sorted(p for p in directory.glob("*.txt") if p.is_file()))
+    return files
+
+
+def cookie_version(path: Optional[str]) -> Optional[int]:
+    """mtime del fichero: distingue un fichero reemplazado del anterior con la misma ruta"""
+    if not path:
+        return None
+    try:
+        return Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+# Cookie usada por la petición en curso en cada hilo (las instancias de YoutubeDL se
+# reutilizan entre peticiones, así que su logger la consulta aquí)
+_current = threading.local()
+
+
+@contextmanager
+def using_cookie(pool: Optional["CookiePool"], path: Optional[str]) -> Iterator[None]:
+    _current.pool, _current.path = pool, path
+    try:
+        yield
+    finally:
+        _current.pool = _current.path = None
+
+
+def report_current_cookie_throttled():
+    """Apartar (si procede) la cookie de la petición en curso de este hilo"""
+    pool = getattr(_current, "pool", None)
+    if pool is not None:
+        pool.report_throttled(_current.path)
+
+
+class _CookieHealth:
+    __slots__ = ("path", "requests", "successes", "errors", "consecutive_errors",
+                 "benches", "benched_until", "last_used", "last_throttled")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.benches = 0
+        self.benched_until = 0.0
+        self.last_used = 0.0
+        self.last_throttled = 0.0
+
+
+class CookiePool:
+    """Reparte las peticiones entre varios ficheros de cookies y aparta los bloqueados"""
+
+    def __init__(
+        self,
+        paths: Iterable[str] = (),
+        *,
+        bench_after: int = 3,
+        bench_seconds: float = 15 * 60,
+        max_bench_seconds: float = 6 * 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bench_after = bench_after
+        self.bench_seconds = bench_seconds
+        self.max_bench_seconds = max_bench_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cookies: Dict[str, _CookieHealth] = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths: Iterable[str]):
+        """Sustituir los ficheros del conjunto conservando la salud de los que siguen"""
+        with self._lock:
+            self._cookies = {path: self._cookies.get(path) or _CookieHealth(path) for path in paths}
+
+    @property
+    def paths(self) -> List[str]:
+        with self._lock:
+            return list(self._cookies)
+
+    def __len__(self) -> int:
+        return len(self._cookies)
+
+    def acquire(self) -> Optional[str]:
+        """Cookie para la próxima petición (None si el conjunto está vacío).
+
+        Se elige la menos usada recientemente entre las disponibles; si todas
+        están apartadas, la que antes vuelva.
+        """
+        with self._lock:
+            if not self._cookies:
+                return None
+            now = self._clock()
+            available = [c for c in self._cookies.values() if c.benched_until <= now]
+            if available:
+                cookie = min(available, key=lambda c: (c.last_throttled, c.last_used))
+            else:
+                cookie = min(self._cookies.values(), key=lambda c: c.benched_until)
+            cookie.requests += 1
+            cookie.last_used = now
+            return cookie.path
+
+    def report_success(self, path: Optional[str]):
+        with self._lock:
+            cookie = self._cookies.get(path)
+            if cookie:
+                cookie.successes += 1
+                cookie.consecutive_errors = 0
+                cookie.benches = 0
+
+    def report_throttled(self, path: Optional[str]):
+        with self._lock:
+            cookie = self._cookies.get(path)
+            if not cookie:
+                return
+            now = self._clock()
+            cookie.errors += 1
+            cookie.consecutive_errors += 1
+            cookie.last_throttled = now
+            if cookie.consecutive_errors < self.bench_after:
+                return
+            seconds = min(self.max_bench_seconds, self.bench_seconds * 2 ** cookie.benches)
+            cookie.benches += 1
+            cookie.consecutive_errors = 0
+            cookie.benched_until = now + seconds
+        logger.warning(f"🍪 Cookie {Path(path).name} apartada {seconds / 60:.0f} min por bloqueos de YouTube")
+
+    def snapshot(self) -> List[Dict]:
+        """Estado de cada cookie (sin su contenido)"""
+        with self._lock:
+            now = self._clock()
+            return [
+                {
+                    "name": Path(c.path).name,
+                    "requests": c.requests,
+                    "successes": c.successes,
+                    "errors": c.errors,
+                    "benched": c.benched_until > now,
+                    "benched_seconds_left": round(max(0.0, c.benched_until - now)),
+                }
+                for c in self._cookies.values()
+            ]
@@ -0,0 +1,132 @@
+"""
+Download progress and background jobs shared between processes.
+
+``progress.progress_table`` and ``jobs.job_registry`` live in the memory of the
+process doing the work. With ``WATCHER_MODE=api`` the downloads run in the
+worker process and the API may run several uvicorn workers, so both also write
+their state here: ``/tracks/active`` and ``/jobs`` read it back from any
+process, and ``ProgressFeed`` turns progress written elsewhere into
+``track.progress`` events for this process's SSE clients.
+
+Like the claims, these writes are bookkeeping: they run on the session's Core
+connection and never bump a change version.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..events import event_hub
+from .claims import DEFAULT_LEASE
+from .models import DownloadProgress, JobRecord, Worker
+
+_progress = DownloadProgress.__table__
+_jobs = JobRecord.__table__
+_workers = Worker.__table__
+
+_JOB_FIELDS = ("kind", "key", "status", "total", "done", "created_at", "started_at", "finished_at")
+
+
+def _live_workers(now: datetime):
+    return select(_workers.c.id).where(_workers.c.heartbeat_at >= now - DEFAULT_LEASE)
+
+
+def save_progress(db: Session, worker_id: str, entry: dict, now: datetime | None = None) -> None:
+    """Insert or replace the progress entry of ``entry["youtube_id"]``"""
+    values = {"worker_id": worker_id, "data": json.dumps(entry), "updated_at": now or datetime.utcnow()}
+    connection = db.connection()
+    updated = connection.execute(
+        update(_progress).where(_progress.c.youtube_id == entry["youtube_id"]).values(values)
+    ).rowcount
+    if not updated:
+        connection.execute(insert(_progress).values(youtube_id=entry["youtube_id"], **values))
+    db.commit()
+
+
+def delete_progress(db: Session, youtube_id: str) -> None:
+    db.connection().execute(delete(_progress).where(_progress.c.youtube_id == youtube_id))
+    db.commit()
+
+
+def live_progress(db: Session, now: datetime | None = None) -> list[dict]:
+    """Progress entries of workers that are still heartbeating (a crashed worker's
+    downloads are not in flight anymore)"""
+    now = now or datetime.utcnow()
+    rows = db.execute(
+        select(_progress.c.data).where(_progress.c.worker_id.in_(_live_workers(now)))
+    ).scalars()
+    return [json.loads(data) for data in rows]
+
+
+class ProgressFeed:
+    """Publishes the progress written by other processes as ``track.progress`` events"""
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._seen: dict[str, datetime] = {}
+
+    def poll(self, connection, now: datetime | None = None) -> None:
+        now = now or datetime.utcnow()
+        rows = connection.execute(
+            select(_progress.c.youtube_id, _progress.c.data, _progress.c.updated_at).where(
+                _progress.c.worker_id != self.worker_id,
+                _progress.c.worker_id.in_(_live_workers(now)),
+            )
+        ).all()
+        current = {row.youtube_id: row.updated_at for row in rows}
+        events = [
+            ("track.progress", json.loads(row.data))
+            for row in rows
+            if self._seen.get(row.youtube_id) != row.updated_at
+        ]
+        events.extend(
+            ("track.progress", {"youtube_id": youtube_id, "stage": "finished"})
+            for youtube_id in self._seen.keys() - current.keys()
+        )
+        self._seen = current
+        if events:
+            event_hub.publish_many(events)
+
+
+def save_job(db: Session, worker_id: str, job: dict) -> None:
+    """Insert or update a job from ``jobs.Job.to_dict()``"""
+    values = {field: job[field] for field in _JOB_FIELDS}
+    values.update(
+        worker_id=worker_id,
+        errors=json.dumps(job["errors"]),
+        result=json.dumps(job["result"], default=str),
+    )
+    connection = db.connection()
+    updated = connection.execute(update(_jobs).where(_jobs.c.id == job["id"]).values(values)).rowcount
+    if not updated:
+        connection.execute(insert(_jobs).values(id=job["id"], **values))
+    db.commit()
+
+
+def _job_dict(row) -> dict:
+    job = {"id": row.id, **{field: getattr(row, field) for field in _JOB_FIELDS}}
+    job["errors"] = json.loads(row.errors)
+    job["result"] = json.loads(row.result) if row.result is not None else None
+    return job
+
+
+def load_job(db: Session, job_id: str) -> dict | None:
+    row = db.execute(select(_jobs).where(_jobs.c.id == job_id)).first()
+    return _job_dict(row) if row else None
+
+
+def recent_jobs(db: Session, limit: int) -> list[dict]:
+    """Newest jobs first, from every process"""
+    rows = db.execute(select(_jobs).order_by(_jobs.c.created_at.desc()).limit(limit)).all()
+    return [_job_dict(row) for row in rows]
+
+
+def prune_jobs(db: Session, keep: int) -> None:
+    """Delete finished jobs beyond the newest ``keep``"""
+    newest = select(_jobs.c.id).order_by(_jobs.c.created_at.desc()).limit(keep)
+    db.connection().execute(
+        delete(_jobs).where(_jobs.c.finished_at.is_not(None), _jobs.c.id.not_in(newest.scalar_subquery()))
+    )
+    db.commit()
@@ -0,0 +1,228 @@
+"""
+Change versions and change events for tracks, sources and configuration.
+
+Every committed ORM write to ``tracks`` or ``sources`` bumps a per-channel
+counter in ``change_versions`` through session events, in the same
+transaction, so every process reads the same versions (see
+``api/conditional.py``). The same hooks publish per-row events and
+status-count deltas to the event hub (``/api/events``).
+
+The watcher may run in another process (``python -m youtube_watcher worker``)
+and the API may run several workers, so ``ChangeFeed`` polls those counters
+and turns changes made elsewhere into a ``resync`` event.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.orm import Session
+
+from ..events import event_hub
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ("tracks", "sources", "config")
+
+_PENDING_KEY = "changed_channels"
+_SHARED_KEY = "shared_versions"
+_EVENTS_KEY = "change_events"
+_STATS_KEY = "status_delta"
+
+_TRACK_FIELDS = (
+    "id", "youtube_id", "title", "artist", "source_id", "download_status",
+    "file_path", "downloaded_at", "created_at", "published_at",
+)
+_SOURCE_FIELDS = ("id", "url", "name", "type", "status", "navidrome_playlist_id", "created_at")
+
+
+def read_versions(connection, *channels: str) -> str:
+    """Opaque token that changes whenever any of ``channels`` changes, in any process"""
+    statement = text(
+        "SELECT channel, version FROM change_versions WHERE channel IN :channels"
+    ).bindparams(bindparam("channels", expanding=True))
+    versions = dict(connection.execute(statement, {"channels": list(channels)}).all())
+    return ".".join(str(versions.get(channel, 0)) for channel in channels)
+
+
+def mark_changed(session: Session, *channels: str):
+    """Bump ``channels`` when ``session`` commits, for changes the ORM does not see
+    (e.g. the cookie files behind the ``config`` channel)"""
+    for channel in channels:
+        _mark(session, channel)
+
+
+class ChangeFeed:
+    """Detects commits made by other processes through ``change_versions``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known: dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Extra ``poll(connection)`` callables run on the same thread (e.g. activity.ProgressFeed)
+        self._pollers: list = []
+
+    def add_poller(self, poll):
+        self._pollers.append(poll)
+
+    def acknowledge(self, versions: dict[str, int]):
+        """Record versions produced by this process's own commits.
+
+        Only a direct successor is taken as ours; a gap means another process
+        committed in between and is left for ``poll`` to report.
+        """
+        with self._lock:
+            for channel, version in versions.items():
+                if self._known.get(channel) == version - 1:
+                    self._known[channel] = version
+
+    def poll(self, connection) -> list[str]:
+        """Compare the shared versions with the known ones; returns the channels changed elsewhere"""
+        rows = connection.execute(text("SELECT channel, version FROM change_versions")).all()
+        changed = []
+        with self._lock:
+            for channel, version in rows:
+                known = self._known.get(channel)
+                self._known[channel] = version
+                # The first poll only sets the baseline
+                if known is not None and version != known:
+                    changed.append(channel)
+        if changed:
+            event_hub.publish("resync", {"channels": changed})
+        return changed
+
+    def start(self, engine, interval: float = 1.0):
+        """Poll ``engine`` every ``interval`` seconds in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _run():
+            while True:
+                try:
+                    with engine.connect() as connection:
+                        self.poll(connection)
+                        for poll in self._pollers:
+                            poll(connection)
+                except Exception as e:
+                    logger.warning(f"Could not poll shared change versions: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=_run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+change_feed = ChangeFeed()
+
+
+def _mark(session: Session, table_name: str | None):
+    if table_name in CHANNELS:
+        session.info.setdefault(_PENDING_KEY, set()).add(table_name)
+
+
+def _snapshot(obj, fields) -> dict:
+    # Only already-loaded attributes: never emit SQL from inside the flush
+    loaded = inspect(obj).dict
+    return {field: loaded.get(field) for field in fields}
+
+
+def _status_change(obj) -> tuple[str | None, str | None]:
+    history = inspect(obj).attrs.download_status.history
+    old = (history.deleted or history.unchanged or [None])[0]
+    new = (history.added or history.unchanged or [None])[0]
+    return old, new
+
+
+def _collect_events(session, obj, kind: str):
+    table = obj.__table__.name
+    events = session.info.setdefault(_EVENTS_KEY, [])
+    if table == "tracks":
+        delta = session.info.setdefault(_STATS_KEY, Counter())
+        old_status, new_status = _status_change(obj)
+        if kind == "created":
+            delta[new_status] += 1
+            events.append(("track.created", _snapshot(obj, _TRACK_FIELDS)))
+        elif kind == "deleted":
+            delta[old_status] -= 1
+            events.append(("track.deleted", {"id": inspect(obj).identity[0]}))
+        else:
+            if old_status != new_status:
+                delta[old_status] -= 1
+                delta[new_status] += 1
+            events.append(("track.updated", _snapshot(obj, _TRACK_FIELDS)))
+    elif table == "sources":
+        payload = _snapshot(obj, _SOURCE_FIELDS)
+        payload["deleted"] = kind == "deleted"
+        events.append(("source.updated", payload))
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session, flush_context):
+    for kind, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            table = getattr(obj, "__table__", None)
+            if table is None or table.name not in CHANNELS:
+                continue
+            if kind == "updated" and not session.is_modified(obj, include_collections=False):
+                continue
+            _mark(session, table.name)
+            _collect_events(session, obj, kind)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_changes(orm_execute_state):
+    # query.update() / query.delete() / insert() bypass the flush
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.persist_selectable.name in CHANNELS:
+            table = mapper.persist_selectable.name
+            _mark(orm_execute_state.session, table)
+            # Rows are unknown: tell clients to reload that part of the state
+            events = orm_execute_state.session.info.setdefault(_EVENTS_KEY, [])
+            events.append(("resync", {"channels": [table]}))
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_shared_versions(session):
+    # Right before COMMIT, so the counter row stays locked (PostgreSQL) as briefly
+    # as possible; flush first so every change of the transaction marked its channel
+    session.flush()
+    channels = session.info.get(_PENDING_KEY)
+    if not channels:
+        return
+    statement = text(
+        "UPDATE change_versions SET version = version + 1 "
+        "WHERE channel IN :channels RETURNING channel, version"
+    ).bindparams(bindparam("channels", expanding=True))
+    rows = session.connection().execute(statement, {"channels": sorted(channels)}).all()
+    session.info[_SHARED_KEY] = dict(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+    events = session.info.pop(_EVENTS_KEY, None) or []
+    delta = session.info.pop(_STATS_KEY, None)
+    shared = session.info.pop(_SHARED_KEY, None)
+    if shared:
+        change_feed.acknowledge(shared)
+    if delta:
+        changed = {status: n for status, n in delta.items() if status and n}
+        if changed:
+            events.append(("stats.delta", changed))
+    event_hub.publish_many(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    for key in (_PENDING_KEY, _EVENTS_KEY, _STATS_KEY, _SHARED_KEY):
+        session.info.pop(key, None)
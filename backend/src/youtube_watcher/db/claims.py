@@ -0,0 +1,148 @@
+"""
+Download and discovery work claims.
+
+``claimed_by`` / ``claimed_at`` on a track form a lease: while it is fresh, no
+other worker downloads that track. Sources carry the same lease for scanning.
+Workers renew their leases with every heartbeat (``db/workers.py``), so the
+lease only runs out when a worker dies. On PostgreSQL the batch claim locks its
+candidate rows with ``FOR UPDATE SKIP LOCKED``, so concurrent workers take
+disjoint batches without waiting on each other; SQLite has a single writer and
+gets the same guarantee from ``BEGIN IMMEDIATE``.
+
+Claims are bookkeeping, not track changes: they run on the session's Core
+connection so they neither bump the tracks change version nor publish events.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from .models import Source, Track
+
+# How long a dead worker's claims block other workers
+DEFAULT_LEASE = timedelta(seconds=int(os.getenv("WORKER_LEASE_SECONDS", "120")))
+
+_tracks = Track.__table__
+_sources = Source.__table__
+
+
+def _claimable(worker_id: str, now: datetime, lease: timedelta, table=_tracks):
+    return or_(
+        table.c.claimed_by.is_(None),
+        table.c.claimed_by == worker_id,
+        table.c.claimed_at < now - lease,
+    )
+
+
+def _pending_conditions(priority_only: bool = False) -> list:
+    # Tracks of paused sources stay pending until the source is resumed
+    active_sources = select(_sources.c.id).where(_sources.c.status == "active")
+    conditions = [
+        _tracks.c.download_status == "pending",
+        or_(_tracks.c.source_id.is_(None), _tracks.c.source_id.in_(active_sources)),
+    ]
+    if priority_only:
+        conditions.append(_tracks.c.priority > 0)
+    return conditions
+
+
+def pending_claim_query(
+    worker_id: str, limit: int, now: datetime, lease: timedelta = DEFAULT_LEASE, priority_only: bool = False
+):
+    """Pending tracks nobody else holds, user-requested ones first and then the
+    oldest, locked for the claiming transaction"""
+    return (
+        select(_tracks.c.id)
+        .where(*_pending_conditions(priority_only), _claimable(worker_id, now, lease))
+        .order_by(_tracks.c.priority.desc(), _tracks.c.created_at, _tracks.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def has_priority_tracks(db: Session) -> bool:
+    """Whether a user-requested track is waiting (a plain read, no write lock)"""
+    query = select(_tracks.c.id).where(*_pending_conditions(priority_only=True)).limit(1)
+    return db.connection().execute(query).first() is not None
+
+
+def _begin_write(db: Session):
+    connection = db.connection()
+    # Take the SQLite write lock before reading the candidates
+    if connection.dialect.name == "sqlite" and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    return connection
+
+
+def claim_pending_tracks(
+    db: Session, worker_id: str, limit: int = 20, lease: timedelta = DEFAULT_LEASE, priority_only: bool = False
+) -> list[int]:
+    """Claim up to ``limit`` pending tracks for ``worker_id``; returns their ids"""
+    now = datetime.utcnow()
+    connection = _begin_write(db)
+    ids = list(connection.execute(pending_claim_query(worker_id, limit, now, lease, priority_only)).scalars())
+    if ids:
+        connection.execute(
+            update(_tracks).where(_tracks.c.id.in_(ids)).values(claimed_by=worker_id, claimed_at=now)
+        )
+    db.commit()
+    return ids
+
+
+def claim_track(db: Session, track_id: int, worker_id: str, lease: timedelta = DEFAULT_LEASE) -> bool:
+    """Claim one track; False when another worker holds a fresh lease on it"""
+    now = datetime.utcnow()
+    result = db.connection().execute(
+        update(_tracks)
+        .where(_tracks.c.id == track_id, _claimable(worker_id, now, lease))
+        .values(claimed_by=worker_id, claimed_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def release_track(db: Session, track_id: int, worker_id: str) -> None:
+    """Drop ``worker_id``'s lease on a track (no-op if it was taken over)"""
+    db.connection().execute(
+        update(_tracks)
+        .where(_tracks.c.id == track_id, _tracks.c.claimed_by == worker_id)
+        .values(claimed_by=None, claimed_at=None)
+    )
+    db.commit()
+
+
+def claim_source(
+    db: Session, source_id: int, worker_id: str, min_interval: timedelta, lease: timedelta = DEFAULT_LEASE
+) -> bool:
+    """Claim a source for scanning unless another worker holds it or scanned it
+    less than ``min_interval`` ago"""
+    now = datetime.utcnow()
+    result = db.connection().execute(
+        update(_sources)
+        .where(
+            _sources.c.id == source_id,
+            _claimable(worker_id, now, lease, _sources),
+            or_(_sources.c.scanned_at.is_(None), _sources.c.scanned_at <= now - min_interval),
+        )
+        .values(claimed_by=worker_id, claimed_at=now, scanned_at=now)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def release_source(db: Session, source_id: int, worker_id: str) -> None:
+    db.connection().execute(
+        update(_sources)
+        .where(_sources.c.id == source_id, _sources.c.claimed_by == worker_id)
+        .values(claimed_by=None, claimed_at=None)
+    )
+    db.commit()
+
+
+def renew_claims(db: Session, worker_id: str, now: datetime) -> None:
+    """Extend every lease held by ``worker_id`` (committed by the caller)"""
+    connection = db.connection()
+    for table in (_tracks, _sources):
+        connection.execute(update(table).where(table.c.claimed_by == worker_id).values(claimed_at=now))
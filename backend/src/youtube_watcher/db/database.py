@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from pathlib import Path
 import os
+import threading
+import weakref
+
+from . import changes  # noqa: F401  (registers the change-version session listeners)
 
 # Create a data directory in the project root if it doesn't exist
 # This is where our SQLite DB will live
@@ -18,14 +23,169 @@ except PermissionError:
 
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/watcher.db")
 
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def apply_sqlite_pragmas(dbapi_connection, busy_timeout_ms: int | None = None):
+    """WAL lets readers and the writer proceed concurrently; NORMAL sync is
+    durable in WAL mode except for the last commits on power loss, and the
+    busy timeout makes writers wait for the lock instead of failing."""
+    if busy_timeout_ms is None:
+        busy_timeout_ms = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def normalize_database_url(url: str) -> str:
+    """Plain ``postgresql://`` URLs use psycopg 3 instead of SQLAlchemy's psycopg2 default"""
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Engine for ``url``; SQLite connections get the concurrency PRAGMAs.
+
+    Pool sizing comes from ``DB_POOL_SIZE``, ``DB_MAX_OVERFLOW`` and
+    ``DB_POOL_TIMEOUT`` (ignored for in-memory SQLite, which needs its own pool).
+    """
+    url = normalize_database_url(url)
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=_env_int("DB_POOL_SIZE", 10),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", 30),
+            pool_pre_ping=True,
+        )
+
+    options = {}
+    if url not in ("sqlite://", "sqlite:///:memory:"):
+        options = {
+            "pool_size": _env_int("DB_POOL_SIZE", 10),
+            "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+            "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        }
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False}, **options)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+    return sqlite_engine
+
+
+class _WriteLock:
+    """Process-wide writer lock. A thread that already holds it through another
+    session does not wait for itself (SQLite's busy timeout applies as before)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner: int | None = None
+
+    def acquire(self) -> bool:
+        if self._owner == threading.get_ident():
+            return False
+        self._lock.acquire()
+        self._owner = threading.get_ident()
+        return True
+
+    def release(self):
+        self._owner = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# Write transactions of every in-process writer go one at a time when enabled
+_write_lock = _WriteLock()
+
+_WRITER_KEY = "serialized_write_session"
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLAC")
+
+
+class SerializedWriteSession(Session):
+    """Session whose write transactions go through a process-wide lock.
+
+    SQLite allows a single writer; queueing the watcher, job and API writes
+    in-process avoids lock contention (and busy-timeout waits) between them.
+    The lock is taken by the first statement that writes (a flush, a bulk
+    update or Core DML on ``db.connection()``) and held until commit or
+    rollback, so no write reaches SQLite outside the queue. Reads are not
+    serialized.
+    """
+
+    _holds_write_lock = False
+
+    def _lock_writes(self):
+        if not self._holds_write_lock:
+            self._holds_write_lock = _write_lock.acquire()
+
+    def _unlock_writes(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            _write_lock.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._unlock_writes()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._unlock_writes()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._unlock_writes()
+
+
+@event.listens_for(SerializedWriteSession, "after_begin")
+def _track_writer_connection(session, transaction, connection):
+    # Pooled connections outlive the session: keep weak references and check the
+    # transaction is still the session's current one before using them
+    connection.info[_WRITER_KEY] = (weakref.ref(session), weakref.ref(session.get_transaction()))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _lock_before_first_write(conn, cursor, statement, parameters, context, executemany):
+    writer = conn.info.get(_WRITER_KEY)
+    if writer is None or not statement.lstrip()[:6].upper().startswith(_WRITE_VERBS):
+        return
+    session, transaction = writer[0](), writer[1]()
+    if session is not None and transaction is not None and session.get_transaction() is transaction:
+        session._lock_writes()
+
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+engine = create_db_engine(DATABASE_URL)
 
 # Create sessionmaker
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_serialize_writes = os.getenv("SQLITE_SERIALIZE_WRITES", "false").lower() in ("true", "1", "yes")
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    class_=SerializedWriteSession if _serialize_writes and DATABASE_URL.startswith("sqlite") else Session,
+)
 
 # Base class for models
 Base = declarative_base()
@@ -37,3 +197,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def begin_read_snapshot(db: Session):
+    """Open a read transaction so every following query in ``db`` sees the same data.
+
+    pysqlite only issues BEGIN before writes, so on SQLite each SELECT would
+    otherwise read the latest committed state; PostgreSQL needs REPEATABLE READ
+    for the snapshot to outlive a single statement.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        return
+    connection = db.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
@@ -0,0 +1,95 @@
+"""
+Watcher leadership.
+
+A watcher only runs its loop while it holds one of ``WATCHER_MAX_ACTIVE`` lock
+rows in ``watcher_locks`` (one by default: a single leader per database, no
+matter how many uvicorn workers, containers or CLI runs share it). The holder
+renews ``expires_at`` every ``RENEW_INTERVAL``; when it dies the row expires
+after ``LOCK_TTL`` and a standby watcher takes it over.
+
+Expiry compares the clocks of different hosts, so nodes need NTP-synced time.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import WatcherLock
+
+LOCK_TTL = timedelta(seconds=int(os.getenv("WATCHER_LOCK_TTL_SECONDS", "15")))
+RENEW_INTERVAL = LOCK_TTL / 3
+# How many watchers may run at once (each holds one slot)
+MAX_ACTIVE = int(os.getenv("WATCHER_MAX_ACTIVE", "1"))
+
+_locks = WatcherLock.__table__
+
+
+def _slot_names(slots: int) -> list[str]:
+    return [f"watcher:{slot}" for slot in range(slots)]
+
+
+# Held by exactly one watcher per database: it runs the once-per-database tasks
+PRIMARY_SLOT = _slot_names(1)[0]
+
+
+def try_acquire(
+    db: Session, holder: str, slots: int = MAX_ACTIVE, ttl: timedelta = LOCK_TTL, now: datetime | None = None
+) -> str | None:
+    """Renew the slot ``holder`` already has, or take a free or expired one.
+
+    Returns the slot name, or None when every slot is held by a live watcher.
+    """
+    now = now or datetime.utcnow()
+    names = _slot_names(slots)
+    connection = db.connection()
+
+    renewed = connection.execute(
+        update(_locks)
+        .where(_locks.c.holder == holder, _locks.c.name.in_(names))
+        .values(expires_at=now + ttl)
+        .returning(_locks.c.name)
+    ).scalars().first()
+    if renewed:
+        db.commit()
+        return renewed
+
+    existing = set(connection.execute(select(_locks.c.name).where(_locks.c.name.in_(names))).scalars())
+    for name in names:
+        if name in existing:
+            taken = connection.execute(
+                update(_locks)
+                .where(_locks.c.name == name, _locks.c.expires_at < now)
+                .values(holder=holder, acquired_at=now, expires_at=now + ttl)
+            ).rowcount
+            if taken:
+                db.commit()
+                return name
+            continue
+        try:
+            connection.execute(
+                insert(_locks).values(name=name, holder=holder, acquired_at=now, expires_at=now + ttl)
+            )
+            db.commit()
+            return name
+        except IntegrityError:
+            # Another watcher created the same slot first
+            db.rollback()
+            connection = db.connection()
+    db.commit()
+    return None
+
+
+def release(db: Session, holder: str) -> None:
+    """Give up ``holder``'s slot so a standby watcher takes over immediately"""
+    db.connection().execute(delete(_locks).where(_locks.c.holder == holder))
+    db.commit()
+
+
+def current_holders(db: Session, now: datetime | None = None) -> list[str]:
+    now = now or datetime.utcnow()
+    return list(
+        db.execute(select(_locks.c.holder).where(_locks.c.expires_at >= now).order_by(_locks.c.name)).scalars()
+    )
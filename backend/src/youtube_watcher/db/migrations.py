@@ -0,0 +1,206 @@
+"""
+Versioned schema migrations.
+
+Each migration runs at most once, inside its own transaction, and records its
+version in ``schema_version``. ``run_migrations`` is called from the app's
+lifespan hook (never at import time) and is safe to call on every start: it
+only applies what is missing.
+
+Migrations must be idempotent with respect to databases created before this
+runner existed (those have no ``schema_version`` rows but may already have
+some of the tables, columns and indexes).
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import search, summary
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_version"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # Optional migrations (e.g. SQLite extensions) log a warning on failure and
+    # are retried on the next start instead of aborting it
+    optional: bool = False
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl_type: str):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _baseline(conn: Connection):
+    """Tables of the models, plus the columns added to early databases"""
+    from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    Base.metadata.create_all(bind=conn)
+    _add_column(conn, "tracks", "published_at", "VARCHAR")
+    _add_column(conn, "tracks", "artist", "VARCHAR")
+    _add_column(conn, "sources", "navidrome_playlist_id", "VARCHAR")
+
+
+def _create_track_indexes(conn: Connection, *names: str):
+    from .models import Track
+
+    # create_all() skips indexes of tables that already exist
+    for index in Track.__table__.indexes:
+        if index.name in names:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _track_indexes(conn: Connection):
+    _create_track_indexes(
+        conn,
+        "ix_tracks_status_created",
+        "ix_tracks_source_status",
+        "ix_tracks_artist",
+        "ix_tracks_created_at",
+        "ix_tracks_downloaded_at",
+        "ix_tracks_published_at",
+    )
+
+
+def _search_index(conn: Connection):
+    if conn.dialect.name in ("sqlite", "postgresql"):
+        search.create_search_index(conn)
+
+
+def _summary_triggers(conn: Connection):
+    if conn.dialect.name in ("sqlite", "postgresql"):
+        summary.create_summary_triggers(conn)
+
+
+def _download_claims(conn: Connection):
+    _add_column(conn, "tracks", "claimed_by", "VARCHAR")
+    _add_column(conn, "tracks", "claimed_at", "TIMESTAMP")
+
+
+def _change_versions(conn: Connection):
+    from .changes import CHANNELS
+    from .models import ChangeVersion
+
+    ChangeVersion.__table__.create(bind=conn, checkfirst=True)
+    existing = {row[0] for row in conn.execute(text("SELECT channel FROM change_versions"))}
+    for channel in CHANNELS:
+        if channel not in existing:
+            conn.execute(text("INSERT INTO change_versions (channel, version) VALUES (:c, 0)"), {"c": channel})
+
+
+def _multi_node_workers(conn: Connection):
+    from .models import Worker
+
+    Worker.__table__.create(bind=conn, checkfirst=True)
+    _add_column(conn, "sources", "claimed_by", "VARCHAR")
+    _add_column(conn, "sources", "claimed_at", "TIMESTAMP")
+    _add_column(conn, "sources", "scanned_at", "TIMESTAMP")
+    _add_column(conn, "tracks", "failed_at", "TIMESTAMP")
+    _add_column(conn, "tracks", "retry_count", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "tracks", "downloaded_by", "VARCHAR")
+    _create_track_indexes(conn, "ix_tracks_claimed_by")
+
+
+def _watcher_locks(conn: Connection):
+    from .models import WatcherLock
+
+    WatcherLock.__table__.create(bind=conn, checkfirst=True)
+
+
+def _source_weights(conn: Connection):
+    _add_column(conn, "sources", "weight", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _track_priority(conn: Connection):
+    _add_column(conn, "tracks", "priority", "INTEGER NOT NULL DEFAULT 0")
+    _create_track_indexes(conn, "ix_tracks_status_priority")
+
+
+def _shared_activity(conn: Connection):
+    from .models import DownloadProgress, JobRecord
+
+    DownloadProgress.__table__.create(bind=conn, checkfirst=True)
+    JobRecord.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "tracks hot-path indexes", _track_indexes),
+    Migration(3, "full-text search index", _search_index, optional=True),
+    Migration(4, "summary tables triggers", _summary_triggers, optional=True),
+    Migration(5, "track download claims", _download_claims),
+    Migration(6, "shared change versions", _change_versions),
+    Migration(7, "multi-node workers", _multi_node_workers),
+    Migration(8, "watcher leader locks", _watcher_locks),
+    Migration(9, "source scheduling weights", _source_weights),
+    Migration(10, "track download priority", _track_priority),
+    Migration(11, "shared download progress and jobs", _shared_activity),
+]
+
+
+def _create_version_table(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    _create_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+_PG_MIGRATION_LOCK = 0x6D696772
+
+
+def _begin_migration(conn: Connection):
+    # pysqlite runs DDL outside of any transaction unless BEGIN is explicit;
+    # IMMEDIATE also serializes processes migrating the same file
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_MIGRATION_LOCK})
+
+
+def run_migrations(engine: Engine, migrations: list[Migration] = MIGRATIONS) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied now"""
+    done = applied_versions(engine)
+    applied = []
+    for migration in migrations:
+        if migration.version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                _begin_migration(conn)
+                # Another process may have applied it while we waited for the lock
+                already = conn.execute(
+                    text(f"SELECT 1 FROM {VERSION_TABLE} WHERE version = :v"), {"v": migration.version}
+                ).first()
+                if already:
+                    continue
+                migration.apply(conn)
+                conn.execute(
+                    text(f"INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": migration.version, "n": migration.name, "t": datetime.utcnow()},
+                )
+        except Exception as e:
+            if not migration.optional:
+                raise
+            logger.warning(f"Optional migration {migration.version} ({migration.name}) failed: {e}")
+            continue
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+        applied.append(migration.version)
+    return applied
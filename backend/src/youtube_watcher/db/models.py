@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Index, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -13,6 +13,12 @@ class Source(Base):
     status = Column(String, default="active") # active, paused
     navidrome_playlist_id = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Share of the watcher's downloads when several sources have pending work
+    weight = Column(Integer, nullable=False, default=1, server_default="1")
+    # Discovery lease: which worker is scanning the source, and when the last scan started
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    scanned_at = Column(DateTime, nullable=True)
 
     tracks = relationship("Track", back_populates="source", cascade="all, delete")
 
@@ -29,5 +35,110 @@ class Track(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     published_at = Column(String, nullable=True) # YouTube publication date/year
     artist = Column(String, nullable=True) # YouTube channel/uploader
+    # Download lease: which watcher is working on the track, and since when
+    claimed_by = Column(String, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    # Shared by every worker: retry back-off and per-node throughput
+    failed_at = Column(DateTime, nullable=True)
+    retry_count = Column(Integer, nullable=False, default=0)
+    downloaded_by = Column(String, nullable=True)
+    # Requested by the user: workers claim it before the backlog, on the interactive lane
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
 
     source = relationship("Source", back_populates="tracks")
+
+    # Hot paths: status/source filters of the listing and the watcher, artist
+    # filter, and every sortable column (see tests/benchmarks/test_query_plans.py)
+    __table_args__ = (
+        Index("ix_tracks_status_created", "download_status", "created_at"),
+        Index("ix_tracks_source_status", "source_id", "download_status"),
+        Index("ix_tracks_artist", "artist"),
+        Index("ix_tracks_created_at", "created_at"),
+        Index("ix_tracks_downloaded_at", "downloaded_at"),
+        Index("ix_tracks_published_at", "published_at"),
+        Index("ix_tracks_claimed_by", "claimed_by"),
+        Index("ix_tracks_status_priority", "download_status", "priority", "created_at"),
+    )
+
+
+# --- Summary tables (maintained by triggers, see db/summary.py) ---
+
+class TrackStatusCount(Base):
+    __tablename__ = "track_status_counts"
+
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class TrackArtistCount(Base):
+    __tablename__ = "track_artist_counts"
+
+    artist = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class TrackYearCount(Base):
+    __tablename__ = "track_year_counts"
+
+    year = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# --- Cross-process change versions (see db/changes.py) ---
+
+class ChangeVersion(Base):
+    __tablename__ = "change_versions"
+
+    channel = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# --- Download workers (see db/workers.py) ---
+
+class Worker(Base):
+    __tablename__ = "workers"
+
+    id = Column(String, primary_key=True)  # hostname:pid
+    hostname = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False)
+    completed_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+
+
+# --- Watcher leadership (see db/leader.py) ---
+
+class WatcherLock(Base):
+    __tablename__ = "watcher_locks"
+
+    name = Column(String, primary_key=True)  # watcher:<slot>
+    holder = Column(String, nullable=False)
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# --- Shared download progress and background jobs (see db/activity.py) ---
+
+class DownloadProgress(Base):
+    __tablename__ = "download_progress"
+
+    youtube_id = Column(String, primary_key=True)
+    worker_id = Column(String, nullable=False)  # hostname:pid of the downloading process
+    data = Column(Text, nullable=False)  # JSON entry of progress.ProgressTable
+    updated_at = Column(DateTime, nullable=False)
+
+
+class JobRecord(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True)
+    worker_id = Column(String, nullable=False)  # hostname:pid of the process running it
+    kind = Column(String, nullable=False)
+    key = Column(String, nullable=True)
+    status = Column(String, nullable=False)
+    total = Column(Integer, nullable=True)
+    done = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=False, default="[]")  # JSON list
+    result = Column(Text, nullable=True)  # JSON
+    # Epoch seconds, as reported by jobs.Job.to_dict()
+    created_at = Column(Float, nullable=False, index=True)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
@@ -0,0 +1,178 @@
+"""
+Full-text search index over track titles and artists.
+
+On SQLite the index is an external-content FTS5 table kept in sync with
+``tracks`` by triggers, so every writer (watcher, API, maintenance scripts)
+updates it transparently. On PostgreSQL it is a GIN expression index over a
+weighted ``tsvector``, which needs no triggers. Other engines fall back to
+``ILIKE`` matching.
+"""
+
+import logging
+import re
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "tracks_fts"
+
+_CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    title,
+    artist,
+    content='tracks',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_ai AFTER INSERT ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, artist)
+        VALUES (new.id, new.title, new.artist);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_ad AFTER DELETE ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, artist)
+        VALUES ('delete', old.id, old.title, old.artist);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_au AFTER UPDATE OF title, artist ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, artist)
+        VALUES ('delete', old.id, old.title, old.artist);
+        INSERT INTO {FTS_TABLE}(rowid, title, artist)
+        VALUES (new.id, new.title, new.artist);
+    END
+    """,
+]
+
+# Title matches weigh more than artist matches when ranking results
+_RANK_WEIGHTS = (2.0, 1.0)
+
+PG_INDEX = "ix_tracks_search"
+
+# Must match the indexed expression exactly for PostgreSQL to use the index
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(artist, '')), 'B')"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_enabled_urls: set[str] = set()
+
+
+def check_search_index(engine: Engine) -> bool:
+    """Enable index-backed search if migration 3 installed the index.
+
+    Read-only: the schema belongs to the migrations. Returns True when the index
+    is usable on this engine.
+    """
+    url = str(engine.url)
+    _enabled_urls.discard(url)
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        return False
+
+    with engine.connect() as conn:
+        installed = _index_installed(conn)
+    if not installed:
+        logger.warning("Full-text search index missing, falling back to LIKE search")
+        return False
+
+    _enabled_urls.add(url)
+    return True
+
+
+def _index_installed(conn) -> bool:
+    if conn.dialect.name == "postgresql":
+        query, name = "SELECT 1 FROM pg_indexes WHERE indexname = :name", PG_INDEX
+    else:
+        query, name = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name", FTS_TABLE
+    return conn.execute(text(query), {"name": name}).first() is not None
+
+
+def create_search_index(conn) -> None:
+    """Create the FTS5 table (indexing existing rows) and its triggers on ``conn``.
+
+    Idempotent; raises if FTS5 is unavailable. Used by the schema migrations.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON tracks USING GIN (({_PG_DOCUMENT}))"))
+        return
+
+    if not _index_installed(conn):
+        conn.execute(text(_CREATE_TABLE))
+        # Index the rows that existed before the table was created
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        logger.info("Created full-text search index for tracks")
+    for ddl in _CREATE_TRIGGERS:
+        conn.execute(text(ddl))
+
+
+def is_enabled(engine: Engine) -> bool:
+    """Whether ``check_search_index`` found the index on this engine."""
+    return str(engine.url) in _enabled_urls
+
+
+def build_match_query(term: str) -> str | None:
+    """Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix query, so "beat fore" matches
+    "The Beatles - Forever" and FTS5 operators typed by users are inert.
+    """
+    tokens = _TOKEN_RE.findall(term or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def build_tsquery(term: str) -> str | None:
+    """PostgreSQL counterpart of ``build_match_query``: every word as a prefix."""
+    tokens = _TOKEN_RE.findall(term or "")
+    if not tokens:
+        return None
+    # \w+ tokens cannot contain quotes or tsquery operators
+    return " & ".join(f"'{token}':*" for token in tokens)
+
+
+def match_subquery(term: str, dialect: str = "sqlite"):
+    """Subquery yielding ``track_id`` and ``score`` (lower is better) for a search."""
+    if dialect == "postgresql":
+        return _pg_match_subquery(term)
+
+    match = build_match_query(term)
+    if match is None:
+        return None
+    title_weight, artist_weight = _RANK_WEIGHTS
+    stmt = (
+        text(
+            f"SELECT rowid AS track_id, bm25({FTS_TABLE}, {title_weight}, {artist_weight}) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(track_id=Integer, score=Float)
+    )
+    return stmt.subquery("track_search")
+
+
+def _pg_match_subquery(term: str):
+    query = build_tsquery(term)
+    if query is None:
+        return None
+    title_weight, artist_weight = _RANK_WEIGHTS
+    # ts_rank weights are ordered {D, C, B, A}; scores are negated so lower is better
+    weights = f"'{{0, 0, {artist_weight / title_weight}, 1}}'"
+    stmt = (
+        text(
+            f"SELECT id AS track_id, -ts_rank({weights}, {_PG_DOCUMENT}, to_tsquery('simple', :query)) AS score "
+            f"FROM tracks WHERE {_PG_DOCUMENT} @@ to_tsquery('simple', :query)"
+        )
+        .bindparams(query=query)
+        .columns(track_id=Integer, score=Float)
+    )
+    return stmt.subquery("track_search")
@@ -0,0 +1,157 @@
+"""
+Summary tables for the dashboard filters and counters.
+
+``track_status_counts``, ``track_artist_counts`` and ``track_year_counts`` are
+maintained by triggers (SQLite triggers, or a PL/pgSQL trigger function on
+PostgreSQL) in the same transaction as every change to ``tracks``, so
+``/tracks/stats``, ``/tracks/artists`` and ``/tracks/years`` read a handful of
+rows instead of aggregating the whole table.
+"""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# (table, key column, tracks column, key expression, condition); expressions use
+# {row} so they can be rendered for trigger rows (new/old) or for the table itself
+_DIMENSIONS = [
+    (
+        "track_status_counts",
+        "status",
+        "download_status",
+        "{row}.download_status",
+        "{row}.download_status IS NOT NULL",
+    ),
+    (
+        "track_artist_counts",
+        "artist",
+        "artist",
+        "{row}.artist",
+        "{row}.artist IS NOT NULL AND trim({row}.artist) != ''",
+    ),
+    (
+        "track_year_counts",
+        "year",
+        "published_at",
+        "substr({row}.published_at, 1, 4)",
+        "length({row}.published_at) >= 4",
+    ),
+]
+
+_enabled_urls: set[str] = set()
+
+
+def _increment(table: str, key: str, expr: str, cond: str, row: str) -> str:
+    return (
+        f"INSERT INTO {table}({key}, count) "
+        f"SELECT {expr.format(row=row)}, 1 WHERE {cond.format(row=row)} "
+        f"ON CONFLICT({key}) DO UPDATE SET count = {table}.count + 1;"
+    )
+
+
+def _decrement(table: str, key: str, expr: str, cond: str, row: str) -> str:
+    value = expr.format(row=row)
+    return (
+        f"UPDATE {table} SET count = count - 1 WHERE {cond.format(row=row)} AND {key} = {value}; "
+        f"DELETE FROM {table} WHERE count <= 0 AND {key} = {value};"
+    )
+
+
+def _trigger_ddl() -> list[str]:
+    on_insert = "\n".join(_increment(t, k, e, c, "new") for t, k, _, e, c in _DIMENSIONS)
+    on_delete = "\n".join(_decrement(t, k, e, c, "old") for t, k, _, e, c in _DIMENSIONS)
+    ddl = [
+        f"CREATE TRIGGER track_summary_ai AFTER INSERT ON tracks BEGIN\n{on_insert}\nEND",
+        f"CREATE TRIGGER track_summary_ad AFTER DELETE ON tracks BEGIN\n{on_delete}\nEND",
+    ]
+    for table, key, column, expr, cond in _DIMENSIONS:
+        ddl.append(
+            f"CREATE TRIGGER track_summary_au_{key} AFTER UPDATE OF {column} ON tracks "
+            f"WHEN old.{column} IS NOT new.{column} BEGIN\n"
+            f"{_decrement(table, key, expr, cond, 'old')}\n"
+            f"{_increment(table, key, expr, cond, 'new')}\n"
+            f"END"
+        )
+    return ddl
+
+
+def _pg_trigger_ddl() -> list[str]:
+    # One row-level function; each dimension is only touched when its column changed
+    steps = []
+    for table, key, column, expr, cond in _DIMENSIONS:
+        changed = f"(TG_OP = 'UPDATE' AND OLD.{column} IS DISTINCT FROM NEW.{column})"
+        steps.append(
+            f"IF TG_OP = 'DELETE' OR {changed} THEN\n{_decrement(table, key, expr, cond, 'OLD')}\nEND IF;\n"
+            f"IF TG_OP = 'INSERT' OR {changed} THEN\n{_increment(table, key, expr, cond, 'NEW')}\nEND IF;"
+        )
+    body = "\n".join(steps)
+    columns = ", ".join(column for _, _, column, _, _ in _DIMENSIONS)
+    return [
+        f"CREATE OR REPLACE FUNCTION track_summary_maintain() RETURNS trigger AS $$\n"
+        f"BEGIN\n{body}\nRETURN NULL;\nEND;\n$$ LANGUAGE plpgsql",
+        f"CREATE TRIGGER track_summary AFTER INSERT OR DELETE OR UPDATE OF {columns} ON tracks "
+        f"FOR EACH ROW EXECUTE FUNCTION track_summary_maintain()",
+    ]
+
+
+def _triggers_installed(conn) -> bool:
+    if conn.dialect.name == "postgresql":
+        query = "SELECT 1 FROM pg_trigger WHERE tgname = 'track_summary' AND NOT tgisinternal"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'track_summary_ai'"
+    return conn.execute(text(query)).first() is not None
+
+
+def rebuild_summaries(conn) -> None:
+    """Recompute every summary table from ``tracks``."""
+    for table, key, _, expr, cond in _DIMENSIONS:
+        value = expr.format(row="tracks")
+        conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(
+            text(
+                f"INSERT INTO {table}({key}, count) SELECT {value}, COUNT(*) FROM tracks "
+                f"WHERE {cond.format(row='tracks')} GROUP BY {value}"
+            )
+        )
+
+
+def create_summary_triggers(conn) -> None:
+    """Install the maintenance triggers on ``conn`` and backfill the tables.
+
+    Idempotent. Used by the schema migrations.
+    """
+    if not _triggers_installed(conn):
+        ddl_statements = _pg_trigger_ddl() if conn.dialect.name == "postgresql" else _trigger_ddl()
+        for ddl in ddl_statements:
+            conn.execute(text(ddl))
+        rebuild_summaries(conn)
+        logger.info("Created track summary tables")
+
+
+def check_summary_tables(engine: Engine) -> bool:
+    """Enable the summary tables if migration 4 installed their triggers.
+
+    Read-only: the schema belongs to the migrations. Returns True when the
+    summaries can be trusted on this engine.
+    """
+    url = str(engine.url)
+    _enabled_urls.discard(url)
+    if engine.dialect.name not in ("sqlite", "postgresql"):
+        return False
+
+    with engine.connect() as conn:
+        installed = _triggers_installed(conn)
+    if not installed:
+        logger.warning("Track summary triggers missing, falling back to aggregate queries")
+        return False
+
+    _enabled_urls.add(url)
+    return True
+
+
+def is_enabled(engine: Engine) -> bool:
+    """Whether ``check_summary_tables`` found the triggers on this engine."""
+    return str(engine.url) in _enabled_urls
@@ -0,0 +1,102 @@
+"""
+Download worker registry.
+
+Every watcher process keeps a ``workers`` row keyed by its ``hostname:pid`` id
+and refreshes ``heartbeat_at`` every ``HEARTBEAT_INTERVAL``. The same heartbeat
+renews the worker's track and source leases (``db/claims.py``): when a node
+crashes, its leases run out after ``DEFAULT_LEASE`` and the other workers take
+its work over.
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .claims import DEFAULT_LEASE, renew_claims
+from .leader import current_holders
+from .models import Track, Worker
+
+HEARTBEAT_INTERVAL = DEFAULT_LEASE / 4
+# Rows of workers that stopped heartbeating are kept this long for /workers
+RETENTION = timedelta(days=7)
+
+_workers = Worker.__table__
+_tracks = Track.__table__
+
+
+def current_worker_id() -> str:
+    """``hostname:pid`` of this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def heartbeat(db: Session, worker_id: str, now: datetime | None = None) -> None:
+    """Register ``worker_id`` on its first call; refresh its heartbeat and leases on later ones"""
+    now = now or datetime.utcnow()
+    connection = db.connection()
+    updated = connection.execute(
+        update(_workers).where(_workers.c.id == worker_id).values(heartbeat_at=now)
+    ).rowcount
+    if not updated:
+        connection.execute(delete(_workers).where(_workers.c.heartbeat_at < now - RETENTION))
+        connection.execute(
+            insert(_workers).values(
+                id=worker_id,
+                hostname=worker_id.rsplit(":", 1)[0],
+                started_at=now,
+                heartbeat_at=now,
+                completed_count=0,
+                failed_count=0,
+            )
+        )
+    renew_claims(db, worker_id, now)
+    db.commit()
+
+
+def record_download(db: Session, worker_id: str, succeeded: bool) -> None:
+    """Count a finished download; committed together with the track's new status"""
+    column = _workers.c.completed_count if succeeded else _workers.c.failed_count
+    db.connection().execute(
+        update(_workers).where(_workers.c.id == worker_id).values({column: column + 1})
+    )
+
+
+def list_workers(db: Session, now: datetime | None = None) -> list[dict]:
+    """Known workers with liveness, leadership, current claims and throughput"""
+    now = now or datetime.utcnow()
+    active = set(current_holders(db, now))
+    last_hour = dict(
+        db.execute(
+            select(_tracks.c.downloaded_by, func.count())
+            .where(_tracks.c.downloaded_at >= now - timedelta(hours=1), _tracks.c.downloaded_by.is_not(None))
+            .group_by(_tracks.c.downloaded_by)
+        ).all()
+    )
+    claimed = dict(
+        db.execute(
+            select(_tracks.c.claimed_by, func.count())
+            .where(_tracks.c.claimed_by.is_not(None))
+            .group_by(_tracks.c.claimed_by)
+        ).all()
+    )
+
+    workers = []
+    for row in db.execute(select(_workers).order_by(_workers.c.started_at)).all():
+        uptime_hours = max((row.heartbeat_at - row.started_at).total_seconds() / 3600, 1 / 60)
+        workers.append({
+            "id": row.id,
+            "hostname": row.hostname,
+            "started_at": row.started_at,
+            "heartbeat_at": row.heartbeat_at,
+            "alive": row.heartbeat_at >= now - DEFAULT_LEASE,
+            # Holds a watcher_locks slot, i.e. runs the scan loop (others stand by)
+            "active": row.id in active,
+            "claimed_tracks": claimed.get(row.id, 0),
+            "completed": row.completed_count,
+            "failed": row.failed_count,
+            "completed_last_hour": last_hour.get(row.id, 0),
+            "completed_per_hour": round(row.completed_count / uptime_hours, 1),
+        })
+    return workers
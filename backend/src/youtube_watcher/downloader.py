@@ -5,12 +5,15 @@ Downloader de YouTube - Descarga y convierte videos a FLAC
 import logging
 import subprocess
 import tempfile
+import threading
 from pathlib import Path
 from typing import Dict, Optional
 
-import yt_dlp
-
+from .cookies import CookiePool, cookie_version, report_current_cookie_throttled, using_cookie
 from .metadata_handler import MetadataHandler
+from .progress import progress_table
+from .ratelimit import MEDIA, YtDlpLogger, rate_limiter
+from .ydl_pool import new_youtube_dl, ydl_pool
 
 logger = logging.getLogger(__name__)
 
@@ -20,26 +23,33 @@ class YouTubeDownloader:
     Clase para descargar y convertir videos de YouTube a FLAC
     """
 
-    def __init__(self, download_path: str, cookies_path: str | None = None):
+    def __init__(
+        self, download_path: str, cookies_path: str | None = None, cookie_pool: CookiePool | None = None
+    ):
         """
         Inicializar downloader.
 
         Args:
             download_path: Directorio donde guardar archivos
+            cookies_path: Fichero de cookies único (si no se pasa ``cookie_pool``)
+            cookie_pool: Conjunto de cookies compartido con el watcher; se puede
+                cambiar sin recrear el downloader
         """
         self.download_path = Path(download_path)
         self.metadata_handler = MetadataHandler()
-        self.cookies_path = cookies_path
+        self.cookie_pool = cookie_pool if cookie_pool is not None else CookiePool([cookies_path] if cookies_path else [])
+        # Vídeo en curso por hilo, para etiquetar el progreso de ffmpeg
+        self._context = threading.local()
 
         # Crear directorio si no existe
         self.download_path.mkdir(parents=True, exist_ok=True)
         
         # Plantilla de salida de yt-dlp
         # Usamos %(id)s para que yt-dlp maneje el nombre dinámicamente según el video,
-        # lo que nos permite usar una sola instancia persistente de YoutubeDL
+        # lo que permite reutilizar las instancias de YoutubeDL del pool (ydl_pool.py)
         out_tmpl = str(self.download_path / "temp_%(id)s.%(ext)s")
         
-        ydl_opts = {
+        self._ydl_opts = {
             "format": "bestaudio/best",
             "outtmpl": out_tmpl,
             "quiet": True,
@@ -55,23 +65,56 @@ class YouTubeDownloader:
                     "preferredquality": "0",
                 }
             ],
+            "progress_hooks": [self._on_download_progress],
+            "postprocessor_hooks": [self._on_postprocessor_progress],
         }
 
-        if self.cookies_path:
-            ydl_opts["cookiefile"] = self.cookies_path
-            
-        self._ydl = yt_dlp.YoutubeDL(ydl_opts)
+    @property
+    def cookies_path(self) -> str | None:
+        paths = self.cookie_pool.paths
+        return paths[0] if paths else None
+
+    def _checkout_ydl(self, cookie: Optional[str]):
+        """YoutubeDL del pool para descargar con ``cookie``. La clave incluye la versión
+        del fichero: uno reemplazado usa instancias nuevas y las viejas caducan solas"""
+        key = ("download", str(self.download_path), cookie, cookie_version(cookie))
+        return ydl_pool.checkout(key, lambda: self._build_ydl(cookie))
+
+    def _build_ydl(self, cookie: Optional[str]):
+        opts = dict(self._ydl_opts)
+        # Los 429/403 que yt-dlp sólo registra (ignoreerrors) frenan el limitador
+        # y cuentan como fallo de la cookie de la petición en curso
+        opts["logger"] = YtDlpLogger(MEDIA, on_throttle=report_current_cookie_throttled)
+        if cookie:
+            opts["cookiefile"] = cookie
+        return new_youtube_dl(opts)
 
     def download_and_convert(self, video_data: Dict) -> Optional[Dict]:
         """
         Descargar y convertir un video a FLAC con metadatos.
 
+        El progreso se publica en ``progress_table`` mientras dura la descarga.
+
         Args:
             video_data: Diccionario con información del video
 
         Returns:
             Dict con información de descarga o None si falla
         """
+        video_id = video_data.get("id")
+        if not video_id:
+            return self._download_and_convert(video_data)
+
+        progress_table.start(video_id, video_data.get("title", "Unknown Title"))
+        self._context.video_id = video_id
+        self._context.duration = video_data.get("duration")
+        try:
+            return self._download_and_convert(video_data)
+        finally:
+            self._context.video_id = None
+            progress_table.finish(video_id)
+
+    def _download_and_convert(self, video_data: Dict) -> Optional[Dict]:
         title = video_data.get("title", "Unknown Title")
         artist = (
             video_data.get("artist")
@@ -138,6 +181,7 @@ class YouTubeDownloader:
         temp_opus, full_info = opus_result
         
         if full_info:
+            self._context.duration = full_info.get("duration") or getattr(self._context, "duration", None)
             new_upload_date = full_info.get("upload_date")
             if new_upload_date and len(new_upload_date) == 8:
                 formatted_date = f"{new_upload_date[:4]}-{new_upload_date[4:6]}-{new_upload_date[6:8]}"
@@ -152,6 +196,7 @@ class YouTubeDownloader:
         temp_opus.unlink(missing_ok=True)
 
         # Paso 3: Añadir metadatos y portada
+        progress_table.update(video_data.get("id"), stage="tagging")
         self.metadata_handler.add_metadata_and_cover(
             output_path, title, artist, album, formatted_date, thumbnail_url
         )
@@ -183,7 +228,13 @@ class YouTubeDownloader:
 
             # Descargar usando la URL del video y capturar información completa
             url = f"https://www.youtube.com/watch?v={video_data['id']}"
-            info = self._ydl.extract_info(url, download=True)
+            cookie = self.cookie_pool.acquire()
+            rate_limiter.acquire(MEDIA)
+            with self._checkout_ydl(cookie) as ydl, using_cookie(self.cookie_pool, cookie):
+                info = ydl.extract_info(url, download=True)
+            if info:
+                rate_limiter.report_success(MEDIA)
+                self.cookie_pool.report_success(cookie)
 
             # Buscar el archivo descargado (puede tener extensión .opus o .webm)
             for ext in ["opus", "webm"]:
@@ -212,6 +263,11 @@ class YouTubeDownloader:
         """
         ffmpeg_cmd = [
             "ffmpeg",
+            "-nostats",
+            "-loglevel",
+            "error",
+            "-progress",
+            "pipe:1",
             "-i",
             str(opus_path),
             "-vn",
@@ -225,17 +281,57 @@ class YouTubeDownloader:
             str(flac_path),
         ]
 
-        try:
-            logger.info(f"Convirtiendo a FLAC: {flac_path.name}")
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True)
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error convirtiendo a FLAC para '{title}': {e}")
-            if e.stderr:
-                logger.error(f"ffmpeg stderr: {e.stderr}")
-            if e.stdout:
-                logger.error(f"ffmpeg stdout: {e.stdout}")
+        video_id = getattr(self._context, "video_id", None)
+        duration = getattr(self._context, "duration", None)
+        logger.info(f"Convirtiendo a FLAC: {flac_path.name}")
+        progress_table.update(video_id, stage="converting")
+
+        # -progress escribe bloques clave=valor en stdout. stderr va a un fichero temporal:
+        # con dos pipes, si ffmpeg llena el de stderr mientras leemos stdout se bloquean ambos
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            process = subprocess.Popen(
+                ffmpeg_cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True
+            )
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and value.isdigit():
+                    position = int(value) / 1_000_000
+                    fraction = min(1.0, position / duration) if duration else None
+                    progress_table.update(video_id, transcode_position=position, fraction=fraction)
+            returncode = process.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read()
+
+        if returncode != 0:
+            logger.error(f"Error convirtiendo a FLAC para '{title}': ffmpeg terminó con código {returncode}")
+            if stderr:
+                logger.error(f"ffmpeg stderr: {stderr}")
             return False
+        return True
+
+    def _on_download_progress(self, status: Dict):
+        """Hook de yt-dlp: bytes descargados, velocidad y ETA"""
+        video_id = (status.get("info_dict") or {}).get("id")
+        if status.get("status") == "downloading":
+            downloaded = status.get("downloaded_bytes")
+            total = status.get("total_bytes") or status.get("total_bytes_estimate")
+            progress_table.update(
+                video_id,
+                stage="downloading",
+                downloaded_bytes=downloaded,
+                total_bytes=total,
+                speed=status.get("speed"),
+                eta=status.get("eta"),
+                fraction=min(1.0, downloaded / total) if downloaded and total else None,
+            )
+        elif status.get("status") == "finished":
+            progress_table.update(video_id, stage="extracting")
+
+    def _on_postprocessor_progress(self, status: Dict):
+        """Hook de postprocesado de yt-dlp (extracción del audio con ffmpeg)"""
+        if status.get("status") == "started":
+            video_id = (status.get("info_dict") or {}).get("id")
+            progress_table.update(video_id, stage="extracting")
 
     def _sanitize_filename(self, filename: str) -> str:
         """
@@ -281,11 +377,3 @@ class YouTubeDownloader:
             return f"{stem}.{ext}"
         except Exception:
             return filename[:max_len]
-
-    def __del__(self):
-        """Asegurar el cierre de la instancia de YoutubeDL."""
-        if hasattr(self, '_ydl') and self._ydl:
-            try:
-                self._ydl.close()
-            except Exception:
-                pass
@@ -0,0 +1,101 @@
+"""
+Hub de eventos en proceso para notificar cambios al dashboard (SSE).
+
+Cualquier hilo (watcher, descargas, rutas de la API) publica eventos; cada
+cliente suscrito tiene un buffer acotado propio que se consume desde el bucle
+asyncio del servidor. Si un cliente lento desborda su buffer, se descartan sus
+eventos pendientes y recibe un único ``resync`` para que recargue el estado.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+class Subscription:
+    """Buffer acotado de un cliente, ligado al bucle asyncio que lo consume"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_size: int):
+        self._loop = loop
+        self._buffer: deque = deque()
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self.overflowed = False
+
+    def _push(self, events: List[Event]):
+        with self._lock:
+            if self.overflowed:
+                return
+            if len(self._buffer) + len(events) > self._buffer_size:
+                self._buffer.clear()
+                self.overflowed = True
+            else:
+                self._buffer.extend(events)
+        if not self._wakeup.is_set():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def get(self, timeout: float) -> Tuple[List[Event], bool]:
+        """Esperar eventos; devuelve ``(eventos, desbordado)`` o ``([], False)`` al expirar"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return [], False
+        with self._lock:
+            self._wakeup.clear()
+            events = list(self._buffer)
+            self._buffer.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class EventHub:
+    """Difusión de eventos a todos los suscriptores activos"""
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def subscribe(self) -> Subscription:
+        """Registrar un cliente; debe llamarse desde el bucle asyncio que lo atenderá"""
+        subscription = Subscription(asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        self.publish_many([(event_type, data)])
+
+    def publish_many(self, events: List[Tuple[str, Dict[str, Any]]]):
+        """Publicar desde cualquier hilo sin bloquear al productor"""
+        if not events or not self._subscribers:
+            return
+        numbered = [(next(self._sequence), event_type, data) for event_type, data in events]
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription._push(numbered)
+            except RuntimeError:
+                # El bucle del cliente ya se cerró
+                self.unsubscribe(subscription)
+
+
+event_hub = EventHub()
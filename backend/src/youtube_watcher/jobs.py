@@ -0,0 +1,279 @@
+"""
+Trabajos en segundo plano con estado consultable (``GET /api/jobs/{id}``).
+
+Las rutas de la API encolan aquí el trabajo lento (borrado de ficheros,
+llamadas a Navidrome, descargas en lote) y responden en el acto con el id del
+trabajo. Cada cambio de estado se publica como evento ``job.updated``.
+
+Con ``persist_to`` el estado se guarda además en la BD (``db/activity.py``): la
+consulta de un trabajo puede llegar a otro worker de uvicorn que no lo creó.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .events import event_hub
+
+logger = logging.getLogger(__name__)
+
+# Carriles: cada uno tiene su pool, y un lote largo sólo retrasa a los de su carril
+BULK_LANE = "bulk"
+# Lo que el usuario espera ver arrancar, como una descarga suelta
+INTERACTIVE_LANE = "interactive"
+# Llamadas HTTP a Navidrome: cortas, pero no deben esperar a un lote de descargas
+NAVIDROME_LANE = "navidrome"
+
+# Los avances de un trabajo se guardan en la BD como mucho con esta frecuencia
+# (los cambios de estado, siempre)
+PERSIST_INTERVAL = 1.0
+
+
+class Job:
+    """Estado de un trabajo: ``queued`` → ``running`` → ``completed`` | ``failed``"""
+
+    def __init__(self, kind: str, total: Optional[int] = None, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        # Identifica el trabajo para deduplicarlo (ver JobRegistry.submit_once)
+        self.key = key
+        self.status = "queued"
+        self.total = total
+        self.done = 0
+        self.errors: List[str] = []
+        self.result: Any = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Lo instala JobRegistry para guardar el estado en la BD
+        self._on_change: Optional[Callable[["Job"], None]] = None
+        self._persisted_status: Optional[str] = None
+        self._persisted_at = 0.0
+
+    def advance(self, count: int = 1):
+        """Marcar ``count`` elementos como procesados"""
+        self.done += count
+        self._publish()
+
+    def add_error(self, message: str):
+        """Registrar el fallo de un elemento sin abortar el trabajo"""
+        self.errors.append(message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "errors": list(self.errors),
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _publish(self):
+        event_hub.publish("job.updated", self.to_dict())
+        if self._on_change is not None:
+            self._on_change(self)
+
+
+class JobRegistry:
+    """Ejecuta trabajos en pools de hilos (uno por carril) y conserva los últimos ``keep``.
+
+    Los lotes largos (``BULK_LANE``) no retrasan a los trabajos interactivos ni a las
+    llamadas a Navidrome, que tienen su propio pool. Navidrome usa un solo hilo: las
+    altas y bajas de playlists se aplican en el orden en que se piden.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, keep: int = 200, interactive_workers: int = 2, navidrome_workers: int = 1
+    ):
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lanes = {
+            BULK_LANE: self._executor,
+            INTERACTIVE_LANE: ThreadPoolExecutor(
+                max_workers=interactive_workers, thread_name_prefix="job-interactive"
+            ),
+            NAVIDROME_LANE: ThreadPoolExecutor(max_workers=navidrome_workers, thread_name_prefix="job-navidrome"),
+        }
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active_keys: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._session_factory: Optional[Callable] = None
+        self._worker_id: Optional[str] = None
+
+    def persist_to(self, session_factory: Optional[Callable], worker_id: Optional[str] = None):
+        """Compartir el estado de los trabajos a través de la BD (``None`` lo desactiva)"""
+        self._session_factory = session_factory
+        self._worker_id = worker_id
+
+    def submit(
+        self, kind: str, fn: Callable[..., Any], *args: Any, total: Optional[int] = None, lane: str = BULK_LANE
+    ) -> Job:
+        """Encolar ``fn(job, *args)``; su valor de retorno queda en ``job.result``"""
+        job = Job(kind, total)
+        job._on_change = self._persist
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job._publish()
+        self._lanes[lane].submit(self._run, job, fn, args)
+        return job
+
+    def submit_once(
+        self,
+        key: str,
+        kind: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        total: Optional[int] = None,
+        lane: str = BULK_LANE,
+    ) -> Tuple[Job, bool]:
+        """Como ``submit``, pero si ya hay un trabajo sin terminar con la misma ``key``
+        se devuelve ese (``attached=True``) en lugar de encolar otro"""
+        with self._lock:
+            job = self._active_keys.get(key)
+            if job is not None:
+                return job, True
+            job = Job(kind, total, key)
+            job._on_change = self._persist
+            self._active_keys[key] = job
+            self._jobs[job.id] = job
+            self._prune()
+        job._publish()
+        self._lanes[lane].submit(self._run, job, fn, args)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def describe(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de un trabajo de este proceso o, con ``persist_to``, de cualquier otro"""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self._query(lambda db, activity: activity.load_job(db, job_id))
+
+    def describe_all(self) -> List[Dict[str, Any]]:
+        """Últimos ``keep`` trabajos, los más recientes primero (los de este proceso, al día)"""
+        local = {job.id: job.to_dict() for job in self.list()}
+        shared = self._query(lambda db, activity: activity.recent_jobs(db, self.keep)) or []
+        jobs = {job["id"]: job for job in shared}
+        jobs.update(local)
+        return sorted(jobs.values(), key=lambda job: job["created_at"], reverse=True)[:self.keep]
+
+    def _persist(self, job: Job):
+        if self._session_factory is None:
+            return
+        now = time.monotonic()
+        if job.status == job._persisted_status and now - job._persisted_at < PERSIST_INTERVAL:
+            return
+        job._persisted_status, job._persisted_at = job.status, now
+        state = job.to_dict()
+
+        def save(db, activity):
+            activity.save_job(db, self._worker_id, state)
+            if state["finished_at"] is not None:
+                activity.prune_jobs(db, self.keep)
+
+        self._query(save)
+
+    def _query(self, operation: Callable):
+        """Ejecutar ``operation(db, activity)`` si el estado se comparte; los fallos de la BD
+        sólo se registran"""
+        if self._session_factory is None:
+            return None
+        from .db import activity
+
+        try:
+            with self._session_factory() as db:
+                return operation(db, activity)
+        except Exception as e:
+            logger.warning(f"Error compartiendo el estado de los trabajos: {e}")
+            return None
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple):
+        job.status = "running"
+        job.started_at = time.time()
+        job._publish()
+        try:
+            job.result = fn(job, *args)
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Error en el trabajo {job.kind} ({job.id}): {e}")
+            job.errors.append(str(e))
+            job.status = "failed"
+        job.finished_at = time.time()
+        if job.key is not None:
+            with self._lock:
+                self._active_keys.pop(job.key, None)
+        job._publish()
+
+    def _prune(self):
+        # Se descartan primero los trabajos terminados más antiguos
+        excess = len(self._jobs) - self.keep
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class InFlight:
+    """Registro por clave del trabajo en curso: la primera llamada lo ejecuta y las
+    concurrentes con la misma clave esperan a que termine y reciben su resultado"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def run(self, key: str, fn: Callable[..., Any], *args: Any) -> Tuple[Any, bool]:
+        """Ejecutar ``fn(*args)`` una sola vez por ``key``; devuelve ``(resultado, attached)``"""
+        with self._lock:
+            call = self._calls.get(key)
+            owner = call is None
+            if owner:
+                call = self._calls[key] = _Call()
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+job_registry = JobRegistry()
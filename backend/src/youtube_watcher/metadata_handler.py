@@ -10,6 +10,8 @@ from PIL import Image
 from io import BytesIO
 from mutagen.flac import FLAC, Picture
 
+from .ratelimit import THUMBNAILS, rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
@@ -96,8 +98,12 @@ class MetadataHandler:
                     "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
                 )
             }
+            rate_limiter.acquire(THUMBNAILS)
             response = requests.get(thumbnail_url, timeout=10, headers=headers)
+            if response.status_code in (403, 429):
+                rate_limiter.report_throttled(THUMBNAILS)
             response.raise_for_status()
+            rate_limiter.report_success(THUMBNAILS)
             ctype = response.headers.get("Content-Type")
             clen = response.headers.get("Content-Length")
             logger.debug(
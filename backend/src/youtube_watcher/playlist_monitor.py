@@ -5,30 +5,42 @@ Monitor de playlist de YouTube - Obtiene información de videos
 import logging
 import tempfile
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
-import yt_dlp
+from .cookies import CookiePool, cookie_version, report_current_cookie_throttled, using_cookie
+from .ratelimit import METADATA, YtDlpLogger, rate_limiter
+from .ydl_pool import new_youtube_dl, ydl_pool
 
 logger = logging.getLogger(__name__)
 
+# Marca de fin del listado (yt-dlp puede devolver entradas None)
+_END = object()
+
 
 class PlaylistMonitor:
     """
     Clase para monitorear y obtener información de playlists de YouTube
     """
 
-    def __init__(self, playlist_url: str, cookies_path: str | None = None):
+    def __init__(self, playlist_url: str, cookies_path: str | None = None, cookie_pool: CookiePool | None = None):
         """
         Inicializar monitor de playlist.
 
         Args:
             playlist_url: URL de la playlist de YouTube
+            cookies_path: Fichero de cookies a usar
+            cookie_pool: Conjunto del que tomar la cookie si no se indica ``cookies_path``;
+                recibe el resultado de las peticiones para llevar la salud de cada cookie
         """
         self.playlist_url = playlist_url
+        self.cookie_pool = cookie_pool
+        if cookies_path is None and cookie_pool is not None:
+            cookies_path = cookie_pool.acquire()
         self.cookies_path = cookies_path
         
-        # Inicializar una única instancia de YoutubeDL para evitar leaks de descriptores
-        ydl_opts = {
+        # Las instancias de YoutubeDL salen del pool compartido (ydl_pool.py): se reutilizan
+        # entre pasadas y fuentes en lugar de crear (y filtrar descriptores de) una por monitor
+        self._ydl_opts = {
             "extract_flat": True,
             "ignoreerrors": True,
             "quiet": True,
@@ -36,11 +48,12 @@ class PlaylistMonitor:
             "cachedir": str(Path(tempfile.gettempdir()) / "yt-dlp-cache"),
             "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "nocheckcertificate": True,
+            "logger": YtDlpLogger(METADATA, on_throttle=report_current_cookie_throttled),
         }
         if self.cookies_path:
-            ydl_opts["cookiefile"] = self.cookies_path
-            
-        self._ydl = yt_dlp.YoutubeDL(ydl_opts)
+            self._ydl_opts["cookiefile"] = self.cookies_path
+        # Si el último recorrido con iter_playlist_videos leyó el listado entero
+        self.listing_complete = False
 
     def get_playlist_videos(self) -> List[Dict]:
         """
@@ -50,7 +63,7 @@ class PlaylistMonitor:
             Lista de diccionarios con información de cada video
         """
         try:
-            info = self._ydl.extract_info(self.playlist_url, download=False)
+            info = self._extract_info()
 
             if not info:
                 return []
@@ -66,6 +79,50 @@ class PlaylistMonitor:
             logger.error(f"Error obteniendo videos de playlist: {e}")
             return []
 
+    def iter_playlist_videos(self) -> Iterator[Dict]:
+        """
+        Recorrer los videos de la playlist a medida que yt-dlp descarga cada página
+        del listado, sin esperar a tenerla entera (``extract_info`` con
+        ``process=False`` devuelve las entradas como generador).
+
+        La instancia de YoutubeDL queda reservada mientras el generador siga abierto:
+        si no se agota hay que cerrarlo (``close()``). Al terminar,
+        ``listing_complete`` indica si se leyó el listado completo.
+
+        Yields:
+            Diccionario con información de cada video
+        """
+        self.listing_complete = False
+        try:
+            rate_limiter.acquire(METADATA)
+            with self._checkout_ydl() as ydl:
+                info = self._resolve_listing(ydl)
+                if not info:
+                    return
+
+                if "entries" not in info:
+                    # Fallback: si es un solo video
+                    yield info
+                else:
+                    entries = iter(info["entries"])
+                    while True:
+                        # La cookie se marca en cada página: entre una y otra el hilo descarga
+                        with using_cookie(self.cookie_pool, self.cookies_path):
+                            entry = next(entries, _END)
+                        if entry is _END:
+                            break
+                        # Filtrar entradas nulas que a veces retorna yt-dlp
+                        if entry:
+                            yield entry
+
+            self.listing_complete = True
+            rate_limiter.report_success(METADATA)
+            if self.cookie_pool is not None:
+                self.cookie_pool.report_success(self.cookies_path)
+
+        except Exception as e:
+            logger.error(f"Error obteniendo videos de playlist: {e}")
+
     def get_playlist_info(self) -> Dict:
         """
         Obtener información general de la playlist.
@@ -76,7 +133,7 @@ class PlaylistMonitor:
         try:
             # Reutilizamos la instancia pero forzamos dump_single_json internamente si fuera necesario
             # En realidad, ydl.extract_info(..., download=False) ya devuelve un dict, dump_single_json sólo afecta a la salida por CLI
-            info = self._ydl.extract_info(self.playlist_url, download=False)
+            info = self._extract_info()
 
             if not info:
                 return {}
@@ -95,10 +152,30 @@ class PlaylistMonitor:
             logger.error(f"Error obteniendo información de playlist: {e}")
             return {}
 
-    def __del__(self):
-        """Asegurar el cierre de la instancia si el recolector pasa por aquí"""
-        if hasattr(self, '_ydl') and self._ydl:
-            try:
-                self._ydl.close()
-            except Exception:
-                pass
+    def _checkout_ydl(self):
+        key = ("monitor", self.cookies_path, cookie_version(self.cookies_path))
+        return ydl_pool.checkout(key, lambda: new_youtube_dl(self._ydl_opts))
+
+    def _resolve_listing(self, ydl, max_redirects: int = 3) -> Dict | None:
+        """Resultado sin procesar del listado, siguiendo las redirecciones de yt-dlp
+        (p. ej. de un canal a su pestaña de vídeos) hasta llegar a las entradas"""
+        url, ie_key = self.playlist_url, None
+        for _ in range(max_redirects + 1):
+            with using_cookie(self.cookie_pool, self.cookies_path):
+                info = ydl.extract_info(url, download=False, ie_key=ie_key, process=False)
+            # Un enlace a un vídeo suelto no se resuelve: basta con su id
+            if not info or info.get("_type") not in ("url", "url_transparent") or info.get("ie_key") == "Youtube":
+                return info
+            url, ie_key = info["url"], info.get("ie_key")
+        return info
+
+    def _extract_info(self) -> Dict | None:
+        """``extract_info`` sin descarga, dentro del presupuesto de peticiones de metadatos"""
+        rate_limiter.acquire(METADATA)
+        with self._checkout_ydl() as ydl, using_cookie(self.cookie_pool, self.cookies_path):
+            info = ydl.extract_info(self.playlist_url, download=False)
+        if info:
+            rate_limiter.report_success(METADATA)
+            if self.cookie_pool is not None:
+                self.cookie_pool.report_success(self.cookies_path)
+        return info
@@ -0,0 +1,117 @@
+"""
+Progreso en vivo de las descargas en curso (etapa, bytes, velocidad, ETA, transcodificación).
+
+La tabla no usa locks: cada escritura sustituye la entrada completa del
+diccionario (asignación atómica bajo el GIL) y los lectores iteran sobre una
+copia. Las actualizaciones se limitan a una cada ``min_interval`` segundos por
+vídeo salvo cambio de etapa, para que los hooks de yt-dlp/ffmpeg no frenen la
+descarga.
+
+Con ``persist_to`` cada entrada se guarda además en la BD (``db/activity.py``),
+para que la vean los demás procesos: la API con ``WATCHER_MODE=api`` mientras
+descarga el worker, o los otros workers de uvicorn.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .events import event_hub
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("queued", "downloading", "extracting", "converting", "tagging")
+
+
+class ProgressTable:
+    """Estado de las descargas activas indexado por ``youtube_id``"""
+
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._session_factory: Optional[Callable] = None
+        self._worker_id: Optional[str] = None
+
+    def persist_to(self, session_factory: Optional[Callable], worker_id: Optional[str] = None):
+        """Compartir el progreso a través de la BD (``None`` lo desactiva)"""
+        self._session_factory = session_factory
+        self._worker_id = worker_id
+
+    def start(self, video_id: str, title: str, stage: str = "queued"):
+        now = time.time()
+        self._write(video_id, {
+            "youtube_id": video_id,
+            "title": title,
+            "stage": stage,
+            "fraction": None,
+            "downloaded_bytes": None,
+            "total_bytes": None,
+            "speed": None,
+            "eta": None,
+            "transcode_position": None,
+            "started_at": now,
+            "updated_at": now,
+            "_written": time.monotonic(),
+        })
+
+    def update(self, video_id: Optional[str], stage: Optional[str] = None, **fields: Any):
+        """Actualizar una descarga; se descarta si llega antes del intervalo mínimo"""
+        entry = self._entries.get(video_id) if video_id else None
+        if entry is None:
+            return
+        now = time.monotonic()
+        stage_changed = stage is not None and stage != entry["stage"]
+        if not stage_changed and now - entry["_written"] < self.min_interval:
+            return
+        if stage_changed:
+            # Las métricas de la etapa anterior no aplican a la nueva
+            entry = {**entry, "fraction": None, "speed": None, "eta": None}
+        self._write(video_id, {
+            **entry,
+            **fields,
+            "stage": stage or entry["stage"],
+            "updated_at": time.time(),
+            "_written": now,
+        })
+
+    def finish(self, video_id: str):
+        if self._entries.pop(video_id, None) is not None:
+            event_hub.publish("track.progress", {"youtube_id": video_id, "stage": "finished"})
+            self._store(lambda db, activity: activity.delete_progress(db, video_id))
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(video_id)
+        return self._public(entry) if entry else None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Descargas en curso; con ``persist_to``, también las de los demás procesos"""
+        entries = {video_id: self._public(entry) for video_id, entry in list(self._entries.items())}
+        shared = self._store(lambda db, activity: activity.live_progress(db)) or []
+        return [*(entry for entry in shared if entry["youtube_id"] not in entries), *entries.values()]
+
+    def _write(self, video_id: str, entry: Dict[str, Any]):
+        self._entries[video_id] = entry
+        public = self._public(entry)
+        event_hub.publish("track.progress", public)
+        self._store(lambda db, activity: activity.save_progress(db, self._worker_id, public))
+
+    def _store(self, operation: Callable):
+        """Ejecutar ``operation(db, activity)`` si el progreso se comparte; un fallo de la BD
+        no debe interrumpir la descarga"""
+        if self._session_factory is None:
+            return None
+        from .db import activity
+
+        try:
+            with self._session_factory() as db:
+                return operation(db, activity)
+        except Exception as e:
+            logger.warning(f"Error compartiendo el progreso de descarga: {e}")
+            return None
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in entry.items() if not key.startswith("_")}
+
+
+progress_table = ProgressTable()
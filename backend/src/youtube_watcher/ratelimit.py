@@ -0,0 +1,205 @@
+"""
+Limitador de ritmo común para todo el tráfico hacia YouTube.
+
+Todas las llamadas del proceso (listados de playlists, descargas de audio,
+portadas de ytimg, ``backfill_dates.py``) piden un token al cubo de su clase:
+
+- ``metadata``: ``extract_info`` sin descarga (listados, fechas)
+- ``media``: descargas de audio con yt-dlp
+- ``thumbnails``: portadas
+
+Cada cubo se adapta (AIMD): ante un 429/403 reduce su ritmo a la mitad (hasta
+``min_rate``) y, pasado ``cooldown`` sin nuevos bloqueos, lo recupera poco a
+poco con cada petición correcta hasta volver al configurado. Se limitan las
+llamadas de alto nivel: una descarga de yt-dlp cuenta como una petición aunque
+internamente haga varias.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+METADATA = "metadata"
+MEDIA = "media"
+THUMBNAILS = "thumbnails"
+
+# Mensajes de yt-dlp que indican que YouTube está limitando
+_THROTTLE_PATTERN = re.compile(r"HTTP Error (429|403)|confirm you.re not a bot", re.IGNORECASE)
+
+
+class AdaptiveTokenBucket:
+    """Cubo de tokens cuyo ritmo baja al recibir bloqueos y se recupera gradualmente"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        *,
+        min_rate: Optional[float] = None,
+        backoff: float = 0.5,
+        recovery: float = 0.1,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.backoff = backoff
+        # Fracción del ritmo base recuperada por cada petición correcta
+        self.recovery = recovery
+        self.cooldown = cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = clock()
+        self._last_throttle: Optional[float] = None
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self) -> float:
+        """Esperar un token; devuelve los segundos esperados"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    self.wait_seconds += waited
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def report_throttled(self):
+        """YouTube respondió 429/403: reducir el ritmo y vaciar el cubo"""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self._tokens = 0.0
+            self._last_throttle = self._clock()
+            self.throttled += 1
+
+    def report_success(self):
+        """Petición correcta: recuperar ritmo si ya pasó el enfriamiento"""
+        with self._lock:
+            if self.rate >= self.base_rate:
+                return
+            if self._last_throttle is not None and self._clock() - self._last_throttle < self.cooldown:
+                return
+            self._refill()
+            self.rate = min(self.base_rate, self.rate + self.base_rate * self.recovery)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            self._refill()
+            return {
+                "rate": round(self.rate, 4),
+                "base_rate": self.base_rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 2),
+                "seconds_since_throttle": (
+                    round(self._clock() - self._last_throttle, 1) if self._last_throttle is not None else None
+                ),
+            }
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Un ``AdaptiveTokenBucket`` por clase de petición"""
+
+    def __init__(self, buckets: Dict[str, AdaptiveTokenBucket]):
+        self._buckets = buckets
+
+    def bucket(self, kind: str) -> AdaptiveTokenBucket:
+        try:
+            return self._buckets[kind]
+        except KeyError:
+            raise ValueError(f"Clase de petición desconocida: {kind}") from None
+
+    def acquire(self, kind: str) -> float:
+        waited = self.bucket(kind).acquire()
+        if waited >= 1:
+            logger.debug(f"Petición {kind} retenida {waited:.1f}s por el limitador")
+        return waited
+
+    def report_throttled(self, kind: str):
+        bucket = self.bucket(kind)
+        bucket.report_throttled()
+        logger.warning(f"⏳ YouTube limita las peticiones {kind}: ritmo reducido a {bucket.rate:.3f}/s")
+
+    def report_success(self, kind: str):
+        self.bucket(kind).report_success()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {kind: bucket.snapshot() for kind, bucket in self._buckets.items()}
+
+
+def is_throttle_message(message: str) -> bool:
+    return bool(_THROTTLE_PATTERN.search(message))
+
+
+class YtDlpLogger:
+    """Logger para la opción ``logger`` de YoutubeDL: detecta 429/403 en sus mensajes
+    (con ``ignoreerrors`` yt-dlp no lanza excepción) y lo notifica al limitador y,
+    si se indica, a ``on_throttle`` (p. ej. para apartar la cookie usada)"""
+
+    def __init__(
+        self, kind: str, limiter: Optional[RateLimiter] = None, on_throttle: Optional[Callable[[], None]] = None
+    ):
+        self.kind = kind
+        self._limiter = limiter
+        self._on_throttle = on_throttle
+
+    def debug(self, message: str):
+        pass
+
+    def info(self, message: str):
+        pass
+
+    def warning(self, message: str):
+        # Sustituye al logger de yt-dlp: sus avisos y errores no deben perderse
+        logger.warning(f"yt-dlp: {message}")
+        self._check(message)
+
+    def error(self, message: str):
+        logger.error(f"yt-dlp: {message}")
+        self._check(message)
+
+    def _check(self, message: str):
+        if is_throttle_message(message):
+            (self._limiter or rate_limiter).report_throttled(self.kind)
+            if self._on_throttle:
+                self._on_throttle()
+
+
+def _bucket_from_env(kind: str, rate: float, burst: float) -> AdaptiveTokenBucket:
+    prefix = f"YOUTUBE_RATE_{kind.upper()}"
+    return AdaptiveTokenBucket(
+        float(os.getenv(prefix, rate)),
+        float(os.getenv(f"{prefix}_BURST", burst)),
+    )
+
+
+# Peticiones por segundo y ráfaga de cada clase (YOUTUBE_RATE_<CLASE>[_BURST])
+rate_limiter = RateLimiter({
+    METADATA: _bucket_from_env(METADATA, 1.0, 5),
+    MEDIA: _bucket_from_env(MEDIA, 0.5, 2),
+    THUMBNAILS: _bucket_from_env(THUMBNAILS, 2.0, 5),
+})
@@ -0,0 +1,214 @@
+"""
+Planificador de descargas: carriles de prioridad y reparto justo entre fuentes.
+
+Cada descarga (yt-dlp + ffmpeg) pide un turno en un carril:
+
+- ``interactive``: pedidas por el usuario desde la API (``/tracks/download-single``)
+- ``new``: canciones nuevas detectadas al escanear una fuente
+- ``retry``: reintentos de descargas fallidas
+- ``backfill``: pendientes acumuladas y encoladas en lote
+
+Hay ``concurrency`` turnos compartidos más los ``reserved`` propios de cada
+carril, que sólo puede usar ese carril. Con la reserva por defecto de
+``interactive`` una descarga pedida por el usuario arranca en el acto aunque
+los turnos compartidos estén ocupados por una importación grande. Cuando
+varios carriles esperan, los turnos compartidos se reparten en proporción a su
+``weight`` (stride scheduling) y, dentro de un carril, por orden de llegada.
+
+``DeficitRoundRobin`` intercala el trabajo pendiente de varias fuentes para que
+una fuente grande recién añadida no retrase las novedades de las demás. Acepta
+iteradores perezosos (el listado de una fuente según llegan sus páginas), que
+sólo se consumen cuando le toca turno a esa fuente.
+"""
+
+import os
+import threading
+from collections import deque
+from collections.abc import Collection
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+INTERACTIVE = "interactive"
+NEW = "new"
+RETRY = "retry"
+BACKFILL = "backfill"
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    weight: int = 1
+    reserved: int = 0
+
+
+DEFAULT_LANES = (
+    Lane(INTERACTIVE, weight=8, reserved=int(os.getenv("DOWNLOAD_INTERACTIVE_RESERVED", "1"))),
+    Lane(NEW, weight=4),
+    Lane(BACKFILL, weight=2),
+    Lane(RETRY, weight=1),
+)
+
+
+class _Waiter:
+    __slots__ = ("lane", "ready", "reserved")
+
+    def __init__(self, lane: str):
+        self.lane = lane
+        self.ready = threading.Event()
+        self.reserved = False
+
+
+class DownloadScheduler:
+    """Reparte los turnos de descarga entre carriles con pesos y reservas"""
+
+    def __init__(self, concurrency: int = 2, lanes: Iterable[Lane] = DEFAULT_LANES):
+        self.concurrency = concurrency
+        self._lanes: Dict[str, Lane] = {lane.name: lane for lane in lanes}
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[_Waiter]] = {name: deque() for name in self._lanes}
+        self._running: Dict[str, int] = dict.fromkeys(self._lanes, 0)
+        self._reserved_running: Dict[str, int] = dict.fromkeys(self._lanes, 0)
+        self._shared_running = 0
+        # Tiempo virtual de cada carril: avanza 1/weight por turno concedido
+        self._pass: Dict[str, float] = dict.fromkeys(self._lanes, 0.0)
+        self._clock = 0.0
+
+    @contextmanager
+    def slot(self, lane: str) -> Iterator[None]:
+        """Esperar un turno en ``lane`` y liberarlo al salir del bloque"""
+        waiter = self._acquire(lane)
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Descargas en curso y en espera por carril"""
+        with self._lock:
+            return {
+                name: {
+                    "running": self._running[name],
+                    "waiting": len(self._queues[name]),
+                    "weight": lane.weight,
+                    "reserved": lane.reserved,
+                }
+                for name, lane in self._lanes.items()
+            }
+
+    def _acquire(self, lane: str) -> _Waiter:
+        if lane not in self._lanes:
+            raise ValueError(f"Carril de descarga desconocido: {lane}")
+        waiter = _Waiter(lane)
+        with self._lock:
+            if not self._queues[lane]:
+                # Un carril que vuelve tras estar inactivo no acumula crédito atrasado
+                self._pass[lane] = max(self._pass[lane], self._clock)
+            self._queues[lane].append(waiter)
+            self._dispatch()
+        waiter.ready.wait()
+        return waiter
+
+    def _release(self, waiter: _Waiter):
+        with self._lock:
+            self._running[waiter.lane] -= 1
+            if waiter.reserved:
+                self._reserved_running[waiter.lane] -= 1
+            else:
+                self._shared_running -= 1
+            self._dispatch()
+
+    def _dispatch(self):
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter = self._queues[lane].popleft()
+            if self._reserved_running[lane] < self._lanes[lane].reserved:
+                waiter.reserved = True
+                self._reserved_running[lane] += 1
+            else:
+                self._shared_running += 1
+                self._clock = self._pass[lane]
+                self._pass[lane] += 1 / self._lanes[lane].weight
+            self._running[lane] += 1
+            waiter.ready.set()
+
+    def _next_lane(self) -> Optional[str]:
+        shared_free = self._shared_running < self.concurrency
+        # Las reservas libres se conceden antes que los turnos compartidos
+        for name, lane in self._lanes.items():
+            if self._queues[name] and self._reserved_running[name] < lane.reserved:
+                return name
+        if not shared_free:
+            return None
+        waiting = [name for name in self._lanes if self._queues[name]]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda name: self._pass[name])
+
+
+# Marca de cola agotada (los elementos pueden ser None)
+_EMPTY = object()
+
+
+class DeficitRoundRobin:
+    """Colas por clave atendidas por turnos: en cada ronda una cola entrega tantos
+    elementos como su peso (los pesos fraccionarios acumulan crédito entre rondas)"""
+
+    def __init__(self):
+        self._queues: Dict[Hashable, Deque[Any]] = {}
+        # Iteradores aún sin agotar de cada clave, que se leen al atender su cola
+        self._feeds: Dict[Hashable, Deque[Iterator[Any]]] = {}
+        self._weights: Dict[Hashable, float] = {}
+
+    def add(self, key: Hashable, items: Iterable[Any], weight: float = 1):
+        """Añadir ``items`` a la cola de ``key``. Las colecciones se encolan enteras;
+        cualquier otro iterable se va leyendo a medida que se entregan sus elementos"""
+        if weight <= 0:
+            raise ValueError("El peso debe ser positivo")
+        queue = self._queues.setdefault(key, deque())
+        feeds = self._feeds.setdefault(key, deque())
+        if isinstance(items, Collection) and not feeds:
+            queue.extend(items)
+        else:
+            feeds.append(iter(items))
+        self._weights[key] = weight
+
+    def __len__(self) -> int:
+        """Elementos encolados (sin contar los que aún no han salido de los iteradores)"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Any]]:
+        deficits: Dict[Hashable, float] = dict.fromkeys(self._queues, 0.0)
+        while any(self._has_items(key) for key in self._queues):
+            for key in list(self._queues):
+                if not self._has_items(key):
+                    continue
+                deficits[key] = deficits.get(key, 0.0) + self._weights[key]
+                while deficits[key] >= 1:
+                    item = self._pop(key)
+                    if item is _EMPTY:
+                        break
+                    deficits[key] -= 1
+                    yield key, item
+                if not self._has_items(key):
+                    # Una cola vacía no guarda crédito para la siguiente vez
+                    deficits[key] = 0.0
+
+    def _has_items(self, key: Hashable) -> bool:
+        return bool(self._queues[key] or self._feeds[key])
+
+    def _pop(self, key: Hashable) -> Any:
+        queue, feeds = self._queues[key], self._feeds[key]
+        if queue:
+            return queue.popleft()
+        while feeds:
+            item = next(feeds[0], _EMPTY)
+            if item is not _EMPTY:
+                return item
+            feeds.popleft()
+        return _EMPTY
+
+
+download_scheduler = DownloadScheduler(concurrency=int(os.getenv("DOWNLOAD_CONCURRENCY", "2")))
@@ -3,20 +3,36 @@ YouTube Playlist Watcher - Clase principal para monitoreo continuo usando SQLite
 """
 
 import logging
+import os
 import time
 import shutil
+import threading
 import unicodedata
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator
 
+from .cookies import CookiePool, pool_files
 from .downloader import YouTubeDownloader
+from .jobs import InFlight
 from .playlist_monitor import PlaylistMonitor
+from .scheduler import BACKFILL, INTERACTIVE, NEW, RETRY, DeficitRoundRobin, download_scheduler
+from .db import leader
+from .db.claims import (
+    claim_pending_tracks, claim_source, claim_track, has_priority_tracks, release_source, release_track,
+)
 from .db.database import SessionLocal
 from .db.models import Source, Track
+from .db.workers import HEARTBEAT_INTERVAL, current_worker_id, heartbeat, record_download
 
 logger = logging.getLogger(__name__)
 
+# Vídeos del listado que se cotejan juntos con la BD (una página de playlist de YouTube)
+SCAN_BATCH = 100
+# Cada cuánto se buscan descargas pedidas por el usuario mientras el watcher espera
+PRIORITY_POLL_SECONDS = float(os.getenv("PRIORITY_POLL_SECONDS", "2"))
+
 class YouTubeWatcher:
     """
     Watcher principal que monitorea múltiples fuentes de YouTube y descarga
@@ -36,81 +52,323 @@ class YouTubeWatcher:
         self.download_path = Path(download_path)
         self._download_path_raw = download_path
         self.interval_ms = interval_ms
-        self.cookies_path = cookies_path
+        # Cookies en rotación para listados y descargas (ver cookies.py)
+        self.cookie_pool = CookiePool([cookies_path] if cookies_path else [])
         self.enable_sync_deletions = enable_sync_deletions
         self.use_trash_folder = use_trash_folder
         self.trash_retention_days = trash_retention_days
         
+        # Los fallos (failed_at, retry_count) se guardan en la BD y los comparten todos los workers
         self._failed_retry_hours = 24
-        self.failed_downloads = {}  # In-memory tracking to prevent spam on failures
+        # Tras este tiempo descargando, la pasada se corta para volver a escanear las fuentes
+        self._rescan_after = 15 * 60
         self._trash_folder = self.download_path / ".trash"
+        # Identifica las reservas de descarga de este proceso frente a otros workers
+        self.worker_id = current_worker_id()
+        self._heartbeat_thread: threading.Thread | None = None
+        self._heartbeat_stop = threading.Event()
+        # Lo activa stop(): el bucle termina tras la descarga en curso
+        self._stop = threading.Event()
+        # Activo mientras tenga un turno en watcher_locks (ver db/leader.py)
+        self._active = threading.Event()
+        # Tareas de una sola vez por BD, al tomar el turno principal (ver on_leadership)
+        self._leadership_callbacks: list = []
+        self._in_flight = InFlight()
+        # Turnos de descarga por carril de prioridad (compartido con las descargas de la API)
+        self.scheduler = download_scheduler
+        self._last_lock_renewal = 0.0
+        self._lock_state_logged = False
+        # Fichero de cookies principal vigilado (ver watch_cookies_file) y el estado visto
+        # de sus ficheros (el principal y los de cookies.d/)
+        self._cookies_file: Path | None = None
+        self._cookies_state: tuple = ()
 
         self.download_path.mkdir(parents=True, exist_ok=True)
 
-        self.downloader = YouTubeDownloader(download_path, cookies_path=cookies_path)
+        self.downloader = YouTubeDownloader(download_path, cookie_pool=self.cookie_pool)
 
         logger.info(f"Watcher inicializado. Directorio de descargas: {self.download_path}")
         logger.info(f"Intervalo de observación: {interval_ms}ms")
 
+    @property
+    def cookies_path(self) -> str | None:
+        """Fichero de cookies principal (el primero del conjunto)"""
+        paths = self.cookie_pool.paths
+        return paths[0] if paths else None
+
     def update_cookies(self, cookies_path: str | None):
-        """Actualizar el archivo de cookies y reiniciar el downloader local"""
-        self.cookies_path = cookies_path
-        self.downloader = YouTubeDownloader(str(self.download_path), cookies_path=self.cookies_path)
-        if cookies_path:
-            logger.info("🍪 Cookies establecidas localmente en el Watcher")
+        """Usar un único fichero de cookies (o ninguno)"""
+        self.set_cookie_files([cookies_path] if cookies_path else [])
+
+    def set_cookie_files(self, paths: list[str]):
+        """Cambiar el conjunto de cookies; las descargas en curso siguen con la suya"""
+        self.cookie_pool.set_paths(paths)
+        if paths:
+            logger.info(f"🍪 {len(paths)} fichero(s) de cookies en rotación en el Watcher")
         else:
             logger.info("🍪 Cookies removidas del Watcher")
 
+    def watch_cookies_file(self, path: str):
+        """Recargar las cookies cuando otro proceso (la API) cree, cambie o borre ``path``
+        o los ficheros de ``cookies.d/`` junto a él"""
+        self._cookies_file = Path(path)
+        self._cookies_state = self._cookie_files_state()
+        self.set_cookie_files([name for name, _ in self._cookies_state])
+
+    def _cookie_files_state(self) -> tuple:
+        state = []
+        for file in pool_files(self._cookies_file):
+            try:
+                state.append((str(file), file.stat().st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(state)
+
+    def _reload_cookies_if_changed(self):
+        if self._cookies_file is None:
+            return
+        state = self._cookie_files_state()
+        if state == self._cookies_state:
+            return
+        self._cookies_state = state
+        self.set_cookie_files([name for name, _ in state])
+
+    def _send_heartbeat(self):
+        try:
+            with SessionLocal() as db:
+                heartbeat(db, self.worker_id)
+        except Exception as e:
+            logger.warning(f"Error enviando el heartbeat del worker {self.worker_id}: {e}")
+
+    def _hold_leadership(self) -> bool:
+        """Renovar (o conseguir) el turno de watcher activo; False si toca esperar"""
+        try:
+            with SessionLocal() as db:
+                slot = leader.try_acquire(db, self.worker_id)
+            self._last_lock_renewal = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Error renovando el turno del watcher: {e}")
+            # Sin BD no se puede renovar: el turno sigue siendo nuestro hasta que caduque
+            if time.monotonic() - self._last_lock_renewal < leader.LOCK_TTL.total_seconds():
+                return self._active.is_set()
+            slot = None
+
+        if slot and not self._active.is_set():
+            logger.info(f"👑 Watcher activo ({slot})")
+            self._active.set()
+            if slot == leader.PRIMARY_SLOT:
+                self._run_leadership_callbacks()
+        elif not slot and self._active.is_set():
+            logger.warning("Turno de watcher perdido, pasando a espera")
+            self._active.clear()
+        elif not slot and not self._lock_state_logged:
+            logger.info("Otro watcher está activo sobre esta base de datos; en espera")
+        self._lock_state_logged = True
+        return bool(slot)
+
+    def on_leadership(self, callback):
+        """Ejecutar ``callback()`` cada vez que este watcher tome el turno principal: lo que
+        debe hacer un solo proceso por BD aunque arranquen varios. Corre en el hilo del
+        heartbeat, así que debe ser rápido (p. ej. encolar un trabajo)"""
+        self._leadership_callbacks.append(callback)
+
+    def _run_leadership_callbacks(self):
+        for callback in self._leadership_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error en una tarea del watcher principal: {e}")
+
+    def _lost_leadership(self) -> bool:
+        # Sólo aplica cuando el bucle corre con heartbeat (start); las llamadas directas no compiten
+        return self._heartbeat_thread is not None and not self._active.is_set()
+
+    def _start_heartbeat(self):
+        """Registrar el worker, mantener vivas sus reservas (también durante descargas
+        largas) y renovar su turno de watcher activo"""
+        if self._heartbeat_thread and self._heartbeat_thread.is_alive():
+            return
+        self._heartbeat_stop.clear()
+        self._send_heartbeat()
+        self._hold_leadership()
+
+        def _run():
+            last_heartbeat = time.monotonic()
+            while not self._heartbeat_stop.wait(leader.RENEW_INTERVAL.total_seconds()):
+                self._hold_leadership()
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL.total_seconds():
+                    self._send_heartbeat()
+                    last_heartbeat = time.monotonic()
+
+        self._heartbeat_thread = threading.Thread(target=_run, name="worker-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
     def start(self):
         """Iniciar el watcher en bucle continuo"""
         logger.info("Iniciando monitor de fuentes en segundo plano...")
+        self._start_heartbeat()
 
         errors = 0
         base_sleep = max(1.0, self.interval_ms / 1000.0)
         max_backoff = 300.0
 
         try:
-            while True:
+            while not self._stop.is_set():
                 try:
+                    # En espera hasta conseguir un turno (otro watcher puede estar activo)
+                    if not self._active.wait(timeout=leader.RENEW_INTERVAL.total_seconds()):
+                        continue
                     self._check_all_sources()
                     errors = 0
-                    time.sleep(base_sleep)
+                    self._wait_for_next_pass(base_sleep)
                 except KeyboardInterrupt:
                     raise
                 except Exception as e:
                     errors += 1
                     backoff = min(max_backoff, base_sleep * (2 ** min(errors, 8)))
                     logger.error(f"Error en el watcher loop: {e}. Reintentando en {backoff:.1f}s")
-                    time.sleep(backoff)
+                    self._stop.wait(backoff)
         except KeyboardInterrupt:
             logger.info("Watcher detenido")
+        finally:
+            self._stop_heartbeat()
+            self._release_leadership()
+
+    def stop(self):
+        """Parar el bucle y ceder el turno en el acto, sin esperar a que termine la
+        descarga en curso (su reserva se libera cuando acabe)"""
+        self._stop.set()
+        self._stop_heartbeat()
+        self._release_leadership()
+
+    def _stop_heartbeat(self):
+        self._heartbeat_stop.set()
+        # Una renovación en curso no debe recuperar el turno recién cedido
+        thread = self._heartbeat_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def _wait_for_next_pass(self, seconds: float):
+        """Esperar a la siguiente pasada atendiendo mientras tanto las descargas pedidas
+        por el usuario desde otro proceso (``WATCHER_MODE=api``)"""
+        deadline = time.monotonic() + seconds
+        while (remaining := deadline - time.monotonic()) > 0:
+            if self._stop.wait(min(PRIORITY_POLL_SECONDS, remaining)) or self._lost_leadership():
+                return
+            try:
+                with SessionLocal() as db:
+                    self._drain_priority_tracks(db)
+            except Exception as e:
+                logger.error(f"Error atendiendo descargas prioritarias: {e}")
+
+    def _release_leadership(self):
+        """Ceder el turno al parar para que otro watcher tome el relevo sin esperar al TTL"""
+        self._active.clear()
+        try:
+            with SessionLocal() as db:
+                leader.release(db, self.worker_id)
+        except Exception as e:
+            logger.warning(f"Error liberando el turno del watcher: {e}")
 
     def _check_all_sources(self):
+        self._reload_cookies_if_changed()
+
         with SessionLocal() as db:
             sources = db.query(Source).filter(Source.status == "active").all()
             
             if not sources:
                 logger.debug("No hay fuentes activas para monitorizar.")
-                return
-
-            for source in sources:
-                try:
-                    logger.info(f"Verificando fuente: {source.name} ({source.url})")
-                    monitor = PlaylistMonitor(source.url, cookies_path=self.cookies_path)
-                    videos = monitor.get_playlist_videos()
-                    
-                    for video_data in videos:
-                        self._process_video(video_data, source.id, db)
-                        
-                    if self.enable_sync_deletions and source.type == "playlist":
-                        self._detect_and_remove_deleted_videos(videos, source.id, db)
 
-                except Exception as e:
-                    logger.error(f"Error procesando fuente {source.name}: {e}")
+            # Las novedades de todas las fuentes se descargan por turnos, para que una fuente
+            # enorme no retrase a las demás. Cada listado se lee por páginas a medida que le
+            # toca turno a su fuente, así que las descargas empiezan con la primera página
+            pending = DeficitRoundRobin()
+            scan_started = time.monotonic()
+            # Con varios workers, cada fuente la escanea uno solo por intervalo
+            min_interval = timedelta(milliseconds=self.interval_ms)
+            claimed, feeds = [], []
+            try:
+                for source in sources:
+                    if self._lost_leadership():
+                        return
+                    source_id = source.id
+                    if not claim_source(db, source_id, self.worker_id, min_interval):
+                        logger.debug(f"Fuente {source_id} escaneada por otro worker o recientemente")
+                        continue
+                    claimed.append(source_id)
+                    feed = self._source_feed(source, db)
+                    feeds.append(feed)
+                    pending.add(source_id, feed, weight=source.weight or 1)
+
+                for source_id, video_data in pending:
+                    if self._lost_leadership():
+                        return
+                    # Lo pedido por el usuario no espera al resto de la pasada
+                    self._drain_priority_tracks(db)
+                    if time.monotonic() - scan_started > self._rescan_after:
+                        # Lo que queda se recoge en la próxima pasada, junto con las novedades
+                        logger.info("Pasada interrumpida para volver a escanear las fuentes")
+                        break
+                    try:
+                        self._process_video(video_data, source_id, db)
+                    except Exception as e:
+                        logger.error(f"Error procesando vídeo {video_data.get('id')}: {e}")
+            finally:
+                # Los listados a medias devuelven su YoutubeDL al pool y no sincronizan borrados
+                for feed in feeds:
+                    feed.close()
+                for source_id in claimed:
+                    release_source(db, source_id, self.worker_id)
+
+            if self._lost_leadership():
+                return
+            self._drain_pending_tracks(db)
 
             if self.use_trash_folder and self.trash_retention_days > 0:
                 self._cleanup_trash_folder()
 
+    def _source_feed(self, source: Source, db) -> Iterator[Dict]:
+        """Vídeos por procesar de una fuente según llegan las páginas de su listado.
+
+        Se cotejan con la BD por bloques de ``SCAN_BATCH`` y, si el listado se leyó
+        entero, al final se sincronizan los borrados.
+        """
+        name = source.name
+        sync_deletions = self.enable_sync_deletions and source.type == "playlist"
+        listed = []
+        logger.info(f"Verificando fuente: {name} ({source.url})")
+        monitor = PlaylistMonitor(source.url, cookie_pool=self.cookie_pool)
+        videos = monitor.iter_playlist_videos()
+        try:
+            while True:
+                batch = list(islice(videos, SCAN_BATCH))
+                if not batch:
+                    break
+                if sync_deletions:
+                    # Sólo lo que necesita la detección de borrados, no la entrada completa
+                    listed.extend({"id": v.get("id"), "title": v.get("title")} for v in batch)
+                yield from self._videos_to_process(batch, db)
+
+            if sync_deletions and monitor.listing_complete:
+                self._detect_and_remove_deleted_videos(listed, source.id, db)
+        except Exception as e:
+            logger.error(f"Error procesando fuente {name}: {e}")
+        finally:
+            videos.close()
+
+    def _videos_to_process(self, videos: list, db) -> list:
+        """Quitar del listado los vídeos ya descargados o ignorados (una consulta por bloque)"""
+        ids = [v.get("id") for v in videos if v.get("id")]
+        done = set()
+        for start in range(0, len(ids), 500):
+            done.update(
+                youtube_id for (youtube_id,) in db.query(Track.youtube_id).filter(
+                    Track.youtube_id.in_(ids[start:start + 500]),
+                    Track.download_status.in_(("completed", "ignored")),
+                )
+            )
+        return [v for v in videos if v.get("id") not in done]
+
     def _normalize_video_entry(self, video_data: Dict):
         raw_title = video_data.get("title")
         title = str(raw_title) if raw_title is not None else ""
@@ -131,12 +389,21 @@ class YouTubeWatcher:
         
         return video_id, raw_title, title, artist, formatted_date, is_invalid
 
-    def _process_video(self, video_data: Dict, source_id: int, db):
-        video_id, raw_title, title, artist, published_at, is_invalid = self._normalize_video_entry(video_data)
+    def _process_video(self, video_data: Dict, source_id: int, db, lane: str = NEW):
+        video_id, _, _, _, _, is_invalid = self._normalize_video_entry(video_data)
 
         if is_invalid:
             return
 
+        # Un vídeo se procesa una sola vez a la vez en este proceso (bucle del watcher,
+        # descargas pedidas desde la API, doble clic): las llamadas concurrentes esperan
+        # a la primera en lugar de lanzar otra vez yt-dlp y ffmpeg sobre temp_<id>
+        _, attached = self._in_flight.run(video_id, self._process_valid_video, video_data, source_id, db, lane)
+        if attached:
+            logger.info(f"⏭️ {video_id} ya se estaba procesando; se reutiliza su resultado")
+
+    def _process_valid_video(self, video_data: Dict, source_id: int, db, lane: str = NEW):
+        video_id, raw_title, title, artist, published_at, _ = self._normalize_video_entry(video_data)
         display_title = title or "Unknown Title"
 
         # Check DB
@@ -157,13 +424,14 @@ class YouTubeWatcher:
                 pass
             if existing_track.download_status == "failed":
                 # Check retry rules
-                if video_id in self.failed_downloads:
-                    failed_at = self.failed_downloads[video_id]["failed_at"]
-                    hours_since_fail = (datetime.now() - failed_at).total_seconds() / 3600
+                if existing_track.failed_at:
+                    hours_since_fail = (datetime.utcnow() - existing_track.failed_at).total_seconds() / 3600
                     if hours_since_fail < self._failed_retry_hours:
                         return
                     else:
                         logger.info(f"🔄 Reintentando descarga: {display_title}")
+                if lane != INTERACTIVE:
+                    lane = RETRY
 
         # Try to download
         logger.info(f"Nueva canción detectada: {display_title}")
@@ -193,6 +461,21 @@ class YouTubeWatcher:
             if changed:
                 db.commit()
 
+        # Otro worker puede tener ya esta canción reservada
+        if not claim_track(db, existing_track.id, self.worker_id):
+            logger.info(f"⏭️ Descarga en curso en otro worker: {display_title}")
+            return
+
+        try:
+            # La reserva recarga la fila: otro worker pudo terminarla entre la lectura y la reserva
+            if existing_track.download_status in ("completed", "ignored"):
+                return
+            with self.scheduler.slot(lane):
+                self._download_track(existing_track, video_data, video_id, display_title, source_id, db)
+        finally:
+            release_track(db, existing_track.id, self.worker_id)
+
+    def _download_track(self, existing_track, video_data: Dict, video_id: str, display_title: str, source_id: int, db):
         try:
             result = self.downloader.download_and_convert(video_data)
             if result and result.get("success"):
@@ -201,6 +484,9 @@ class YouTubeWatcher:
                 existing_track.download_status = "completed"
                 existing_track.downloaded_at = datetime.utcnow()
                 existing_track.title = result.get("title", display_title)
+                existing_track.downloaded_by = self.worker_id
+                existing_track.failed_at = None
+                existing_track.priority = 0
                 
                 # Update published_at and artist if acquired during full download
                 if result.get("published_at"):
@@ -208,7 +494,7 @@ class YouTubeWatcher:
                 if result.get("artist"):
                     existing_track.artist = result.get("artist")
                 
-                self.failed_downloads.pop(video_id, None)
+                record_download(db, self.worker_id, succeeded=True)
                 db.commit()
                 logger.info(f"✅ Descarga completada: {existing_track.title}")
                 
@@ -224,15 +510,56 @@ class YouTubeWatcher:
         except Exception as e:
             self._mark_failed(existing_track, video_id, str(e), db)
 
+    def _drain_priority_tracks(self, db):
+        """Descargar ya las canciones pedidas por el usuario (``Track.priority``)"""
+        try:
+            waiting = has_priority_tracks(db)
+        except Exception as e:
+            logger.error(f"Error buscando descargas prioritarias: {e}")
+            return
+        if waiting:
+            self._drain_pending_tracks(db, priority_only=True)
+
+    def _drain_pending_tracks(self, db, limit: int = 20, priority_only: bool = False):
+        """Descargar canciones pendientes que ningún escaneo ha recogido (encoladas por
+        la API o abandonadas por un worker caído), primero las pedidas por el usuario.
+        Las de fuentes pausadas esperan a que la fuente se reanude."""
+        try:
+            track_ids = claim_pending_tracks(db, self.worker_id, limit, priority_only=priority_only)
+        except Exception as e:
+            logger.error(f"Error reservando canciones pendientes: {e}")
+            return
+
+        for track_id in track_ids:
+            try:
+                track = db.get(Track, track_id)
+                if not track:
+                    continue
+                video_data = {"id": track.youtube_id, "title": track.title}
+                if track.artist:
+                    video_data["artist"] = track.artist
+                lane = INTERACTIVE if track.priority else BACKFILL
+                self._process_video(video_data, track.source_id, db, lane=lane)
+            except Exception as e:
+                logger.error(f"Error procesando la canción pendiente {track_id}: {e}")
+                db.rollback()
+            finally:
+                # Si el proceso no llegó a reservarla él mismo, la reserva del lote seguiría
+                # renovándose con cada latido
+                try:
+                    release_track(db, track_id, self.worker_id)
+                except Exception as e:
+                    logger.warning(f"Error liberando la canción {track_id}: {e}")
+
     def _mark_failed(self, track_record, video_id: str, reason: str, db):
         track_record.download_status = "failed"
+        track_record.failed_at = datetime.utcnow()
+        track_record.retry_count = (track_record.retry_count or 0) + 1
+        # Los reintentos vuelven a la cola normal
+        track_record.priority = 0
+        record_download(db, self.worker_id, succeeded=False)
         db.commit()
-        retry_count = self.failed_downloads.get(video_id, {}).get("retry_count", 0) + 1
-        self.failed_downloads[video_id] = {
-            "failed_at": datetime.now(),
-            "retry_count": retry_count
-        }
-        logger.warning(f"⚠️ Descarga fallida: {track_record.title} (intento #{retry_count}) - {reason}")
+        logger.warning(f"⚠️ Descarga fallida: {track_record.title} (intento #{track_record.retry_count}) - {reason}")
 
     def _detect_and_remove_deleted_videos(self, current_videos: list, source_id: int, db):
         try:
@@ -247,12 +574,13 @@ class YouTubeWatcher:
             if not current_video_ids:
                 return # Playlist might be private or unreachable, do not mass-delete
 
-            downloaded_tracks = db.query(Track).filter(
-                Track.source_id == source_id, 
-                Track.download_status == "completed"
-            ).all()
-            
-            downloaded_video_ids = {t.youtube_id for t in downloaded_tracks}
+            # Sólo los IDs, por lotes: las fuentes grandes no cargan miles de objetos Track
+            downloaded_video_ids = {
+                youtube_id
+                for (youtube_id,) in db.query(Track.youtube_id)
+                .filter(Track.source_id == source_id, Track.download_status == "completed")
+                .yield_per(1000)
+            }
 
             # Find items in DB that are NO LONGER in the YouTube playlist
             deleted_video_ids = downloaded_video_ids - current_video_ids
@@ -271,6 +599,9 @@ class YouTubeWatcher:
 
             for video_id in deleted_video_ids:
                 track = db.query(Track).filter(Track.youtube_id == video_id).first()
+                # Una canción reservada por otro worker está en plena descarga
+                if track and track.claimed_by and track.claimed_by != self.worker_id:
+                    continue
                 if track:
                     logger.info(f"Retirando canción huérfana: {track.title}")
                     if track.file_path:
@@ -0,0 +1,106 @@
+"""
+Worker de descargas como proceso independiente de la API.
+
+    python -m youtube_watcher worker
+
+Con ``WATCHER_MODE=api`` la API no arranca su propio watcher y puede escalar a
+varios workers de uvicorn; los procesos se coordinan sólo a través de la base
+de datos: las canciones se reservan antes de descargarlas (``db/claims.py``),
+los cambios llegan a la API mediante ``change_versions`` (``db/changes.py``), el
+progreso de las descargas mediante ``download_progress`` (``db/activity.py``) y
+las cookies subidas desde la API se recargan cuando cambia el fichero.
+"""
+
+import logging
+import os
+import signal
+from pathlib import Path
+
+from .db.database import SessionLocal, engine
+from .db.migrations import run_migrations
+from .db.workers import current_worker_id
+from .progress import progress_table
+from .watcher import YouTubeWatcher
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# embedded: el watcher corre en un hilo del proceso de la API (comportamiento por defecto)
+# api: sólo API; las descargas las hace `python -m youtube_watcher worker`
+WATCHER_MODES = ("embedded", "api")
+
+
+def watcher_mode() -> str:
+    mode = os.getenv("WATCHER_MODE", "embedded").lower()
+    if mode not in WATCHER_MODES:
+        logger.warning(f"WATCHER_MODE desconocido '{mode}', se usa 'embedded'")
+        return "embedded"
+    return mode
+
+
+def cookies_file_path() -> Path:
+    """cookies.txt compartido por la API (que lo sube) y el watcher (que lo usa)"""
+    if os.getenv("COOKIES_PATH"):
+        return Path(os.environ["COOKIES_PATH"])
+    # Volumen montado en /data dentro de Docker, carpeta local en desarrollo
+    base_dir = Path("/data") if os.path.exists("/data") else PROJECT_ROOT / "data"
+    return base_dir / "cookies.txt"
+
+
+def create_watcher_from_env() -> YouTubeWatcher:
+    """Watcher configurado con las mismas variables de entorno que la API"""
+    # Por defecto usa carpeta local en desarrollo, en Docker será sobreescrita por /downloads
+    download_path = os.getenv("DOWNLOAD_PATH", str(PROJECT_ROOT / "downloads"))
+    interval = int(os.getenv("OBSERVER_INTERVAL_MS", "60000"))
+
+    enable_sync_deletions = str(os.getenv("ENABLE_SYNC_DELETIONS", "true")).lower() == "true"
+    use_trash_folder = str(os.getenv("USE_TRASH_FOLDER", "true")).lower() == "true"
+    trash_retention_days = int(os.getenv("TRASH_RETENTION_DAYS", "7"))
+
+    # Comprobar si existe cookies.txt guardado en el volumen de data
+    default_cookies = str(cookies_file_path())
+    active_cookies = default_cookies if os.path.exists(default_cookies) else None
+
+    watcher = YouTubeWatcher(
+        download_path=download_path,
+        interval_ms=interval,
+        cookies_path=active_cookies,
+        enable_sync_deletions=enable_sync_deletions,
+        use_trash_folder=use_trash_folder,
+        trash_retention_days=trash_retention_days,
+    )
+    # La API puede subir o borrar cookies desde otro proceso
+    watcher.watch_cookies_file(default_cookies)
+    # Con varios workers de uvicorn o varios procesos, la sincronización inicial con
+    # Navidrome la hace sólo el watcher principal (si no, se crearían playlists duplicadas)
+    watcher.on_leadership(_submit_navidrome_sync)
+    return watcher
+
+
+def _submit_navidrome_sync():
+    from .api.routes import _sync_existing_sources_to_navidrome
+    from .jobs import NAVIDROME_LANE, job_registry
+
+    job_registry.submit("navidrome.sync_sources", _sync_existing_sources_to_navidrome, lane=NAVIDROME_LANE)
+
+
+def main():
+    """Punto de entrada de `python -m youtube_watcher worker`"""
+    from .cli import setup_logging
+
+    setup_logging()
+    run_migrations(engine)
+    # La API (otro proceso) muestra el progreso de las descargas de este worker
+    progress_table.persist_to(SessionLocal, current_worker_id())
+
+    watcher = create_watcher_from_env()
+    logger.info(f"Worker {watcher.worker_id} iniciado")
+    # docker stop envía SIGTERM: se sale como con Ctrl+C, interrumpiendo la descarga en
+    # curso, para que start() libere su reserva y ceda el turno antes del SIGKILL
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    watcher.start()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
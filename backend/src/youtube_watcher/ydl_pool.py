@@ -0,0 +1,157 @@
+"""
+Pool de instancias de ``yt_dlp.YoutubeDL`` reutilizables.
+
+Construir un YoutubeDL carga los extractores y el fichero de cookies, así que
+el monitor de playlists y el downloader piden instancias ya hechas a este
+pool, indexadas por una clave que identifica sus opciones (configuración y
+versión del fichero de cookies). Cada instancia la usa un solo hilo a la vez
+(``checkout`` / devolución al salir del bloque) y se recicla —se cierra y se
+crea otra— tras ``max_uses`` usos o ``max_age`` segundos, para no arrastrar
+cachés ni descriptores abiertos indefinidamente.
+
+Cada clave conserva tantas instancias ociosas como llegó a tener reservadas a
+la vez (y al menos ``max_idle_per_key``): una pasada del watcher mantiene
+abierto el listado de todas sus fuentes, y sus instancias deben sobrevivir a
+la siguiente pasada en lugar de cerrarse y construirse otra vez.
+
+``new_youtube_dl`` construye esas instancias sólo con los extractores de
+YouTube (el registro completo de yt-dlp tiene ~1700) e importa ``yt_dlp`` la
+primera vez que hace falta, no al arrancar la API.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Nombres de extractor de youtube.com y music.youtube.com: "youtube", "youtube:tab", ...
+YOUTUBE_EXTRACTORS = [r"youtube(:.*)?"]
+
+
+def new_youtube_dl(opts: Dict[str, Any]) -> Any:
+    """``yt_dlp.YoutubeDL(opts)`` limitado a los extractores de YouTube"""
+    import yt_dlp
+
+    return yt_dlp.YoutubeDL({"allowed_extractors": YOUTUBE_EXTRACTORS, **opts})
+
+
+class _Entry:
+    __slots__ = ("ydl", "created", "uses")
+
+    def __init__(self, ydl: Any, created: float):
+        self.ydl = ydl
+        self.created = created
+        self.uses = 0
+
+
+class YdlPool:
+    """Instancias ociosas por clave de opciones, con reciclado por usos y antigüedad.
+
+    ``max_idle_per_key=0`` desactiva la reutilización.
+    """
+
+    def __init__(
+        self,
+        max_idle_per_key: int = 2,
+        max_uses: int = 200,
+        max_age: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_idle_per_key = max_idle_per_key
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._idle: Dict[Hashable, List[_Entry]] = defaultdict(list)
+        # Instancias reservadas ahora y máximo de reservas simultáneas, por clave
+        self._in_use: Dict[Hashable, int] = defaultdict(int)
+        self._peak: Dict[Hashable, int] = defaultdict(int)
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    @contextmanager
+    def checkout(self, key: Hashable, build: Callable[[], Any]) -> Iterator[Any]:
+        """Instancia para ``key`` (se crea con ``build()`` si no hay ninguna libre)"""
+        entry = self._take(key)
+        built = entry is None
+        if built:
+            entry = _Entry(build(), self._clock())
+        with self._lock:
+            self.created += built
+            self._in_use[key] += 1
+            self._peak[key] = max(self._peak[key], self._in_use[key])
+        try:
+            yield entry.ydl
+        finally:
+            entry.uses += 1
+            self._give_back(key, entry)
+
+    def clear(self):
+        """Cerrar todas las instancias ociosas"""
+        with self._lock:
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle.clear()
+        for entry in entries:
+            self._close(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "keys": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled,
+            }
+
+    def _take(self, key: Hashable):
+        expired = []
+        taken = None
+        with self._lock:
+            now = self._clock()
+            # Reciclado periódico: se aprovecha cada checkout para cerrar las ociosas caducadas
+            for idle_key in list(self._idle):
+                idle = self._idle[idle_key]
+                expired.extend(entry for entry in idle if now - entry.created >= self.max_age)
+                idle[:] = [entry for entry in idle if now - entry.created < self.max_age]
+                if not idle:
+                    del self._idle[idle_key]
+                    if not self._in_use.get(idle_key):
+                        # Clave en desuso (p. ej. cookies reemplazadas): se olvida su pico
+                        self._in_use.pop(idle_key, None)
+                        self._peak.pop(idle_key, None)
+            if self._idle.get(key):
+                taken = self._idle[key].pop()
+                self.reused += 1
+            self.recycled += len(expired)
+        for entry in expired:
+            self._close(entry)
+        return taken
+
+    def _give_back(self, key: Hashable, entry: _Entry):
+        with self._lock:
+            self._in_use[key] -= 1
+            worn = entry.uses >= self.max_uses or self._clock() - entry.created >= self.max_age
+            limit = max(self.max_idle_per_key, self._peak[key]) if self.max_idle_per_key else 0
+            keep = not worn and len(self._idle[key]) < limit
+            if keep:
+                self._idle[key].append(entry)
+            elif worn:
+                self.recycled += 1
+        if not keep:
+            self._close(entry)
+
+    @staticmethod
+    def _close(entry: _Entry):
+        try:
+            entry.ydl.close()
+        except Exception as e:
+            logger.debug(f"Error cerrando instancia de YoutubeDL: {e}")
+
+
+ydl_pool = YdlPool()
@@ -0,0 +1,3 @@
+"""
+Benchmarks de rendimiento (se ejecutan sólo con RUN_BENCHMARKS=1)
+"""
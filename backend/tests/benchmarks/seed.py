@@ -0,0 +1,78 @@
+"""
+Generador de bibliotecas sintéticas para los benchmarks.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db.database import create_db_engine
+from youtube_watcher.db.migrations import run_migrations
+from youtube_watcher.db.models import Source, Track
+from youtube_watcher.db.search import check_search_index
+from youtube_watcher.db.summary import check_summary_tables
+
+_WORDS = [
+    "amor", "noche", "canción", "corazón", "fuego", "luna", "sol", "mar", "cielo",
+    "love", "night", "dance", "heart", "fire", "moon", "dream", "road", "rain",
+    "électrique", "niño", "señal", "música", "ritmo", "último", "tiempo", "vida",
+]
+_STATUSES = ["completed"] * 8 + ["pending", "failed", "ignored"]
+
+
+def make_engine(db_path):
+    """Motor SQLite en fichero (con los PRAGMA de producción) y el esquema completo."""
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    run_migrations(engine)
+    check_search_index(engine)
+    check_summary_tables(engine)
+    return engine
+
+
+def seed_library(engine, tracks: int = 100_000, sources: int = 200, seed: int = 42):
+    """Poblar la base de datos con ``tracks`` canciones repartidas en ``sources`` fuentes."""
+    rnd = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    artists = [f"{rnd.choice(_WORDS).title()} {rnd.choice(_WORDS).title()}" for _ in range(2_000)]
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Source),
+            [
+                {
+                    "url": f"https://www.youtube.com/playlist?list=PL{i:06d}",
+                    "name": f"Playlist {i}",
+                    "type": "playlist",
+                    "status": "active",
+                    "created_at": now,
+                }
+                for i in range(1, sources + 1)
+            ],
+        )
+
+        batch = []
+        for i in range(tracks):
+            created = now - timedelta(minutes=i)
+            status = rnd.choice(_STATUSES)
+            batch.append(
+                {
+                    "youtube_id": f"vid{i:08d}",
+                    "title": " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(2, 5))).title(),
+                    "artist": rnd.choice(artists),
+                    "source_id": rnd.randint(1, sources),
+                    "download_status": status,
+                    "file_path": f"/downloads/track_{i}.flac" if status == "completed" else None,
+                    "created_at": created,
+                    "downloaded_at": created + timedelta(minutes=5) if status == "completed" else None,
+                    "published_at": f"{rnd.randint(1970, 2025)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                }
+            )
+            if len(batch) == 10_000:
+                conn.execute(insert(Track), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Track), batch)
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,123 @@
+"""
+Latencia de lectura bajo carga de escritura sostenida: journal por defecto
+(rollback) frente a WAL + synchronous=NORMAL + busy_timeout.
+
+Un hilo escritor confirma lotes de cambios de estado sin pausa, como el
+watcher durante un escaneo, mientras varios lectores sirven el listado. Sólo
+se comprueba que no haya errores; las latencias se imprimen como referencia.
+"""
+
+import os
+import statistics
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track
+
+from .seed import make_engine, seed_library
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+DURATION = 5.0
+READERS = 4
+WRITE_BATCH = 200
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bench") / "concurrency.db"
+    engine = make_engine(path)
+    seed_library(engine, tracks=100_000, sources=200)
+    engine.dispose()
+    return path
+
+
+def _legacy_engine(path):
+    """Configuración anterior: sólo check_same_thread=False."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _rollback_journal(dbapi_connection, record):
+        dbapi_connection.execute("PRAGMA journal_mode=DELETE")
+
+    return engine
+
+
+def _run_load(engine):
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    stop = threading.Event()
+    latencies, errors, writes = [], [], [0]
+    lock = threading.Lock()
+
+    def writer():
+        offset = 0
+        while not stop.is_set():
+            try:
+                with factory() as db:
+                    db.execute(
+                        update(Track)
+                        .where(Track.id.between(offset + 1, offset + WRITE_BATCH))
+                        .values(download_status="pending")
+                    )
+                    db.commit()
+                writes[0] += 1
+            except OperationalError as e:
+                with lock:
+                    errors.append(f"escritura: {e.orig}")
+            offset = (offset + WRITE_BATCH) % 90_000
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with factory() as db:
+                    routes._list_tracks(db, 1, 50, "completed", None, None, None, None,
+                                        "created_at", "desc", None, False)
+            except OperationalError as e:
+                with lock:
+                    errors.append(f"lectura: {e.orig}")
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, writes[0]
+
+
+def _p95(samples):
+    return statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else float("inf")
+
+
+def test_read_latency_under_write_load(db_path):
+    legacy = _legacy_engine(db_path)
+    old_lat, old_err, old_writes = _run_load(legacy)
+    legacy.dispose()
+
+    tuned = make_engine(db_path)
+    new_lat, new_err, new_writes = _run_load(tuned)
+    tuned.dispose()
+
+    print(f"\n{'':<10}{'lecturas':>10}{'p50 ms':>9}{'p95 ms':>9}{'escrituras':>12}{'errores':>9}")
+    for name, lat, err, writes in (("antes", old_lat, old_err, old_writes), ("después", new_lat, new_err, new_writes)):
+        p50 = statistics.median(lat) if lat else float("inf")
+        print(f"{name:<10}{len(lat):>10}{p50:>9.1f}{_p95(lat):>9.1f}{writes:>12}{len(err):>9}")
+
+    # Las latencias dependen de la máquina: se informan, pero sólo se exige lo
+    # determinista, que con WAL + busy_timeout ninguna operación falla por el bloqueo
+    assert new_err == []
+    assert new_lat and new_writes
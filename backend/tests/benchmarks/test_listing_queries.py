@@ -0,0 +1,84 @@
+"""
+Listado /tracks: proyección con JOIN + orjson frente al ORM con carga perezosa
+de ``Track.source`` y ``TrackResponse`` por fila.
+"""
+
+import json
+import os
+import statistics
+import time
+
+import pytest
+from sqlalchemy import event
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track
+
+from .seed import make_engine, seed_library
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+PAGE_SIZES = [50, 200, 500]
+RUNS = 5
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    engine = make_engine(tmp_path_factory.mktemp("bench") / "listing.db")
+    factory = seed_library(engine, tracks=100_000, sources=200)
+    yield engine, factory
+    engine.dispose()
+
+
+def _legacy_listing(db, page_size):
+    """Implementación anterior: ORM + model_validate + lazy load de la fuente."""
+    query = db.query(Track).order_by(
+        Track.created_at.is_(None), Track.created_at.desc(), Track.id.desc()
+    )
+    total = query.count()
+    result = []
+    for t in query.limit(page_size).all():
+        data = routes.TrackResponse.model_validate(t).model_dump()
+        if t.source:
+            data["source_name"] = t.source.name
+            data["source_type"] = t.source.type
+        result.append(data)
+    return json.dumps({"items": result, "total": total}, default=str).encode()
+
+
+def _measure(engine, factory, fn):
+    samples, queries = [], []
+
+    def _record(*args):
+        queries[-1] += 1
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        for _ in range(RUNS):
+            queries.append(0)
+            # Sesión nueva por petición, como get_db
+            with factory() as db:
+                start = time.perf_counter()
+                fn(db)
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return statistics.median(samples), max(queries)
+
+
+def test_listing_before_after(seeded):
+    engine, factory = seeded
+    print(f"\n{'page_size':<10}{'antes ms':>10}{'consultas':>11}{'después ms':>12}{'consultas':>11}")
+    for page_size in PAGE_SIZES:
+        old_ms, old_q = _measure(engine, factory, lambda db: _legacy_listing(db, page_size))
+        new_ms, new_q = _measure(
+            engine, factory, lambda db: routes.get_tracks(page_size=page_size, db=db)
+        )
+        print(f"{page_size:<10}{old_ms:>10.1f}{old_q:>11}{new_ms:>12.1f}{new_q:>11}")
+
+        assert new_q == 2
+        assert new_q < old_q
+        assert new_ms < old_ms
@@ -0,0 +1,103 @@
+"""
+Regresión de planes de consulta: ninguna consulta caliente sobre ``tracks`` debe
+volver a recorrer la tabla entera (``SCAN tracks`` sin índice).
+
+Se capturan las sentencias reales que emiten las rutas y el watcher y se
+ejecuta ``EXPLAIN QUERY PLAN`` sobre cada una.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import event
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track
+
+from .seed import make_engine, seed_library
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+LISTINGS = {
+    "por defecto": {},
+    "estado": {"status": "failed"},
+    "fuente": {"source_id": 17},
+    "fuente + estado": {"source_id": 17, "status": "completed"},
+    "artista": {"artist": "Amor Luna"},
+    "año": {"year": "2021"},
+    "descargadas recientes": {"sort_by": "downloaded_at"},
+    "publicación": {"sort_by": "published_at"},
+    "publicación asc": {"sort_by": "published_at", "sort_order": "asc"},
+    "artista asc": {"sort_by": "artist", "sort_order": "asc"},
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    engine = make_engine(tmp_path_factory.mktemp("bench") / "plans.db")
+    factory = seed_library(engine, tracks=100_000, sources=200)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    yield engine, factory
+    engine.dispose()
+
+
+def _capture(engine, action):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return statements
+
+
+def _plan(engine, statement, parameters):
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def _full_scans(plan):
+    return [step for step in plan if step.startswith("SCAN tracks") and "INDEX" not in step]
+
+
+def _hot_queries(engine, factory):
+    queries = {}
+    for name, params in LISTINGS.items():
+        with factory() as db:
+            queries[f"listado: {name}"] = _capture(engine, lambda: routes._list_tracks(
+                db, 1, 50, params.get("status"), params.get("source_id"), params.get("artist"),
+                None, params.get("year"), params.get("sort_by", "created_at"),
+                params.get("sort_order", "desc"), None, False,
+            ))
+
+    with factory() as db:
+        # Detección de borrados del watcher y sincronización con Navidrome
+        queries["completadas de una fuente"] = _capture(engine, lambda: db.query(Track).filter(
+            Track.source_id == 17, Track.download_status == "completed"
+        ).all())
+        queries["búsqueda por youtube_id"] = _capture(
+            engine, lambda: db.query(Track).filter(Track.youtube_id == "vid00004242").first()
+        )
+    return queries
+
+
+def test_no_full_table_scans(seeded):
+    engine, factory = seeded
+    failures = []
+    for name, statements in _hot_queries(engine, factory).items():
+        for statement, parameters in statements:
+            plan = _plan(engine, statement, parameters)
+            print(f"\n{name}:\n  " + "\n  ".join(plan))
+            if _full_scans(plan):
+                failures.append(f"{name}: {plan}")
+
+    assert not failures, "Recorridos completos de tracks:\n" + "\n".join(failures)
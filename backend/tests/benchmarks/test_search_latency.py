@@ -0,0 +1,60 @@
+"""
+Latencia de búsqueda en /tracks: índice FTS5 frente al LIKE '%term%' original.
+"""
+
+import os
+import statistics
+import time
+
+import pytest
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track
+
+from .seed import make_engine, seed_library
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+TERMS = ["amor", "noche fuego", "cancion", "love", "electrique"]
+RUNS = 5
+
+
+@pytest.fixture(scope="module")
+def session_factory(tmp_path_factory):
+    engine = make_engine(tmp_path_factory.mktemp("bench") / "search.db")
+    factory = seed_library(engine, tracks=100_000, sources=200)
+    yield factory
+    engine.dispose()
+
+
+def _median_ms(fn):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _legacy_search(db, term):
+    query = db.query(Track).filter(Track.title.ilike(f"%{term}%"))
+    query = query.order_by(Track.created_at.is_(None), Track.created_at.desc(), Track.id.desc())
+    query.count()
+    return query.limit(50).all()
+
+
+def test_fts_search_beats_like_scan(session_factory):
+    print(f"\n{'término':<14}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}")
+    like_total = fts_total = 0.0
+    with session_factory() as db:
+        for term in TERMS:
+            like_ms = _median_ms(lambda: _legacy_search(db, term))
+            fts_ms = _median_ms(lambda: routes.get_tracks(search=term, db=db))
+            like_total += like_ms
+            fts_total += fts_ms
+            print(f"{term:<14}{like_ms:>12.1f}{fts_ms:>12.1f}")
+
+    assert fts_total < like_total
@@ -0,0 +1,82 @@
+"""
+Prueba de carga del hub de eventos: cientos de suscriptores SSE ociosos y
+difusión de ráfagas de eventos desde un hilo productor (como el watcher).
+"""
+
+import asyncio
+import os
+import statistics
+import threading
+import time
+
+import pytest
+
+from youtube_watcher.events import EventHub
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+SUBSCRIBERS = 300
+EVENTS = 500
+
+
+async def _consume(hub, subscription, expected, latencies, done):
+    received = 0
+    while received < expected:
+        events, overflowed = await subscription.get(timeout=5)
+        assert not overflowed
+        now = time.perf_counter()
+        for _, _, data in events:
+            latencies.append((now - data["sent"]) * 1000)
+        received += len(events)
+        if not events:
+            break
+    hub.unsubscribe(subscription)
+    done.append(received)
+
+
+def test_fanout_to_idle_subscribers():
+    hub = EventHub(buffer_size=1024)
+    latencies: list[float] = []
+    done: list[int] = []
+
+    async def _run():
+        subscriptions = [hub.subscribe() for _ in range(SUBSCRIBERS)]
+
+        # Suscriptores ociosos: no debe consumirse CPU mientras no hay eventos
+        idle_start = time.process_time()
+        await asyncio.sleep(1.0)
+        idle_cpu_ms = (time.process_time() - idle_start) * 1000
+
+        consumers = [
+            asyncio.create_task(_consume(hub, s, EVENTS, latencies, done)) for s in subscriptions
+        ]
+
+        def _produce():
+            for i in range(EVENTS):
+                hub.publish("track.updated", {"id": i, "sent": time.perf_counter()})
+                if i % 50 == 0:
+                    time.sleep(0.01)
+
+        start = time.perf_counter()
+        producer = threading.Thread(target=_produce)
+        producer.start()
+        await asyncio.gather(*consumers)
+        producer.join()
+        return idle_cpu_ms, time.perf_counter() - start
+
+    idle_cpu_ms, elapsed = asyncio.run(_run())
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"\n{SUBSCRIBERS} suscriptores, {EVENTS} eventos: {SUBSCRIBERS * EVENTS / elapsed:,.0f} entregas/s, "
+        f"latencia p50={statistics.median(latencies):.2f}ms p99={p99:.2f}ms, "
+        f"CPU en reposo={idle_cpu_ms:.1f}ms/s"
+    )
+
+    assert done == [EVENTS] * SUBSCRIBERS
+    assert hub.subscriber_count == 0
+    assert idle_cpu_ms < 50
+    assert p99 < 1000
@@ -0,0 +1,97 @@
+"""
+Arranque en frío y memoria de ``youtube_watcher.api.main``.
+
+Cada medición se hace en un proceso nuevo. El "antes" se reproduce importando
+``yt_dlp`` al principio (como hacían ``downloader.py`` y ``playlist_monitor.py``)
+y construyendo las instancias con el registro completo de extractores; el
+"después" es el comportamiento actual: ``yt_dlp`` se importa al construir la
+primera instancia y ésta sólo carga los extractores de YouTube.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+RUNS = 9
+INSTANCES = 4
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+_SCRIPT = """
+import json, os, sys, time
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+start = time.perf_counter()
+if {eager}:
+    import yt_dlp
+import youtube_watcher.api.main
+import_ms = (time.perf_counter() - start) * 1000
+startup_rss = rss_mb()
+yt_dlp_at_startup = "yt_dlp" in sys.modules
+
+from youtube_watcher.ydl_pool import new_youtube_dl
+start = time.perf_counter()
+# Una instancia por clave del pool (monitor, descargas con varias cookies...)
+if {eager}:
+    instances = [yt_dlp.YoutubeDL({{"quiet": True}}) for _ in range({instances})]
+else:
+    instances = [new_youtube_dl({{"quiet": True}}) for _ in range({instances})]
+build_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({{"import_ms": import_ms, "startup_rss": startup_rss,
+                  "build_ms": build_ms, "steady_rss": rss_mb(),
+                  "yt_dlp_at_startup": yt_dlp_at_startup}}))
+"""
+
+
+def _run(eager: bool) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _SCRIPT.format(eager=eager, instances=INSTANCES)],
+        cwd=SRC, capture_output=True, text=True, timeout=120, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _measure() -> tuple:
+    # Procesos alternos para que la deriva de la máquina afecte por igual a ambos
+    runs = {True: [], False: []}
+    for _ in range(RUNS):
+        for eager in (True, False):
+            runs[eager].append(_run(eager))
+
+    def summary(results):
+        # Tiempos: el mínimo (menos ruido del sistema); memoria: la mediana
+        return {
+            key: (min if key.endswith("_ms") else statistics.median)(run[key] for run in results)
+            for key in results[0]
+            if key != "yt_dlp_at_startup"
+        }
+
+    return summary(runs[True]), summary(runs[False]), runs[False]
+
+
+def test_lazy_youtube_only_yt_dlp_startup():
+    before, after, lazy_runs = _measure()
+
+    def line(name, m):
+        return (
+            f"\n  {name}: import api.main {m['import_ms']:.0f}ms, RSS {m['startup_rss']:.0f}MB; "
+            f"{INSTANCES} YoutubeDL {m['build_ms']:.0f}ms, RSS {m['steady_rss']:.0f}MB"
+        )
+
+    print(f"\n{RUNS} procesos por caso" + line("antes", before) + line("después", after))
+
+    # Los tiempos y el RSS sólo se informan: dependen de la máquina y no se comparan.
+    # Lo que sí es determinista: importar la API ya no arrastra yt_dlp
+    assert not any(run["yt_dlp_at_startup"] for run in lazy_runs)
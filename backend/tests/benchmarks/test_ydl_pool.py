@@ -0,0 +1,71 @@
+"""
+Coste por pasada del watcher al obtener un YoutubeDL por fuente: construyendo
+uno nuevo cada vez (comportamiento anterior) frente al pool de instancias.
+
+No hay red: ``extract_info`` se sustituye por una respuesta vacía, así que se
+mide sólo la construcción de las instancias (extractores, cookies, caché).
+"""
+
+import os
+import resource
+import time
+
+import pytest
+import yt_dlp
+
+from youtube_watcher import playlist_monitor
+from youtube_watcher.playlist_monitor import PlaylistMonitor
+from youtube_watcher.ydl_pool import YdlPool
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"),
+    reason="RUN_BENCHMARKS no está definido",
+)
+
+SOURCES = 50
+PASSES = 3
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_passes(pool):
+    cpu, rss = [], []
+    for _ in range(PASSES):
+        start = time.process_time()
+        for i in range(SOURCES):
+            PlaylistMonitor(f"https://www.youtube.com/playlist?list=PL{i}").get_playlist_videos()
+        cpu.append((time.process_time() - start) * 1000)
+        rss.append(_rss_mb())
+    pool.clear()
+    return cpu, rss
+
+
+def test_pool_cuts_per_pass_cost(monkeypatch):
+    monkeypatch.setattr(yt_dlp.YoutubeDL, "extract_info", lambda self, url, download=False: {"entries": []})
+    monkeypatch.setattr(playlist_monitor.rate_limiter, "acquire", lambda kind: 0.0)
+
+    # Sin reutilización: cada fuente construye (y cierra) su propia instancia
+    monkeypatch.setattr(playlist_monitor, "ydl_pool", YdlPool(max_idle_per_key=0))
+    before_cpu, before_rss = _run_passes(playlist_monitor.ydl_pool)
+
+    monkeypatch.setattr(playlist_monitor, "ydl_pool", YdlPool())
+    after_cpu, after_rss = _run_passes(playlist_monitor.ydl_pool)
+
+    print(
+        f"\n{SOURCES} fuentes por pasada"
+        f"\n  sin pool: CPU/pasada {', '.join(f'{c:.0f}ms' for c in before_cpu)}; "
+        f"RSS {', '.join(f'{r:.0f}MB' for r in before_rss)}"
+        f"\n  con pool: CPU/pasada {', '.join(f'{c:.0f}ms' for c in after_cpu)}; "
+        f"RSS {', '.join(f'{r:.0f}MB' for r in after_rss)}"
+    )
+
+    # Tras la primera pasada (que crea la instancia) el coste debe ser mínimo
+    assert max(after_cpu[1:]) < min(before_cpu) / 10
+    # Y la memoria no debe crecer de pasada en pasada
+    assert after_rss[-1] - after_rss[1] < 5
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db import activity
+from youtube_watcher.db.workers import heartbeat
+from youtube_watcher.jobs import JobRegistry
+from youtube_watcher.progress import ProgressTable
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(bind=db_engine)
+
+
+def _processes(session_factory, *worker_ids, now=None):
+    with session_factory() as db:
+        for worker_id in worker_ids:
+            heartbeat(db, worker_id, now=now)
+
+
+class TestSharedProgress:
+    def test_other_processes_see_downloads_in_flight(self, session_factory):
+        _processes(session_factory, "worker:1")
+        worker, api = ProgressTable(min_interval=0), ProgressTable()
+        worker.persist_to(session_factory, "worker:1")
+        api.persist_to(session_factory, "api:2")
+
+        worker.start("abc", "Song")
+        worker.update("abc", stage="downloading", fraction=0.5)
+        assert [(e["youtube_id"], e["stage"], e["fraction"]) for e in api.snapshot()] == [
+            ("abc", "downloading", 0.5)
+        ]
+
+        worker.finish("abc")
+        assert api.snapshot() == []
+
+    def test_downloads_of_dead_workers_are_not_listed(self, session_factory):
+        _processes(session_factory, "worker:1", now=datetime.utcnow() - timedelta(hours=1))
+        worker, api = ProgressTable(), ProgressTable()
+        worker.persist_to(session_factory, "worker:1")
+        api.persist_to(session_factory, "api:2")
+
+        worker.start("abc", "Song")
+
+        assert api.snapshot() == []
+
+    def test_feed_relays_progress_written_elsewhere(self, session_factory, db_engine, monkeypatch):
+        published = []
+        monkeypatch.setattr(activity, "event_hub", Mock(publish_many=published.extend))
+        _processes(session_factory, "worker:1", "api:2")
+        worker, api = ProgressTable(min_interval=0), ProgressTable()
+        worker.persist_to(session_factory, "worker:1")
+        api.persist_to(session_factory, "api:2")
+        feed = activity.ProgressFeed("api:2")
+
+        worker.start("abc", "Song")
+        api.start("own", "Local")
+        with db_engine.connect() as connection:
+            feed.poll(connection)
+            feed.poll(connection)
+            worker.finish("abc")
+            feed.poll(connection)
+
+        assert [(data["youtube_id"], data["stage"]) for _, data in published] == [
+            ("abc", "queued"), ("abc", "finished")
+        ]
+
+
+class TestSharedJobs:
+    def test_any_process_can_report_a_job(self, session_factory):
+        creator, other = JobRegistry(max_workers=1), JobRegistry(max_workers=1)
+        creator.persist_to(session_factory, "api:1")
+        other.persist_to(session_factory, "api:2")
+
+        def work(job, items):
+            for _ in items:
+                job.advance()
+            return {"count": len(items)}
+
+        job = creator.submit("work", work, [1, 2, 3], total=3)
+        creator._executor.shutdown(wait=True)
+
+        seen = other.describe(job.id)
+        assert (seen["status"], seen["done"], seen["result"]) == ("completed", 3, {"count": 3})
+        assert [j["id"] for j in other.describe_all()] == [job.id]
+        assert other.describe("missing") is None
+
+    def test_finished_jobs_are_pruned(self, session_factory):
+        registry = JobRegistry(max_workers=1, keep=2)
+        registry.persist_to(session_factory, "api:1")
+        for _ in range(4):
+            registry.submit("noop", lambda job: None)
+            registry._executor.submit(lambda: None).result()
+
+        with session_factory() as db:
+            assert len(activity.recent_jobs(db, 10)) == 2
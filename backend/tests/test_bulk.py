@@ -0,0 +1,137 @@
+import threading
+from unittest.mock import Mock
+
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.api import routes
+from youtube_watcher.db import database
+from youtube_watcher.db.models import Track
+from youtube_watcher.jobs import NAVIDROME_LANE, JobRegistry
+
+
+def _statuses(db_session):
+    db_session.expire_all()
+    return {t.youtube_id: t.download_status for t in db_session.query(Track)}
+
+
+class TestJobRegistry:
+    def test_records_progress_result_and_failure(self):
+        registry = JobRegistry(max_workers=1)
+
+        def work(job, items):
+            for _ in items:
+                job.advance()
+            return {"count": len(items)}
+
+        def broken(job):
+            raise RuntimeError("boom")
+
+        ok = registry.submit("work", work, [1, 2, 3], total=3)
+        bad = registry.submit("broken", broken)
+        registry._executor.shutdown(wait=True)
+
+        assert (ok.status, ok.done, ok.result) == ("completed", 3, {"count": 3})
+        assert bad.status == "failed" and bad.errors == ["boom"]
+        assert [j.id for j in registry.list()] == [bad.id, ok.id]
+
+    def test_prunes_oldest_finished_jobs(self):
+        registry = JobRegistry(max_workers=1, keep=2)
+        for _ in range(4):
+            registry.submit("noop", lambda job: None)
+            registry._executor.submit(lambda: None).result()
+
+        assert len(registry.list()) == 2
+
+    def test_navidrome_jobs_do_not_wait_behind_bulk_jobs(self):
+        registry = JobRegistry(max_workers=1)
+        release = threading.Event()
+        registry.submit("tracks.download", lambda job: release.wait(5))
+
+        link = registry.submit("navidrome.link_source", lambda job: "linked", lane=NAVIDROME_LANE)
+        try:
+            registry._lanes[NAVIDROME_LANE].submit(lambda: None).result(timeout=5)
+            assert (link.status, link.result) == ("completed", "linked")
+        finally:
+            release.set()
+
+
+class TestBulkTracks:
+    def test_delete_by_ids_ignores_tracks_and_removes_files(self, api_client, db_session, tmp_path, wait_for_job):
+        song = tmp_path / "song.flac"
+        song.write_text("flac")
+        db_session.add_all([
+            Track(youtube_id="a", title="A", download_status="completed", file_path=str(song)),
+            Track(youtube_id="b", title="B", download_status="completed"),
+            Track(youtube_id="c", title="C", download_status="completed"),
+        ])
+        db_session.commit()
+        ids = [t.id for t in db_session.query(Track).filter(Track.youtube_id.in_(["a", "b"]))]
+
+        response = api_client.post("/api/tracks/bulk/delete", json={"ids": ids})
+        job = wait_for_job(response.json()["job_id"])
+
+        assert response.json()["updated"] == 2
+        assert job.result == {"removed": 1}
+        assert not song.exists()
+        assert _statuses(db_session) == {"a": "ignored", "b": "ignored", "c": "completed"}
+
+    def test_restore_by_filter_only_touches_failed_or_ignored(self, api_client, db_session):
+        db_session.add_all([
+            Track(youtube_id="a", title="A", download_status="failed"),
+            Track(youtube_id="b", title="B", download_status="failed", artist="Other"),
+            Track(youtube_id="c", title="C", download_status="completed"),
+        ])
+        db_session.commit()
+
+        response = api_client.post("/api/tracks/bulk/restore", json={"filter": {"status": "failed"}})
+
+        # No in-process watcher: the tracks wait for the worker processes
+        assert (response.json()["status"], response.json()["job_id"]) == ("queued", None)
+        assert response.json()["updated"] == 2
+        assert _statuses(db_session) == {"a": "pending", "b": "pending", "c": "completed"}
+
+    def test_restore_downloads_the_tracks_in_a_job(self, api_client, db_session, db_engine, monkeypatch, wait_for_job):
+        db_session.add_all([
+            Track(youtube_id="a", title="A", download_status="ignored"),
+            Track(youtube_id="b", title="B", download_status="completed"),
+        ])
+        db_session.commit()
+        watcher = Mock()
+        monkeypatch.setattr(routes, "get_watcher", lambda: watcher)
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+
+        response = api_client.post("/api/tracks/bulk/restore", json={"filter": {"status": "ignored"}})
+        job = wait_for_job(response.json()["job_id"])
+
+        assert response.json()["updated"] == 1
+        assert job.result == {"downloaded": 1}
+        assert [c.args[0]["id"] for c in watcher._process_video.call_args_list] == ["a"]
+
+    def test_empty_selection_is_rejected(self, api_client):
+        assert api_client.post("/api/tracks/bulk/delete", json={}).status_code == 400
+        assert api_client.post("/api/tracks/bulk/delete", json={"filter": {}}).status_code == 400
+
+    def test_enqueue_creates_pending_tracks(self, api_client, db_session):
+        db_session.add(Track(youtube_id="aaaaaaaaaaa", title="Done", download_status="completed"))
+        db_session.add(Track(youtube_id="bbbbbbbbbbb", title="Skip", download_status="ignored"))
+        db_session.commit()
+
+        response = api_client.post("/api/tracks/bulk/enqueue", json={"urls": [
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "https://youtu.be/bbbbbbbbbbb",
+            "https://www.youtube.com/watch?v=ccccccccccc",
+            "https://example.com/nope",
+        ]})
+        body = response.json()
+
+        # No in-process watcher: the tracks wait for the worker processes
+        assert (body["status"], body["job_id"]) == ("queued", None)
+        assert body["queued"] == 2
+        assert body["already_exists"] == ["aaaaaaaaaaa"]
+        assert body["invalid"] == ["https://example.com/nope"]
+        assert _statuses(db_session) == {
+            "aaaaaaaaaaa": "completed", "bbbbbbbbbbb": "pending", "ccccccccccc": "pending",
+        }
+
+    def test_unknown_job_is_404(self, api_client):
+        assert api_client.get("/api/jobs/missing").status_code == 404
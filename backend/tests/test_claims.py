@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from sqlalchemy.dialects import postgresql
+
+from youtube_watcher.db import search
+from youtube_watcher.db.claims import (
+    claim_pending_tracks,
+    claim_track,
+    pending_claim_query,
+    release_track,
+)
+from youtube_watcher.db.models import Source, Track
+from youtube_watcher.scheduler import INTERACTIVE
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+def _add(db, youtube_id, status="pending", claimed_by=None, claimed_at=None):
+    track = Track(
+        youtube_id=youtube_id,
+        title=youtube_id,
+        download_status=status,
+        claimed_by=claimed_by,
+        claimed_at=claimed_at,
+    )
+    db.add(track)
+    db.commit()
+    return track
+
+
+def _claimed_by(db, track_id):
+    db.expire_all()
+    return db.get(Track, track_id).claimed_by
+
+
+class TestClaimTrack:
+    def test_second_worker_cannot_claim_a_claimed_track(self, db_session):
+        track = _add(db_session, "a")
+
+        assert claim_track(db_session, track.id, "w1") is True
+        assert claim_track(db_session, track.id, "w2") is False
+        assert _claimed_by(db_session, track.id) == "w1"
+
+    def test_stale_lease_is_taken_over(self, db_session):
+        track = _add(db_session, "a", claimed_by="w1", claimed_at=datetime.utcnow() - timedelta(hours=2))
+
+        assert claim_track(db_session, track.id, "w2", lease=timedelta(minutes=30)) is True
+        assert _claimed_by(db_session, track.id) == "w2"
+
+    def test_release_only_drops_own_lease(self, db_session):
+        track = _add(db_session, "a")
+        claim_track(db_session, track.id, "w1")
+
+        release_track(db_session, track.id, "w2")
+        assert _claimed_by(db_session, track.id) == "w1"
+
+        release_track(db_session, track.id, "w1")
+        assert _claimed_by(db_session, track.id) is None
+
+
+class TestClaimPendingTracks:
+    def test_skips_claimed_and_non_pending_tracks(self, db_session):
+        free = _add(db_session, "a")
+        _add(db_session, "b", claimed_by="w1", claimed_at=datetime.utcnow())
+        _add(db_session, "c", status="completed")
+        stale = _add(db_session, "d", claimed_by="w1", claimed_at=datetime.utcnow() - timedelta(hours=2))
+
+        assert sorted(claim_pending_tracks(db_session, "w2")) == sorted([free.id, stale.id])
+        assert claim_pending_tracks(db_session, "w3") == []
+
+    def test_respects_the_limit(self, db_session):
+        for i in range(5):
+            _add(db_session, f"v{i}")
+
+        first = claim_pending_tracks(db_session, "w1", limit=3)
+        second = claim_pending_tracks(db_session, "w2", limit=3)
+
+        assert len(first) == 3
+        assert len(second) == 2
+        assert not set(first) & set(second)
+
+    def test_skips_tracks_of_paused_sources(self, db_session):
+        paused = Source(url="https://paused", name="Paused", type="playlist", status="paused")
+        active = Source(url="https://active", name="Active", type="playlist", status="active")
+        db_session.add_all([paused, active])
+        db_session.commit()
+        orphan = _add(db_session, "a")
+        in_active = _add(db_session, "b")
+        in_active.source_id = active.id
+        _add(db_session, "c").source_id = paused.id
+        db_session.commit()
+
+        assert sorted(claim_pending_tracks(db_session, "w1")) == sorted([orphan.id, in_active.id])
+
+    def test_user_requested_tracks_come_first(self, db_session):
+        old = _add(db_session, "a")
+        requested = _add(db_session, "b")
+        requested.priority = 1
+        db_session.commit()
+
+        assert claim_pending_tracks(db_session, "w1", limit=1) == [requested.id]
+        assert claim_pending_tracks(db_session, "w1", priority_only=True) == [requested.id]
+        assert claim_pending_tracks(db_session, "w2", limit=1) == [old.id]
+
+    def test_postgres_query_skips_locked_rows(self):
+        sql = str(pending_claim_query("w1", 10, datetime.utcnow()).compile(dialect=postgresql.dialect()))
+
+        assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+class TestPostgresSearch:
+    def test_match_subquery_uses_the_expression_index(self):
+        query = search.match_subquery("beat fore", "postgresql")
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        assert "to_tsquery('simple'" in sql
+        assert "@@" in sql
+        assert search.build_tsquery("beat fore") == "'beat':* & 'fore':*"
+
+
+class TestWatcherClaims:
+    def test_does_not_download_a_track_claimed_elsewhere(self, db_session, tmp_path):
+        track = _add(db_session, "abc123")
+        claim_track(db_session, track.id, "other-host:1")
+        watcher = YouTubeWatcher(str(tmp_path))
+        watcher.downloader.download_and_convert = Mock()
+
+        watcher._process_video({"id": "abc123", "title": "Song"}, None, db_session)
+
+        watcher.downloader.download_and_convert.assert_not_called()
+
+    def test_releases_the_claim_after_downloading(self, db_session, tmp_path):
+        track = _add(db_session, "abc123")
+        watcher = YouTubeWatcher(str(tmp_path))
+        watcher._add_to_navidrome_playlist = Mock()
+        watcher.downloader.download_and_convert = Mock(
+            return_value={"success": True, "filename": "Song.flac", "title": "Song"}
+        )
+
+        watcher._drain_pending_tracks(db_session)
+
+        watcher.downloader.download_and_convert.assert_called_once()
+        db_session.expire_all()
+        track = db_session.get(Track, track.id)
+        assert track.download_status == "completed"
+        assert track.claimed_by is None
+
+    def test_drain_releases_claims_when_processing_fails(self, db_session, tmp_path):
+        first, second = _add(db_session, "a"), _add(db_session, "b")
+        watcher = YouTubeWatcher(str(tmp_path))
+        watcher._process_video = Mock(side_effect=[RuntimeError("boom"), None])
+
+        watcher._drain_pending_tracks(db_session)
+
+        assert watcher._process_video.call_count == 2
+        assert _claimed_by(db_session, first.id) is None
+        assert _claimed_by(db_session, second.id) is None
+
+    def test_drain_downloads_user_requested_tracks_on_the_interactive_lane(self, db_session, tmp_path):
+        _add(db_session, "a")
+        requested = _add(db_session, "b")
+        requested.priority = 1
+        db_session.commit()
+        watcher = YouTubeWatcher(str(tmp_path))
+        watcher._process_video = Mock()
+
+        watcher._drain_priority_tracks(db_session)
+
+        watcher._process_video.assert_called_once()
+        assert watcher._process_video.call_args.args[0]["id"] == "b"
+        assert watcher._process_video.call_args.kwargs["lane"] == INTERACTIVE
@@ -26,6 +26,8 @@ class FakeDB:
 def _patch_session_local(monkeypatch):
     fake_session = MagicMock(return_value=FakeDB())
     monkeypatch.setattr("youtube_watcher.db.database.SessionLocal", fake_session)
+    # main() migrates the real engine (backend/data/watcher.db) before starting
+    monkeypatch.setattr(cli, "run_migrations", MagicMock())
 
 
 def test_get_environment_config(monkeypatch, tmp_path):
@@ -0,0 +1,103 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from youtube_watcher.api import routes
+from youtube_watcher.api.conditional import ConditionalGetMiddleware
+from youtube_watcher.db.changes import mark_changed, read_versions
+from youtube_watcher.db.models import Source, Track
+
+
+class TestChangeVersions:
+    def test_commits_bump_and_rollbacks_do_not(self, db_engine, db_session):
+        def versions():
+            with db_engine.connect() as connection:
+                return read_versions(connection, "tracks", "sources")
+
+        before = versions()
+        db_session.add(Track(youtube_id="a", title="a"))
+        db_session.flush()
+        db_session.rollback()
+        assert versions() == before
+
+        db_session.add(Track(youtube_id="a", title="a"))
+        db_session.commit()
+        after_insert = versions()
+        assert after_insert != before
+
+        db_session.query(Source).filter(Source.id == 99).update({"name": "x"})
+        db_session.commit()
+        assert versions() != after_insert
+
+    def test_mark_changed_bumps_channels_the_orm_does_not_see(self, db_engine, db_session):
+        with db_engine.connect() as connection:
+            tracks, config = read_versions(connection, "tracks", "config").split(".")
+
+        mark_changed(db_session, "config")
+        db_session.commit()
+
+        with db_engine.connect() as connection:
+            assert read_versions(connection, "tracks", "config") == f"{tracks}.{int(config) + 1}"
+
+
+class TestConditionalGet:
+    def test_unchanged_poll_gets_304(self, api_client):
+        first = api_client.get("/api/tracks/stats")
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "no-cache"
+
+        second = api_client.get("/api/tracks/stats", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+    def test_write_invalidates_etag(self, api_client, db_session):
+        etag = api_client.get("/api/tracks?page=1").headers["etag"]
+
+        db_session.add(Track(youtube_id="a", title="a"))
+        db_session.commit()
+
+        response = api_client.get("/api/tracks?page=1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+        assert response.headers["etag"] != etag
+
+    def test_etag_depends_on_query(self, api_client):
+        assert (
+            api_client.get("/api/tracks?page=1").headers["etag"]
+            != api_client.get("/api/tracks?page=2").headers["etag"]
+        )
+
+    def test_unrelated_channel_keeps_etag(self, api_client, db_session):
+        etag = api_client.get("/api/sources").headers["etag"]
+
+        db_session.add(Track(youtube_id="a", title="a"))
+        db_session.commit()
+
+        assert api_client.get("/api/sources", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_api_workers_agree_on_the_etag(self, api_app, db_engine):
+        # Another uvicorn worker: same database, its own process state
+        other = FastAPI()
+        other.add_middleware(ConditionalGetMiddleware, engine=db_engine)
+        other.router = api_app.router
+
+        with TestClient(api_app) as first, TestClient(other) as second:
+            etag = first.get("/api/tracks/years").headers["etag"]
+            assert second.get("/api/tracks/years", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_cookie_changes_invalidate_the_dashboard(self, api_client, tmp_path, monkeypatch):
+        monkeypatch.setenv("COOKIES_PATH", str(tmp_path / "cookies.txt"))
+        monkeypatch.setattr(routes, "get_watcher", lambda: None)
+        etag = api_client.get("/api/dashboard").headers["etag"]
+
+        api_client.post("/api/config/cookies", files={"file": ("cookies.txt", b"# Netscape")})
+
+        response = api_client.get("/api/dashboard", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["cookies"]["exists"] is True
+
+    def test_cookie_status_is_not_cached(self, api_client):
+        # Its pool health changes in memory, without a version bump
+        assert "etag" not in api_client.get("/api/config/cookies").headers
@@ -0,0 +1,186 @@
+import os
+from unittest.mock import Mock
+
+import pytest
+import yt_dlp
+
+from youtube_watcher import downloader as downloader_module
+from youtube_watcher.api import routes
+from youtube_watcher.cookies import CookiePool, pool_dir, pool_files
+from youtube_watcher.downloader import YouTubeDownloader
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+class TestCookiePool:
+    def test_round_robin_over_available_cookies(self, clock):
+        pool = CookiePool(["a", "b", "c"], clock=clock)
+
+        picks = []
+        for _ in range(6):
+            clock.now += 1
+            picks.append(pool.acquire())
+
+        assert picks == ["a", "b", "c", "a", "b", "c"]
+
+    def test_prefers_cookies_that_were_not_throttled(self, clock):
+        pool = CookiePool(["a", "b"], clock=clock)
+        pool.report_throttled("a")
+
+        clock.now += 1
+        assert [pool.acquire(), pool.acquire()] == ["b", "b"]
+
+    def test_benches_a_cookie_after_repeated_errors(self, clock):
+        pool = CookiePool(["a", "b"], bench_after=2, bench_seconds=60, clock=clock)
+        pool.report_throttled("a")
+        pool.report_throttled("a")
+
+        assert {c["name"]: c["benched"] for c in pool.snapshot()} == {"a": True, "b": False}
+        pool.report_throttled("b")
+        clock.now += 1
+        # "b" had an error too, but "a" is benched
+        assert pool.acquire() == "b"
+
+        clock.now += 60
+        assert pool.snapshot()[0]["benched"] is False
+
+    def test_bench_doubles_on_relapse_and_resets_on_success(self, clock):
+        pool = CookiePool(["a"], bench_after=1, bench_seconds=60, clock=clock)
+
+        pool.report_throttled("a")
+        clock.now += 60
+        pool.report_throttled("a")
+        assert pool.snapshot()[0]["benched_seconds_left"] == 120
+
+        clock.now += 120
+        pool.report_success("a")
+        pool.report_throttled("a")
+        assert pool.snapshot()[0]["benched_seconds_left"] == 60
+
+    def test_all_benched_uses_the_one_back_soonest(self, clock):
+        pool = CookiePool(["a", "b"], bench_after=1, bench_seconds=60, clock=clock)
+        pool.report_throttled("b")
+        clock.now += 10
+        pool.report_throttled("a")
+
+        assert pool.acquire() == "b"
+
+    def test_set_paths_keeps_health_of_remaining_cookies(self):
+        pool = CookiePool(["a", "b"])
+        pool.report_throttled("a")
+
+        pool.set_paths(["a", "c"])
+
+        assert [(c["name"], c["errors"]) for c in pool.snapshot()] == [("a", 1), ("c", 0)]
+        assert CookiePool().acquire() is None
+
+
+class TestPoolFiles:
+    def test_main_file_first_then_pool_directory(self, tmp_path):
+        main = tmp_path / "cookies.txt"
+        pool_dir(main).mkdir()
+        (pool_dir(main) / "b.txt").write_text("")
+        (pool_dir(main) / "a.txt").write_text("")
+        (pool_dir(main) / "notes.md").write_text("")
+
+        assert pool_files(main) == [pool_dir(main) / "a.txt", pool_dir(main) / "b.txt"]
+        main.write_text("")
+        assert pool_files(main)[0] == main
+
+
+class DummyYDL:
+    instances = []
+
+    def __init__(self, opts):
+        self.opts = opts
+        DummyYDL.instances.append(self)
+
+    def extract_info(self, url, download=True):
+        return None
+
+    def close(self):
+        pass
+
+
+class TestDownloaderRotation:
+    @pytest.fixture(autouse=True)
+    def dummy_ydl(self, monkeypatch):
+        DummyYDL.instances = []
+        monkeypatch.setattr(DummyYDL, "extract_info", DummyYDL.extract_info)
+        monkeypatch.setattr(yt_dlp, "YoutubeDL", DummyYDL)
+        monkeypatch.setattr(downloader_module, "rate_limiter", Mock())
+
+    def test_rotates_cookies_without_recreating_the_downloader(self, tmp_path):
+        first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+        first.write_text("")
+        second.write_text("")
+        pool = CookiePool([str(first)])
+        downloader = YouTubeDownloader(str(tmp_path), cookie_pool=pool)
+
+        downloader._download_opus({"id": "abc"}, "Song")
+        pool.set_paths([str(first), str(second)])
+        downloader._download_opus({"id": "abc"}, "Song")
+        downloader._download_opus({"id": "abc"}, "Song")
+
+        assert [ydl.opts["cookiefile"] for ydl in DummyYDL.instances] == [str(first), str(second)]
+
+    def test_replaced_file_gets_a_fresh_instance(self, tmp_path):
+        cookie = tmp_path / "a.txt"
+        cookie.write_text("old")
+        downloader = YouTubeDownloader(str(tmp_path), cookie_pool=CookiePool([str(cookie)]))
+        downloader._download_opus({"id": "abc"}, "Song")
+
+        cookie.write_text("new session")
+        os.utime(cookie, ns=(0, 0))
+        downloader._download_opus({"id": "abc"}, "Song")
+
+        assert len(DummyYDL.instances) == 2
+
+    def test_throttle_messages_count_against_the_cookie_in_use(self, tmp_path):
+        pool = CookiePool(["a.txt", "b.txt"], bench_after=1)
+        downloader = YouTubeDownloader(str(tmp_path), cookie_pool=pool)
+        DummyYDL.extract_info = lambda self, url, download=True: self.opts["logger"].error(
+            "ERROR: HTTP Error 403: Forbidden"
+        )
+
+        downloader._download_opus({"id": "abc"}, "Song")
+
+        assert [c["benched"] for c in pool.snapshot()] == [True, False]
+
+
+class TestWatcherCookiePool:
+    def test_picks_up_pool_files_from_another_process(self, tmp_path):
+        main = tmp_path / "cookies.txt"
+        watcher = YouTubeWatcher(str(tmp_path / "dl"))
+        watcher.watch_cookies_file(str(main))
+        assert watcher.cookie_pool.paths == []
+
+        pool_dir(main).mkdir()
+        (pool_dir(main) / "alt.txt").write_text("")
+        main.write_text("")
+        watcher._reload_cookies_if_changed()
+
+        assert watcher.cookie_pool.paths == [str(main), str(pool_dir(main) / "alt.txt")]
+        assert watcher.downloader.cookie_pool is watcher.cookie_pool
+
+
+class TestCookieRoutes:
+    @pytest.fixture
+    def main_cookies(self, monkeypatch, tmp_path):
+        main = tmp_path / "cookies.txt"
+        monkeypatch.setenv("COOKIES_PATH", str(main))
+        monkeypatch.setattr(routes, "get_watcher", lambda: None)
+        return main
+
+    def test_upload_named_cookies_to_the_pool(self, api_client, main_cookies):
+        upload = {"file": ("cookies.txt", b"# Netscape HTTP Cookie File\n", "text/plain")}
+
+        assert api_client.post("/api/config/cookies", files=upload).status_code == 200
+        assert api_client.post("/api/config/cookies", params={"name": "account-2"}, files=upload).status_code == 200
+        assert api_client.post("/api/config/cookies", params={"name": "../x"}, files=upload).status_code == 400
+
+        status = api_client.get("/api/config/cookies").json()
+        assert status["exists"] is True
+        assert status["files"] == ["cookies.txt", "account-2.txt"]
+
+        api_client.delete("/api/config/cookies", params={"name": "account-2"})
+        assert api_client.get("/api/config/cookies").json()["files"] == ["cookies.txt"]
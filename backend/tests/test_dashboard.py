@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db.database import Base, begin_read_snapshot
+from youtube_watcher.db.models import Source, Track
+
+
+def _seed(db_session):
+    source = Source(url="https://youtube.com/playlist?list=x", name="Mix", type="playlist")
+    db_session.add(source)
+    db_session.flush()
+    db_session.add_all([
+        Track(youtube_id="a", title="Alpha", artist="Ana", source_id=source.id,
+              download_status="completed", published_at="2021-05-01"),
+        Track(youtube_id="b", title="Beta", artist="Bob", source_id=source.id,
+              download_status="pending", published_at="2019-01-01"),
+    ])
+    db_session.commit()
+
+
+class TestDashboard:
+    def test_matches_the_individual_endpoints(self, api_client, db_session):
+        _seed(db_session)
+        params = {"status": "completed", "page_size": 10}
+
+        dashboard = api_client.get("/api/dashboard", params=params)
+        body = dashboard.json()
+
+        assert dashboard.status_code == 200
+        assert body["tracks"] == api_client.get("/api/tracks", params=params).json()
+        assert body["stats"] == api_client.get("/api/tracks/stats").json()
+        assert body["artists"] == ["Ana", "Bob"]
+        assert body["years"] == ["2021", "2019"]
+        assert [s["name"] for s in body["sources"]] == ["Mix"]
+        assert set(body["cookies"]) == {"exists"}
+        assert body["version"]
+
+    def test_reports_server_timing_and_supports_304(self, api_client):
+        first = api_client.get("/api/dashboard")
+        sections = [part.split(";")[0] for part in first.headers["server-timing"].split(", ")]
+        assert sections == ["tracks", "stats", "artists", "years", "sources"]
+
+        second = api_client.get("/api/dashboard", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+
+
+class TestReadSnapshot:
+    def test_snapshot_ignores_concurrent_commits(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'snapshot.db'}")
+
+        @event.listens_for(engine, "connect")
+        def _wal(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+
+        with session_factory() as reader, session_factory() as writer:
+            begin_read_snapshot(reader)
+            assert reader.query(Track).count() == 0
+
+            writer.add(Track(youtube_id="new", title="New"))
+            writer.commit()
+
+            assert reader.query(Track).count() == 0
+            reader.rollback()
+            assert reader.query(Track).count() == 1
+        engine.dispose()
@@ -0,0 +1,103 @@
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db import database
+from youtube_watcher.db.database import SerializedWriteSession, create_db_engine
+from youtube_watcher.db.migrations import run_migrations
+from youtube_watcher.db.models import Track
+
+
+class TestCreateDbEngine:
+    def test_sqlite_connections_get_concurrency_pragmas(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+        try:
+            with engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                # 1 = NORMAL
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+                assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+        finally:
+            engine.dispose()
+
+    def test_pool_size_comes_from_the_environment(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "3")
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+        assert engine.pool.size() == 3
+        engine.dispose()
+
+
+class TestSerializedWriteSession:
+    def test_commits_wait_for_the_write_lock(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+        run_migrations(engine)
+        factory = sessionmaker(bind=engine, class_=SerializedWriteSession)
+        committed = threading.Event()
+
+        def write():
+            with factory() as db:
+                db.add(Track(youtube_id="abc", title="Song"))
+                db.commit()
+            committed.set()
+
+        with database._write_lock:
+            writer = threading.Thread(target=write)
+            writer.start()
+            assert not committed.wait(0.2)
+        writer.join(5)
+
+        assert committed.is_set()
+        with factory() as db:
+            assert db.query(Track).count() == 1
+        engine.dispose()
+
+    def test_lock_is_held_from_the_first_flush_until_commit(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+        run_migrations(engine)
+        factory = sessionmaker(bind=engine, class_=SerializedWriteSession)
+        flushed = threading.Event()
+        other_committed = threading.Event()
+
+        def write():
+            with factory() as db:
+                db.add(Track(youtube_id="def", title="Other"))
+                db.commit()
+            other_committed.set()
+
+        with factory() as db:
+            db.add(Track(youtube_id="abc", title="Song"))
+            db.flush()
+            writer = threading.Thread(target=write)
+            writer.start()
+            # The other writer queues behind the open transaction instead of hitting SQLite's lock
+            assert not other_committed.wait(0.2)
+            db.commit()
+        writer.join(5)
+
+        assert other_committed.is_set()
+        with factory() as db:
+            assert db.query(Track).count() == 2
+        engine.dispose()
+
+    def test_rollback_and_reads_release_or_skip_the_lock(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+        run_migrations(engine)
+        factory = sessionmaker(bind=engine, class_=SerializedWriteSession)
+
+        with factory() as db:
+            db.query(Track).count()
+            assert not db._holds_write_lock
+            db.add(Track(youtube_id="abc", title="Song"))
+            db.flush()
+            assert db._holds_write_lock
+            db.rollback()
+            assert not db._holds_write_lock
+
+        # A second session in the same thread does not wait for the first one
+        with factory() as first, factory() as second:
+            first.add(Track(youtube_id="abc", title="Song"))
+            first.flush()
+            second.query(Track).count()
+            first.commit()
+        engine.dispose()
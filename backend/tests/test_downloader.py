@@ -3,7 +3,8 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any
 
-from youtube_watcher import downloader as downloader_module
+import yt_dlp
+
 from youtube_watcher.downloader import YouTubeDownloader
 
 
@@ -68,7 +69,7 @@ def test_download_opus_returns_downloaded_file(monkeypatch, tmp_path):
             return {"upload_date": "20230101"}
 
     monkeypatch.setattr(
-        downloader_module.yt_dlp, "YoutubeDL", lambda opts: DummyYDL(opts)
+        yt_dlp, "YoutubeDL", lambda opts: DummyYDL(opts)
     )
     
     # Reinicializar downloader para que coja el mock
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.changes import ChangeFeed, change_feed
+from youtube_watcher.db.models import Track
+from youtube_watcher.events import EventHub, event_hub
+
+
+def _collect(hub: EventHub, publish, timeout=1.0):
+    async def _run():
+        subscription = hub.subscribe()
+        publish()
+        return await subscription.get(timeout)
+
+    return asyncio.run(_run())
+
+
+class TestEventHub:
+    def test_publish_from_another_thread(self):
+        hub = EventHub()
+
+        def publish():
+            threading.Thread(target=hub.publish, args=("track.updated", {"id": 1})).start()
+
+        events, overflowed = _collect(hub, publish)
+
+        assert [(event_type, data) for _, event_type, data in events] == [("track.updated", {"id": 1})]
+        assert overflowed is False
+
+    def test_slow_client_overflow_turns_into_resync(self):
+        hub = EventHub(buffer_size=3)
+
+        def publish():
+            for i in range(5):
+                hub.publish("track.updated", {"id": i})
+
+        events, overflowed = _collect(hub, publish)
+
+        assert events == []
+        assert overflowed is True
+
+    def test_timeout_returns_nothing(self):
+        events, overflowed = _collect(EventHub(), lambda: None, timeout=0.01)
+        assert (events, overflowed) == ([], False)
+
+
+class TestChangeEvents:
+    def _capture(self, action):
+        async def _run():
+            subscription = event_hub.subscribe()
+            try:
+                action()
+                events, _ = await subscription.get(1.0)
+                return [(event_type, data) for _, event_type, data in events]
+            finally:
+                event_hub.unsubscribe(subscription)
+
+        return asyncio.run(_run())
+
+    def test_commit_publishes_track_and_stats_events(self, db_session):
+        def create():
+            db_session.add(Track(youtube_id="abc", title="Song", download_status="pending"))
+            db_session.commit()
+
+        events = self._capture(create)
+
+        assert events[0][0] == "track.created"
+        assert events[0][1]["youtube_id"] == "abc"
+        assert events[-1] == ("stats.delta", {"pending": 1})
+
+        track = db_session.query(Track).one()
+
+        def complete():
+            track.download_status = "completed"
+            db_session.commit()
+
+        events = self._capture(complete)
+
+        assert events[0][0] == "track.updated"
+        assert events[0][1]["download_status"] == "completed"
+        assert events[-1] == ("stats.delta", {"pending": -1, "completed": 1})
+
+    def test_rollback_publishes_nothing(self, db_session):
+        def rollback():
+            db_session.add(Track(youtube_id="abc", title="Song"))
+            db_session.flush()
+            db_session.rollback()
+
+        assert self._capture(rollback) == []
+
+
+class TestChangeFeed:
+    def test_reports_commits_made_by_other_processes(self, db_engine):
+        feed = ChangeFeed()
+        with db_engine.connect() as conn:
+            assert feed.poll(conn) == []
+
+        # What the standalone worker's commit leaves behind
+        with db_engine.begin() as conn:
+            conn.execute(text("UPDATE change_versions SET version = version + 1 WHERE channel = 'tracks'"))
+
+        with db_engine.connect() as conn:
+            assert feed.poll(conn) == ["tracks"]
+            assert feed.poll(conn) == []
+
+    def test_own_commits_are_not_reported_again(self, db_engine, db_session):
+        with db_engine.connect() as conn:
+            change_feed.poll(conn)
+
+        db_session.add(Track(youtube_id="abc", title="Song"))
+        db_session.commit()
+
+        with db_engine.connect() as conn:
+            assert change_feed.poll(conn) == []
+
+
+class _StubRequest:
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+class TestEventStream:
+    def test_streams_committed_changes(self, db_session):
+        async def _run():
+            request = _StubRequest()
+            response = await routes.stream_events(request)
+            chunks = response.body_iterator
+            assert await chunks.__anext__() == b"retry: 5000\n\n"
+
+            db_session.add(Track(youtube_id="abc", title="Song"))
+            db_session.commit()
+            message = await chunks.__anext__()
+
+            request.disconnected = True
+            rest = [chunk async for chunk in chunks]
+            return response, message, rest
+
+        response, message, rest = asyncio.run(_run())
+
+        assert response.media_type == "text/event-stream"
+        assert b"event: track.created\n" in message
+        assert b'"youtube_id":"abc"' in message
+        assert len(rest) == 1 and b"event: stats.delta" in rest[0]
+        assert event_hub.subscriber_count == 0
@@ -0,0 +1,149 @@
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.api import routes
+from youtube_watcher.db import database
+from youtube_watcher.db.models import Track
+from youtube_watcher.jobs import InFlight, JobRegistry, job_registry
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+class TestInFlight:
+    def test_concurrent_callers_share_one_execution(self, wait_until):
+        in_flight = InFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def work():
+            calls.append(1)
+            release.wait(5)
+            return "done"
+
+        threads = [threading.Thread(target=lambda: results.append(in_flight.run("abc", work))) for _ in range(3)]
+        threads[0].start()
+        wait_until(lambda: "abc" in in_flight)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert sorted(results) == [("done", False), ("done", True), ("done", True)]
+        assert "abc" not in in_flight
+
+    def test_attached_callers_get_the_error(self, wait_until):
+        in_flight = InFlight()
+        started, release = threading.Event(), threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("yt-dlp failed")
+
+        def call():
+            try:
+                in_flight.run("abc", fail)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        owner = threading.Thread(target=call)
+        owner.start()
+        started.wait(5)
+        attached = threading.Thread(target=call)
+        attached.start()
+        wait_until(lambda: attached.is_alive())
+        release.set()
+        owner.join(5)
+        attached.join(5)
+
+        assert errors == ["yt-dlp failed", "yt-dlp failed"]
+
+
+class TestSubmitOnce:
+    def test_attaches_while_running_and_resubmits_after(self, wait_until):
+        registry = JobRegistry(max_workers=1)
+        release = threading.Event()
+
+        first, attached_first = registry.submit_once("download:abc", "tracks.download", lambda job: release.wait(5))
+        second, attached_second = registry.submit_once("download:abc", "tracks.download", lambda job: None)
+
+        assert second is first
+        assert (attached_first, attached_second) == (False, True)
+
+        release.set()
+        wait_until(lambda: first.finished_at is not None)
+        third, attached_third = registry.submit_once("download:abc", "tracks.download", lambda job: None)
+        assert third is not first and attached_third is False
+
+
+class TestSingleDownloadDeduplication:
+    @pytest.fixture
+    def blocking_watcher(self, db_engine, monkeypatch, tmp_path):
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+        watcher = YouTubeWatcher(str(tmp_path))
+        release = threading.Event()
+        downloads = []
+
+        def download(video_data):
+            downloads.append(video_data["id"])
+            release.wait(5)
+            return None
+
+        watcher.downloader.download_and_convert = download
+        monkeypatch.setattr(routes, "get_watcher", lambda: watcher)
+        yield watcher, release, downloads
+        release.set()
+
+    def test_double_click_attaches_to_the_running_job(self, api_client, blocking_watcher, wait_until):
+        watcher, release, downloads = blocking_watcher
+        url = "https://www.youtube.com/watch?v=abcdefghijk"
+
+        first = api_client.post("/api/tracks/download-single", json={"url": url}).json()
+        wait_until(lambda: downloads)
+        second = api_client.post("/api/tracks/download-single", json={"url": url}).json()
+        release.set()
+        # The job writes to the test database: let it finish before the engine goes away
+        wait_until(lambda: job_registry.get(first["job_id"]).finished_at is not None)
+
+        assert second["job_id"] == first["job_id"]
+        assert (first["attached"], second["attached"]) == (False, True)
+        assert downloads == ["abcdefghijk"]
+
+    def test_watcher_loop_attaches_to_a_user_download(self, blocking_watcher, db_engine, wait_until):
+        watcher, release, downloads = blocking_watcher
+        session_factory = sessionmaker(bind=db_engine)
+        video = {"id": "abcdefghijk", "title": "Song"}
+
+        def process():
+            with session_factory() as db:
+                watcher._process_video(video, None, db)
+
+        user = threading.Thread(target=process)
+        user.start()
+        wait_until(lambda: downloads)
+        loop = threading.Thread(target=process)
+        loop.start()
+        wait_until(lambda: loop.is_alive())
+        release.set()
+        user.join(5)
+        loop.join(5)
+
+        assert downloads == ["abcdefghijk"]
+
+
+class TestSingleDownloadWithoutWatcher:
+    def test_is_queued_with_priority_for_the_workers(self, api_client, db_session, monkeypatch):
+        monkeypatch.setattr(routes, "get_watcher", lambda: None)
+
+        body = api_client.post(
+            "/api/tracks/download-single", json={"url": "https://youtu.be/abcdefghijk"}
+        ).json()
+
+        assert (body["status"], body["job_id"]) == ("queued", None)
+        track = db_session.query(Track).filter(Track.youtube_id == "abcdefghijk").one()
+        assert (track.download_status, track.priority) == ("pending", 1)
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db import leader
+from youtube_watcher.watcher import YouTubeWatcher
+
+TTL = timedelta(seconds=15)
+
+
+class TestTryAcquire:
+    def test_single_leader_per_database(self, db_session):
+        now = datetime(2026, 1, 1, 12, 0)
+
+        assert leader.try_acquire(db_session, "node-a:10", slots=1, ttl=TTL, now=now) == "watcher:0"
+        assert leader.try_acquire(db_session, "node-b:20", slots=1, ttl=TTL, now=now) is None
+        # Renewing keeps the slot
+        assert leader.try_acquire(db_session, "node-a:10", slots=1, ttl=TTL, now=now + TTL / 3) == "watcher:0"
+
+    def test_standby_takes_over_once_the_lock_expires(self, db_session):
+        now = datetime(2026, 1, 1, 12, 0)
+        leader.try_acquire(db_session, "node-a:10", slots=1, ttl=TTL, now=now)
+
+        assert leader.try_acquire(db_session, "node-b:20", slots=1, ttl=TTL, now=now + TTL - timedelta(seconds=1)) is None
+        assert leader.try_acquire(db_session, "node-b:20", slots=1, ttl=TTL, now=now + TTL + timedelta(seconds=1)) == "watcher:0"
+        assert leader.current_holders(db_session, now=now + TTL + timedelta(seconds=2)) == ["node-b:20"]
+
+    def test_controlled_set_of_watchers(self, db_session):
+        now = datetime(2026, 1, 1, 12, 0)
+
+        slots = [leader.try_acquire(db_session, f"node-{i}:1", slots=2, ttl=TTL, now=now) for i in range(3)]
+
+        assert slots == ["watcher:0", "watcher:1", None]
+
+    def test_release_hands_over_immediately(self, db_session):
+        now = datetime(2026, 1, 1, 12, 0)
+        leader.try_acquire(db_session, "node-a:10", slots=1, ttl=TTL, now=now)
+
+        leader.release(db_session, "node-a:10")
+
+        assert leader.try_acquire(db_session, "node-b:20", slots=1, ttl=TTL, now=now) == "watcher:0"
+
+
+class TestWatcherLeadership:
+    @pytest.fixture
+    def watchers(self, db_engine, monkeypatch, tmp_path):
+        monkeypatch.setattr("youtube_watcher.watcher.SessionLocal", sessionmaker(bind=db_engine))
+        first, second = YouTubeWatcher(str(tmp_path)), YouTubeWatcher(str(tmp_path))
+        first.worker_id, second.worker_id = "node-a:10", "node-b:20"
+        return first, second
+
+    def test_only_the_holder_is_active(self, watchers):
+        first, second = watchers
+
+        assert first._hold_leadership() is True
+        assert second._hold_leadership() is False
+        assert first._active.is_set() and not second._active.is_set()
+
+        first._release_leadership()
+
+        assert second._hold_leadership() is True
+        assert not first._active.is_set()
+
+    def test_stops_scanning_when_leadership_is_lost(self, watchers):
+        first, _ = watchers
+        first._heartbeat_thread = object()  # as if started by start()
+
+        assert first._lost_leadership() is True
+        first._hold_leadership()
+        assert first._lost_leadership() is False
+
+    def test_once_per_database_tasks_run_only_on_the_primary_watcher(self, watchers, monkeypatch):
+        first, second = watchers
+        calls = []
+        first.on_leadership(lambda: calls.append("first"))
+        second.on_leadership(lambda: calls.append("second"))
+        monkeypatch.setattr(leader, "try_acquire", partial(leader.try_acquire, slots=2))
+
+        first._hold_leadership()
+        second._hold_leadership()
+        first._hold_leadership()  # Renewing does not run them again
+
+        assert second._active.is_set()
+        assert calls == ["first"]
+
+    def test_stop_ends_the_loop_and_hands_over_the_lock(self, watchers, monkeypatch):
+        first, second = watchers
+        scanned = threading.Event()
+        monkeypatch.setattr(first, "_check_all_sources", scanned.set)
+        thread = threading.Thread(target=first.start, daemon=True)
+        thread.start()
+        assert scanned.wait(timeout=5)
+
+        first.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert second._hold_leadership() is True
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from youtube_watcher.db.migrations import MIGRATIONS, Migration, applied_versions, run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'watcher.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _legacy_schema(engine):
+    """A database as created before artist/published_at/navidrome_playlist_id existed"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE sources (id INTEGER PRIMARY KEY, url VARCHAR NOT NULL UNIQUE, "
+            "name VARCHAR NOT NULL, type VARCHAR, status VARCHAR, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE tracks (id INTEGER PRIMARY KEY, youtube_id VARCHAR NOT NULL UNIQUE, "
+            "title VARCHAR NOT NULL, source_id INTEGER REFERENCES sources(id), file_path VARCHAR, "
+            "download_status VARCHAR, downloaded_at DATETIME, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO tracks (youtube_id, title, download_status) VALUES ('abc', 'Hello World', 'completed')"
+        ))
+
+
+class TestRunMigrations:
+    def test_fresh_database_runs_everything_once(self, engine):
+        assert run_migrations(engine) == [m.version for m in MIGRATIONS]
+        assert run_migrations(engine) == []
+        assert applied_versions(engine) == {m.version for m in MIGRATIONS}
+
+    def test_upgrades_a_legacy_database(self, engine):
+        _legacy_schema(engine)
+
+        run_migrations(engine)
+
+        columns = {c["name"] for c in inspect(engine).get_columns("tracks")}
+        indexes = {i["name"] for i in inspect(engine).get_indexes("tracks")}
+        assert {"artist", "published_at"} <= columns
+        assert "ix_tracks_status_created" in indexes
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT rowid FROM tracks_fts WHERE tracks_fts MATCH 'hello'")).all() == [(1,)]
+            assert conn.execute(text("SELECT count FROM track_status_counts")).scalar() == 1
+
+    def test_failed_migration_is_rolled_back_and_retried(self, engine):
+        def broken(conn):
+            conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            run_migrations(engine, [Migration(1, "broken", broken)])
+
+        assert "half_done" not in inspect(engine).get_table_names()
+        assert applied_versions(engine) == set()
+
+    def test_optional_failure_does_not_block_later_migrations(self, engine):
+        def broken(conn):
+            raise RuntimeError("no fts5")
+
+        applied = run_migrations(engine, [
+            Migration(1, "optional", broken, optional=True),
+            Migration(2, "next", lambda conn: conn.execute(text("CREATE TABLE later (id INTEGER)"))),
+        ])
+
+        assert applied == [2]
+        assert applied_versions(engine) == {2}
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from youtube_watcher.api import routes
+from youtube_watcher.api.pagination import InvalidCursor, decode_cursor, encode_cursor
+from youtube_watcher.db.models import Track
+
+
+def _list_tracks(**params):
+    return orjson.loads(routes.get_tracks(**params).body)
+
+
+@pytest.fixture
+def library(db_session):
+    base = datetime(2025, 1, 1)
+    for i in range(23):
+        db_session.add(
+            Track(
+                youtube_id=f"vid{i:02d}",
+                title=f"Song {i % 7}",
+                artist=None if i % 5 == 0 else f"Artist {i % 4}",
+                download_status="completed" if i % 3 else "pending",
+                created_at=base + timedelta(hours=i // 2),
+                downloaded_at=None if i % 4 == 0 else base + timedelta(days=i % 6),
+            )
+        )
+    db_session.commit()
+    return db_session
+
+
+def _walk(db, **params):
+    ids, cursor = [], ""
+    while cursor is not None:
+        result = _list_tracks(page_size=4, cursor=cursor, db=db, **params)
+        ids.extend(item["id"] for item in result["items"])
+        cursor = result["next_cursor"]
+    return ids
+
+
+class TestCursorRoundTrip:
+    def test_datetime_values_survive(self):
+        value = datetime(2025, 3, 4, 5, 6, 7, 890)
+        cursor = encode_cursor("created_at", False, value, 12)
+        assert decode_cursor(cursor, "created_at", False) == (value, 12)
+
+    def test_rejects_cursor_for_other_sort(self):
+        cursor = encode_cursor("title", True, "abc", 1)
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, "title", False)
+
+    def test_rejects_garbage(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("not-a-cursor", "title", True)
+
+
+class TestKeysetPagination:
+    @pytest.mark.parametrize(
+        "sort_by,sort_order",
+        [
+            ("created_at", "desc"),
+            ("created_at", "asc"),
+            ("downloaded_at", "desc"),
+            ("downloaded_at", "asc"),
+            ("artist", "asc"),
+            ("title", "desc"),
+        ],
+    )
+    def test_matches_offset_pagination(self, library, sort_by, sort_order):
+        expected = [
+            item["id"]
+            for item in _list_tracks(
+                page_size=100, sort_by=sort_by, sort_order=sort_order, db=library
+            )["items"]
+        ]
+
+        assert _walk(library, sort_by=sort_by, sort_order=sort_order) == expected
+
+    def test_relevance_order(self, library):
+        params = {"search": "song 3", "sort_by": "relevance"}
+        expected = [item["id"] for item in _list_tracks(page_size=100, db=library, **params)["items"]]
+
+        assert expected
+        assert _walk(library, **params) == expected
+
+    def test_applies_filters(self, library):
+        ids = _walk(library, status="pending")
+        assert len(ids) == 8
+        assert all(library.get(Track, i).download_status == "pending" for i in ids)
+
+    def test_total_is_optional(self, library):
+        assert _list_tracks(cursor="", db=library)["total"] is None
+        assert _list_tracks(cursor="", include_total=True, db=library)["total"] == 23
+
+    def test_invalid_cursor_is_bad_request(self, library):
+        with pytest.raises(HTTPException) as exc:
+            routes.get_tracks(cursor="garbage", db=library)
+        assert exc.value.status_code == 400
+
+    def test_page_mode_unchanged(self, library):
+        result = _list_tracks(page=2, page_size=10, db=library)
+        assert result["total"] == 23
+        assert result["pages"] == 3
+        assert len(result["items"]) == 10
+
+    def test_total_counts_without_joining_sources(self, library):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = library.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            result = _list_tracks(status="pending", search="Song", page_size=5, db=library)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        counts = [s for s in statements if "count(" in s.lower()]
+        assert result["total"] == 8
+        assert counts and all("sources" not in s for s in counts)
@@ -0,0 +1,166 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher import watcher as watcher_module
+from youtube_watcher.db.models import Source, Track
+from youtube_watcher.playlist_monitor import PlaylistMonitor
+from youtube_watcher.watcher import SCAN_BATCH, YouTubeWatcher
+from youtube_watcher.ydl_pool import ydl_pool
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr("youtube_watcher.playlist_monitor.rate_limiter", Mock())
+
+
+class TestIterPlaylistVideos:
+    @patch("yt_dlp.YoutubeDL")
+    def test_yields_entries_as_they_arrive(self, mock_ydl):
+        fetched = []
+
+        def entries():
+            for i in range(3):
+                fetched.append(i)
+                yield {"id": f"v{i}", "title": "T"} if i != 1 else None
+
+        mock_ydl.return_value.extract_info.return_value = {"_type": "playlist", "entries": entries()}
+        monitor = PlaylistMonitor("https://www.youtube.com/playlist?list=PL1")
+        videos = monitor.iter_playlist_videos()
+
+        assert next(videos)["id"] == "v0"
+        assert fetched == [0]
+        # The YoutubeDL instance stays checked out while the listing is being read
+        assert ydl_pool.stats()["idle"] == 0
+        assert [v["id"] for v in videos] == ["v2"]
+        assert monitor.listing_complete is True
+        assert ydl_pool.stats()["idle"] == 1
+        assert mock_ydl.return_value.extract_info.call_args.kwargs["process"] is False
+
+    @patch("yt_dlp.YoutubeDL")
+    def test_closing_early_returns_the_instance(self, mock_ydl):
+        mock_ydl.return_value.extract_info.return_value = {"entries": iter([{"id": "a"}, {"id": "b"}])}
+        monitor = PlaylistMonitor("https://pl")
+        videos = monitor.iter_playlist_videos()
+
+        next(videos)
+        videos.close()
+
+        assert monitor.listing_complete is False
+        assert ydl_pool.stats()["idle"] == 1
+
+    @patch("yt_dlp.YoutubeDL")
+    def test_follows_redirects_to_the_listing(self, mock_ydl):
+        mock_ydl.return_value.extract_info.side_effect = [
+            {"_type": "url", "url": "https://www.youtube.com/@chan/videos", "ie_key": "YoutubeTab"},
+            {"_type": "playlist", "entries": iter([{"id": "a"}])},
+        ]
+
+        videos = list(PlaylistMonitor("https://www.youtube.com/@chan").iter_playlist_videos())
+
+        assert videos == [{"id": "a"}]
+        assert mock_ydl.return_value.extract_info.call_args.args[0] == "https://www.youtube.com/@chan/videos"
+
+    @patch("yt_dlp.YoutubeDL")
+    def test_error_mid_listing_marks_it_incomplete(self, mock_ydl):
+        def entries():
+            yield {"id": "a"}
+            raise RuntimeError("HTTP Error 500")
+
+        mock_ydl.return_value.extract_info.return_value = {"entries": entries()}
+        monitor = PlaylistMonitor("https://pl")
+
+        assert list(monitor.iter_playlist_videos()) == [{"id": "a"}]
+        assert monitor.listing_complete is False
+
+
+class FakeMonitor:
+    """Listado que avisa al test antes de entregar cada bloque"""
+
+    def __init__(self, videos, on_batch=None, complete=True):
+        self.videos = videos
+        self.on_batch = on_batch
+        self.complete = complete
+        self.listing_complete = False
+
+    def iter_playlist_videos(self):
+        for i, video in enumerate(self.videos):
+            if self.on_batch and i and i % SCAN_BATCH == 0:
+                self.on_batch(i)
+            yield video
+        self.listing_complete = self.complete
+
+
+class TestStreamingScan:
+    @pytest.fixture
+    def watcher(self, db_engine, monkeypatch, tmp_path):
+        monkeypatch.setattr(watcher_module, "SessionLocal", sessionmaker(bind=db_engine))
+        watcher = YouTubeWatcher(str(tmp_path), use_trash_folder=False)
+        watcher._process_video = Mock()
+        watcher._detect_and_remove_deleted_videos = Mock()
+        return watcher
+
+    def test_processing_starts_before_the_listing_ends(self, watcher, db_session):
+        db_session.add(Source(url="https://pl", name="P", type="playlist", status="active"))
+        db_session.commit()
+        processed_before_page = {}
+        videos = [{"id": f"v{i}", "title": "T"} for i in range(3 * SCAN_BATCH)]
+        monitor = FakeMonitor(
+            videos, on_batch=lambda i: processed_before_page.setdefault(i, watcher._process_video.call_count)
+        )
+
+        with patch.object(watcher_module, "PlaylistMonitor", return_value=monitor):
+            watcher._check_all_sources()
+
+        assert processed_before_page == {SCAN_BATCH: SCAN_BATCH, 2 * SCAN_BATCH: 2 * SCAN_BATCH}
+        assert watcher._process_video.call_count == 3 * SCAN_BATCH
+        watcher._detect_and_remove_deleted_videos.assert_called_once()
+        assert len(watcher._detect_and_remove_deleted_videos.call_args.args[0]) == 3 * SCAN_BATCH
+
+    def test_incomplete_listing_does_not_sync_deletions(self, watcher, db_session):
+        db_session.add(Source(url="https://pl", name="P", type="playlist", status="active"))
+        db_session.add(Track(youtube_id="old", title="Old", download_status="completed"))
+        db_session.commit()
+        monitor = FakeMonitor([{"id": "old", "title": "Old"}, {"id": "new", "title": "New"}], complete=False)
+
+        with patch.object(watcher_module, "PlaylistMonitor", return_value=monitor):
+            watcher._check_all_sources()
+
+        assert [c.args[0]["id"] for c in watcher._process_video.call_args_list] == ["new"]
+        watcher._detect_and_remove_deleted_videos.assert_not_called()
+
+    def test_sources_are_released_when_the_pass_stops_early(self, watcher, db_session):
+        source = Source(url="https://pl", name="P", type="playlist", status="active")
+        db_session.add(source)
+        db_session.commit()
+        watcher._rescan_after = -1
+        monitor = FakeMonitor([{"id": "a", "title": "A"}, {"id": "b", "title": "B"}])
+
+        with patch.object(watcher_module, "PlaylistMonitor", return_value=monitor):
+            watcher._check_all_sources()
+
+        db_session.refresh(source)
+        assert source.claimed_by is None
+        watcher._detect_and_remove_deleted_videos.assert_not_called()
+
+    @patch("yt_dlp.YoutubeDL")
+    def test_open_listings_reuse_their_instances_on_the_next_pass(self, mock_ydl, watcher, db_session):
+        # Más fuentes que max_idle_per_key, con listados más largos que un bloque:
+        # todas tienen su YoutubeDL reservado a la vez durante la pasada
+        for i in range(4):
+            db_session.add(Source(url=f"https://pl{i}", name=f"P{i}", type="playlist", status="active"))
+        db_session.commit()
+        mock_ydl.return_value.extract_info.side_effect = lambda *a, **kw: {
+            "entries": iter({"id": f"{a[0]}-{i}", "title": "T"} for i in range(2 * SCAN_BATCH))
+        }
+        watcher.interval_ms = 0
+
+        before = ydl_pool.stats()["created"]
+        created = []
+        for _ in range(3):
+            watcher._check_all_sources()
+            created.append(ydl_pool.stats()["created"] - before)
+
+        assert created == [4, 4, 4]
+        assert ydl_pool.stats()["idle"] == 4
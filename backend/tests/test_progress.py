@@ -0,0 +1,123 @@
+import io
+import subprocess
+import sys
+
+from youtube_watcher import downloader as downloader_module
+from youtube_watcher.api import routes
+from youtube_watcher.downloader import YouTubeDownloader
+from youtube_watcher.progress import ProgressTable, progress_table
+
+
+class TestProgressTable:
+    def test_updates_are_throttled_within_a_stage(self):
+        table = ProgressTable(min_interval=60)
+        table.start("abc", "Song")
+        table.update("abc", stage="downloading", downloaded_bytes=10)
+        table.update("abc", downloaded_bytes=20)
+
+        entry = table.get("abc")
+        assert entry["stage"] == "downloading"
+        assert entry["downloaded_bytes"] == 10
+
+    def test_stage_change_is_never_throttled(self):
+        table = ProgressTable(min_interval=60)
+        table.start("abc", "Song")
+        table.update("abc", stage="downloading", fraction=0.9, speed=1000)
+        table.update("abc", stage="converting")
+
+        entry = table.get("abc")
+        assert entry["stage"] == "converting"
+        assert entry["fraction"] is None and entry["speed"] is None
+
+    def test_finish_removes_entry_and_unknown_ids_are_ignored(self):
+        table = ProgressTable(min_interval=0)
+        table.start("abc", "Song")
+        table.update("missing", stage="downloading")
+        table.update(None, stage="downloading")
+        table.finish("abc")
+
+        assert table.snapshot() == []
+
+
+class _FakeFfmpeg:
+    def __init__(self, cmd, **kwargs):
+        self.cmd = cmd
+        self.stdout = io.StringIO("out_time_us=30000000\nprogress=continue\nout_time_us=60000000\nprogress=end\n")
+
+    def wait(self):
+        return 0
+
+
+class TestDownloaderProgress:
+    def test_download_hook_reports_bytes_and_fraction(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(progress_table, "min_interval", 0)
+        downloader = YouTubeDownloader(str(tmp_path))
+        progress_table.start("abc", "Song")
+        try:
+            downloader._on_download_progress({
+                "status": "downloading",
+                "info_dict": {"id": "abc"},
+                "downloaded_bytes": 250,
+                "total_bytes": 1000,
+                "speed": 50.0,
+                "eta": 15,
+            })
+            entry = progress_table.get("abc")
+            assert entry["stage"] == "downloading"
+            assert entry["fraction"] == 0.25
+            assert entry["eta"] == 15
+
+            downloader._on_download_progress({"status": "finished", "info_dict": {"id": "abc"}})
+            assert progress_table.get("abc")["stage"] == "extracting"
+        finally:
+            progress_table.finish("abc")
+
+    def test_ffmpeg_progress_is_parsed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(progress_table, "min_interval", 0)
+        monkeypatch.setattr(downloader_module.subprocess, "Popen", _FakeFfmpeg)
+        downloader = YouTubeDownloader(str(tmp_path))
+        seen = []
+        monkeypatch.setattr(progress_table, "_write", lambda video_id, entry: seen.append(dict(entry)))
+        progress_table._entries["abc"] = {"stage": "extracting", "_written": 0}
+        downloader._context.video_id = "abc"
+        downloader._context.duration = 120
+
+        try:
+            assert downloader._convert_to_flac(tmp_path / "a.opus", tmp_path / "a.flac", "Song") is True
+        finally:
+            progress_table._entries.pop("abc", None)
+
+        assert seen[0]["stage"] == "converting"
+        assert [e["fraction"] for e in seen[1:]] == [0.25, 0.5]
+        assert seen[-1]["transcode_position"] == 60.0
+
+    def test_verbose_ffmpeg_stderr_does_not_block_the_progress_pipe(self, tmp_path, monkeypatch, caplog):
+        # Más errores de los que caben en el buffer de un pipe, antes de cerrar stdout
+        script = (
+            "import sys; sys.stderr.write('x' * 200000); sys.stderr.flush(); "
+            "print('out_time_us=1000000'); sys.exit(1)"
+        )
+        real_popen = subprocess.Popen
+
+        def fake_ffmpeg(cmd, **kwargs):
+            return real_popen([sys.executable, "-c", script], **kwargs)
+
+        monkeypatch.setattr(downloader_module.subprocess, "Popen", fake_ffmpeg)
+        downloader = YouTubeDownloader(str(tmp_path))
+
+        assert downloader._convert_to_flac(tmp_path / "a.opus", tmp_path / "a.flac", "Song") is False
+        assert "x" * 1000 in caplog.text
+
+    def test_download_and_convert_clears_progress(self, tmp_path, monkeypatch):
+        downloader = YouTubeDownloader(str(tmp_path))
+        observed = []
+
+        def fake_download(video_data, title):
+            observed.append(routes.get_active_downloads())
+            return None
+
+        monkeypatch.setattr(downloader, "_download_opus", fake_download)
+
+        assert downloader.download_and_convert({"id": "abc", "title": "Song"}) is None
+        assert observed[0][0]["youtube_id"] == "abc"
+        assert routes.get_active_downloads() == []
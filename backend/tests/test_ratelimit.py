@@ -0,0 +1,105 @@
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+
+from youtube_watcher.playlist_monitor import PlaylistMonitor
+from youtube_watcher.ratelimit import (
+    MEDIA, METADATA, AdaptiveTokenBucket, RateLimiter, YtDlpLogger, is_throttle_message, rate_limiter,
+)
+
+
+def _bucket(clock, **kwargs):
+    return AdaptiveTokenBucket(2.0, 2, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestAdaptiveTokenBucket:
+    def test_burst_then_steady_rate(self, clock):
+        bucket = _bucket(clock)
+
+        waits = [bucket.acquire() for _ in range(4)]
+
+        assert waits == [0.0, 0.0, 0.5, 0.5]
+        assert bucket.snapshot()["requests"] == 4
+
+    def test_throttle_halves_the_rate_down_to_the_floor(self, clock):
+        bucket = _bucket(clock, min_rate=0.5)
+
+        bucket.report_throttled()
+        assert bucket.rate == 1.0
+        bucket.report_throttled()
+        bucket.report_throttled()
+        assert bucket.rate == 0.5
+        # The bucket is emptied: the next request waits a full interval
+        assert bucket.acquire() == 2.0
+
+    def test_recovers_gradually_after_the_cooldown(self, clock):
+        bucket = _bucket(clock, cooldown=30, recovery=0.25)
+        bucket.report_throttled()
+
+        bucket.report_success()
+        assert bucket.rate == 1.0
+
+        clock.now += 31
+        bucket.report_success()
+        assert bucket.rate == 1.5
+        bucket.report_success()
+        bucket.report_success()
+        assert bucket.rate == 2.0
+        assert bucket.snapshot()["throttled"] == 1
+
+
+class TestThrottleDetection:
+    @pytest.mark.parametrize("message", [
+        "ERROR: [youtube] abc: Unable to download webpage: HTTP Error 429: Too Many Requests",
+        "ERROR: unable to download video data: HTTP Error 403: Forbidden",
+        "ERROR: [youtube] abc: Sign in to confirm you’re not a bot",
+    ])
+    def test_throttle_messages(self, message):
+        assert is_throttle_message(message)
+
+    def test_other_errors_are_ignored(self):
+        assert not is_throttle_message("ERROR: [youtube] abc: Video unavailable")
+
+    def test_logger_reports_to_the_limiter(self, clock):
+        limiter = RateLimiter({MEDIA: _bucket(clock)})
+
+        YtDlpLogger(MEDIA, limiter).error("ERROR: HTTP Error 429: Too Many Requests")
+
+        assert limiter.snapshot()[MEDIA]["rate"] == 1.0
+
+    def test_logger_keeps_warnings_and_errors(self, caplog):
+        ydl_logger = YtDlpLogger(MEDIA, RateLimiter({}))
+
+        with caplog.at_level(logging.WARNING, logger="youtube_watcher.ratelimit"):
+            ydl_logger.warning("WARNING: [youtube] abc: nsig extraction failed")
+            ydl_logger.error("ERROR: [youtube] abc: Video unavailable")
+
+        assert [(r.levelno, r.getMessage()) for r in caplog.records] == [
+            (logging.WARNING, "yt-dlp: WARNING: [youtube] abc: nsig extraction failed"),
+            (logging.ERROR, "yt-dlp: ERROR: [youtube] abc: Video unavailable"),
+        ]
+
+    def test_unknown_class(self):
+        with pytest.raises(ValueError):
+            rate_limiter.acquire("comments")
+
+
+class TestYouTubeCallsUseTheLimiter:
+    @patch("yt_dlp.YoutubeDL")
+    def test_playlist_listing_takes_a_metadata_token(self, mock_ydl, monkeypatch):
+        limiter = Mock()
+        monkeypatch.setattr("youtube_watcher.playlist_monitor.rate_limiter", limiter)
+        mock_ydl.return_value.extract_info.return_value = {"entries": [{"id": "a"}]}
+
+        PlaylistMonitor("https://www.youtube.com/playlist?list=PL1").get_playlist_videos()
+
+        limiter.acquire.assert_called_once_with(METADATA)
+        limiter.report_success.assert_called_once_with(METADATA)
+        assert isinstance(mock_ydl.call_args.args[0]["logger"], YtDlpLogger)
+
+    def test_endpoint(self, api_client):
+        response = api_client.get("/api/ratelimit")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"metadata", "media", "thumbnails"}
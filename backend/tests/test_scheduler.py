@@ -0,0 +1,212 @@
+import threading
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.db.models import Source, Track
+from youtube_watcher.scheduler import (
+    BACKFILL, INTERACTIVE, NEW, RETRY, DeficitRoundRobin, DownloadScheduler, Lane,
+)
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+class _Holder:
+    """Keeps a scheduler slot in a background thread until released"""
+
+    def __init__(self, scheduler, lane):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(scheduler, lane), daemon=True)
+        self.thread.start()
+
+    def _run(self, scheduler, lane):
+        with scheduler.slot(lane):
+            self.started.set()
+            self.release.wait(5)
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+
+class TestDownloadScheduler:
+    def test_interactive_starts_while_shared_slots_are_busy(self):
+        scheduler = DownloadScheduler(concurrency=1)
+        bulk = _Holder(scheduler, BACKFILL)
+        bulk.started.wait(5)
+        queued = _Holder(scheduler, BACKFILL)
+
+        user = _Holder(scheduler, INTERACTIVE)
+
+        assert user.started.wait(1)
+        assert not queued.started.is_set()
+        assert scheduler.snapshot()[BACKFILL] == {"running": 1, "waiting": 1, "weight": 2, "reserved": 0}
+        for holder in (user, bulk, queued):
+            holder.finish()
+
+    def test_freed_slots_follow_lane_weights(self, wait_until):
+        scheduler = DownloadScheduler(concurrency=1, lanes=[Lane(NEW, weight=3), Lane(BACKFILL, weight=1)])
+        blocker = _Holder(scheduler, NEW)
+        blocker.started.wait(5)
+        order = []
+
+        def download(lane):
+            with scheduler.slot(lane):
+                order.append(lane)
+
+        threads = [threading.Thread(target=download, args=(lane,)) for lane in [BACKFILL] * 4 + [NEW] * 4]
+        for thread in threads:
+            thread.start()
+        wait_until(lambda: sum(s["waiting"] for s in scheduler.snapshot().values()) == 8)
+        blocker.finish()
+        for thread in threads:
+            thread.join(5)
+
+        # With weights 3:1, three of the first four freed slots go to new tracks
+        assert order[:4].count(NEW) == 3
+        assert len(order) == 8
+
+    def test_unknown_lane(self):
+        with pytest.raises(ValueError):
+            with DownloadScheduler().slot("urgent"):
+                pass
+
+
+class TestWatcherLanes:
+    @pytest.fixture
+    def watcher(self, tmp_path):
+        watcher = YouTubeWatcher(str(tmp_path))
+        watcher.scheduler = MagicMock()
+        watcher.downloader.download_and_convert = Mock(return_value=None)
+        return watcher
+
+    def _lane(self, watcher):
+        return watcher.scheduler.slot.call_args.args[0]
+
+    def test_scan_uses_the_new_lane(self, watcher, db_session):
+        watcher._process_video({"id": "abc123", "title": "Song"}, None, db_session)
+
+        assert self._lane(watcher) == NEW
+
+    def test_failed_tracks_use_the_retry_lane(self, watcher, db_session):
+        db_session.add(Track(youtube_id="abc123", title="Song", download_status="failed"))
+        db_session.commit()
+
+        watcher._process_video({"id": "abc123", "title": "Song"}, None, db_session)
+
+        assert self._lane(watcher) == RETRY
+
+    def test_user_requests_stay_interactive(self, watcher, db_session):
+        db_session.add(Track(youtube_id="abc123", title="Song", download_status="failed"))
+        db_session.commit()
+
+        watcher._process_video({"id": "abc123", "title": "Song"}, None, db_session, lane=INTERACTIVE)
+
+        assert self._lane(watcher) == INTERACTIVE
+
+
+class TestDeficitRoundRobin:
+    def test_interleaves_sources(self):
+        queues = DeficitRoundRobin()
+        queues.add("big", range(1000))
+        queues.add("small", ["new song"])
+
+        first = [key for (key, _), _ in zip(queues, range(2))]
+
+        assert first == ["big", "small"]
+
+    def test_weights_set_the_share_of_each_round(self):
+        queues = DeficitRoundRobin()
+        queues.add("a", range(6), weight=2)
+        queues.add("b", range(6), weight=0.5)
+
+        order = "".join(key for key, _ in queues)
+
+        # "b" gets one item every other round until "a" runs out
+        assert order == "aaaabaa" + "bbbbb"
+        assert len(queues) == 0
+
+    def test_iterators_are_read_only_when_their_turn_comes(self):
+        pulled = []
+
+        def listing():
+            for i in range(3):
+                pulled.append(i)
+                yield i
+
+        queues = DeficitRoundRobin()
+        queues.add("lazy", listing())
+        queues.add("list", ["a", "b"])
+        order = iter(queues)
+
+        assert next(order) == ("lazy", 0)
+        assert pulled == [0]
+        assert [key for key, _ in order] == ["list", "lazy", "list", "lazy"]
+
+    def test_rejects_non_positive_weights(self):
+        with pytest.raises(ValueError):
+            DeficitRoundRobin().add("a", [1], weight=0)
+
+
+def iter_listing(videos):
+    yield from videos
+
+
+class TestFairSourceScan:
+    @pytest.fixture
+    def watcher(self, db_engine, monkeypatch, tmp_path):
+        monkeypatch.setattr("youtube_watcher.watcher.SessionLocal", sessionmaker(bind=db_engine))
+        watcher = YouTubeWatcher(str(tmp_path), enable_sync_deletions=False, use_trash_folder=False)
+        watcher._process_video = Mock()
+        return watcher
+
+    def _scan(self, watcher, listings):
+        with patch("youtube_watcher.watcher.PlaylistMonitor") as monitor:
+            monitor.side_effect = lambda url, **kwargs: Mock(iter_playlist_videos=lambda: iter_listing(listings[url]))
+            watcher._check_all_sources()
+        return [c.args[1] for c in watcher._process_video.call_args_list]
+
+    def test_large_new_source_does_not_starve_the_others(self, watcher, db_session):
+        big = Source(url="https://big", name="Big", type="channel", status="active")
+        small = Source(url="https://small", name="Small", type="playlist", status="active", weight=2)
+        db_session.add_all([big, small])
+        db_session.commit()
+
+        order = self._scan(watcher, {
+            "https://big": [{"id": f"big{i}", "title": "B"} for i in range(100)],
+            "https://small": [{"id": f"small{i}", "title": "S"} for i in range(3)],
+        })
+
+        assert order[:5] == [big.id, small.id, small.id, big.id, small.id]
+        assert len(order) == 103
+
+    def test_skips_videos_already_in_the_library(self, watcher, db_session):
+        source = Source(url="https://pl", name="P", type="playlist", status="active")
+        db_session.add(source)
+        db_session.add(Track(youtube_id="old", title="Old", download_status="completed"))
+        db_session.commit()
+
+        self._scan(watcher, {"https://pl": [{"id": "old", "title": "Old"}, {"id": "new", "title": "New"}]})
+
+        assert [c.args[0]["id"] for c in watcher._process_video.call_args_list] == ["new"]
+
+    def test_long_pass_stops_to_rescan(self, watcher, db_session):
+        db_session.add(Source(url="https://pl", name="P", type="playlist", status="active"))
+        db_session.commit()
+        watcher._rescan_after = -1
+
+        order = self._scan(watcher, {"https://pl": [{"id": "a", "title": "A"}]})
+
+        assert order == []
+
+
+class TestSourceWeightEndpoint:
+    def test_update_weight(self, api_client, db_session):
+        source = Source(url="https://pl", name="P", type="playlist", status="active")
+        db_session.add(source)
+        db_session.commit()
+
+        assert api_client.put(f"/api/sources/{source.id}/weight", params={"weight": 5}).status_code == 200
+        assert api_client.put(f"/api/sources/{source.id}/weight", params={"weight": 0}).status_code == 400
+        assert api_client.get("/api/sources").json()[0]["weight"] == 5
@@ -0,0 +1,85 @@
+import orjson
+import pytest
+from sqlalchemy import text
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track
+from youtube_watcher.db.search import build_match_query
+
+
+def _list_tracks(**params):
+    return orjson.loads(routes.get_tracks(**params).body)
+
+
+def _add(db, youtube_id, title, artist=None):
+    track = Track(youtube_id=youtube_id, title=title, artist=artist, download_status="completed")
+    db.add(track)
+    db.commit()
+    return track
+
+
+def _titles(result):
+    return [item["title"] for item in result["items"]]
+
+
+class TestBuildMatchQuery:
+    def test_quotes_every_word_as_prefix(self):
+        assert build_match_query("beat fore") == '"beat"* "fore"*'
+
+    def test_neutralizes_fts_operators(self):
+        assert build_match_query('NEAR("a" OR b*)') == '"NEAR"* "a"* "OR"* "b"*'
+
+    def test_returns_none_without_words(self):
+        assert build_match_query("  -- ") is None
+
+
+class TestTrackSearch:
+    def test_matches_title_and_artist(self, db_session):
+        _add(db_session, "a", "Yellow Submarine", "The Beatles")
+        _add(db_session, "b", "Beat It", "Michael Jackson")
+        _add(db_session, "c", "Paranoid", "Black Sabbath")
+
+        result = _list_tracks(search="beat", db=db_session)
+
+        assert sorted(_titles(result)) == ["Beat It", "Yellow Submarine"]
+        assert result["total"] == 2
+
+    @pytest.mark.sqlite_only
+    def test_ignores_diacritics(self, db_session):
+        _add(db_session, "a", "Canción Animal", "Soda Stereo")
+
+        assert _titles(_list_tracks(search="cancion", db=db_session)) == ["Canción Animal"]
+
+    def test_relevance_sort_prefers_title_matches(self, db_session):
+        _add(db_session, "a", "Intro", "Love Of Lesbian")
+        _add(db_session, "b", "Love Song", "The Cure")
+
+        result = _list_tracks(search="love", sort_by="relevance", db=db_session)
+
+        assert _titles(result) == ["Love Song", "Intro"]
+
+    def test_index_follows_updates_and_deletes(self, db_session):
+        track = _add(db_session, "a", "Old Title", "Someone")
+
+        track.title = "New Title"
+        db_session.commit()
+        assert _titles(_list_tracks(search="old", db=db_session)) == []
+        assert _titles(_list_tracks(search="new", db=db_session)) == ["New Title"]
+
+        db_session.delete(track)
+        db_session.commit()
+        assert _list_tracks(search="new", db=db_session)["total"] == 0
+
+    @pytest.mark.sqlite_only
+    def test_rebuild_indexes_rows_inserted_before_index(self, db_engine, db_session):
+        from youtube_watcher.db.search import check_search_index, create_search_index
+
+        _add(db_session, "a", "Bohemian Rhapsody", "Queen")
+        with db_engine.begin() as conn:
+            conn.execute(text("DROP TABLE tracks_fts"))
+        assert check_search_index(db_engine) is False
+
+        with db_engine.begin() as conn:
+            create_search_index(conn)
+        assert check_search_index(db_engine) is True
+        assert _titles(_list_tracks(search="queen", db=db_session)) == ["Bohemian Rhapsody"]
@@ -0,0 +1,57 @@
+import threading
+
+from sqlalchemy.orm import sessionmaker
+
+from youtube_watcher.api import routes
+from youtube_watcher.db import database
+from youtube_watcher.db.models import Source
+
+
+class TestNavidromeJobs:
+    def test_create_source_returns_before_navidrome_finishes(self, api_client, db_engine, db_session, monkeypatch, wait_for_job):
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+        release = threading.Event()
+        synced = []
+
+        def slow_create(name):
+            release.wait(5)
+            return "pl-1"
+
+        monkeypatch.setattr(routes, "_create_navidrome_playlist", slow_create)
+        monkeypatch.setattr(
+            routes, "_sync_existing_tracks_to_navidrome",
+            lambda source_id, playlist_id, name, job=None: synced.append((source_id, playlist_id)),
+        )
+
+        response = api_client.post("/api/sources", json={"url": "https://yt/p", "name": "Mix"})
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body["navidrome_playlist_id"] is None
+        assert api_client.get(f"/api/jobs/{body['job_id']}").json()["status"] in ("queued", "running")
+
+        release.set()
+        job = wait_for_job(body["job_id"])
+
+        assert job.status == "completed" and job.result == {"playlist_id": "pl-1"}
+        assert synced == [(body["id"], "pl-1")]
+        db_session.expire_all()
+        assert db_session.get(Source, body["id"]).navidrome_playlist_id == "pl-1"
+
+    def test_delete_source_removes_playlist_in_background(self, api_client, db_session, monkeypatch, wait_for_job):
+        deleted = []
+        monkeypatch.setattr(routes, "_delete_navidrome_playlist", lambda pid, name: deleted.append(pid))
+        db_session.add(Source(url="https://yt/p", name="Mix", type="playlist", navidrome_playlist_id="pl-9"))
+        db_session.commit()
+        source_id = db_session.query(Source).one().id
+
+        body = api_client.delete(f"/api/sources/{source_id}").json()
+        wait_for_job(body["job_id"])
+
+        assert deleted == ["pl-9"]
+        db_session.expire_all()
+        assert db_session.query(Source).count() == 0
+
+    def test_channel_sources_do_not_start_a_job(self, api_client):
+        body = api_client.post("/api/sources", json={"url": "https://yt/c", "name": "Ch", "type": "channel"}).json()
+        assert body["job_id"] is None
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+from sqlalchemy import func, text
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Track, TrackArtistCount, TrackStatusCount, TrackYearCount
+from youtube_watcher.db.summary import check_summary_tables, create_summary_triggers
+
+
+def _expected(db):
+    statuses = dict(db.query(Track.download_status, func.count()).group_by(Track.download_status).all())
+    artists = {}
+    years = {}
+    for artist, published_at in db.query(Track.artist, Track.published_at):
+        if artist and artist.strip():
+            artists[artist] = artists.get(artist, 0) + 1
+        if published_at and len(published_at) >= 4:
+            years[published_at[:4]] = years.get(published_at[:4], 0) + 1
+    return statuses, artists, years
+
+
+def _actual(db):
+    return (
+        dict(db.query(TrackStatusCount.status, TrackStatusCount.count).all()),
+        dict(db.query(TrackArtistCount.artist, TrackArtistCount.count).all()),
+        dict(db.query(TrackYearCount.year, TrackYearCount.count).all()),
+    )
+
+
+class TestTrackSummaries:
+    def test_counters_follow_inserts_updates_and_deletes(self, db_session):
+        rnd = random.Random(7)
+        artists = ["A", "B", "C", "", "  ", None]
+        dates = ["2020-01-02", "2021", "1999-12-31", "99", None]
+        statuses = ["pending", "completed", "failed", "ignored"]
+
+        tracks = []
+        for i in range(40):
+            track = Track(
+                youtube_id=f"v{i}",
+                title=f"t{i}",
+                artist=rnd.choice(artists),
+                published_at=rnd.choice(dates),
+                download_status=rnd.choice(statuses),
+            )
+            db_session.add(track)
+            tracks.append(track)
+        db_session.commit()
+        assert _actual(db_session) == _expected(db_session)
+
+        for track in rnd.sample(tracks, 25):
+            track.download_status = rnd.choice(statuses)
+            track.artist = rnd.choice(artists)
+            track.published_at = rnd.choice(dates)
+        db_session.commit()
+        assert _actual(db_session) == _expected(db_session)
+
+        for track in rnd.sample(tracks, 15):
+            db_session.delete(track)
+        db_session.commit()
+        assert _actual(db_session) == _expected(db_session)
+        assert all(count > 0 for table in _actual(db_session) for count in table.values())
+
+    def test_endpoints_read_summaries(self, db_session):
+        db_session.add_all(
+            [
+                Track(youtube_id="a", title="a", artist="Zoe", published_at="2019-05-01", download_status="completed"),
+                Track(youtube_id="b", title="b", artist="Abba", published_at="2021", download_status="failed"),
+                Track(youtube_id="c", title="c", artist="Zoe", published_at=None, download_status="completed"),
+            ]
+        )
+        db_session.commit()
+
+        assert routes.get_track_stats(db=db_session) == {"completed": 2, "pending": 0, "failed": 1, "ignored": 0}
+        assert routes.get_artists(db=db_session) == ["Abba", "Zoe"]
+        assert routes.get_years(db=db_session) == ["2021", "2019"]
+
+    @pytest.mark.sqlite_only
+    def test_install_backfills_existing_rows(self, db_engine, db_session):
+        db_session.add(Track(youtube_id="a", title="a", artist="Zoe", download_status="completed"))
+        db_session.commit()
+        with db_engine.begin() as conn:
+            for name in ["track_summary_ai", "track_summary_ad", "track_summary_au_status",
+                         "track_summary_au_artist", "track_summary_au_year"]:
+                conn.execute(text(f"DROP TRIGGER {name}"))
+            conn.execute(text("DELETE FROM track_artist_counts"))
+        assert check_summary_tables(db_engine) is False
+
+        with db_engine.begin() as conn:
+            create_summary_triggers(conn)
+        assert check_summary_tables(db_engine) is True
+        assert routes.get_artists(db=db_session) == ["Zoe"]
@@ -0,0 +1,65 @@
+import orjson
+import pytest
+from sqlalchemy import event
+
+from youtube_watcher.api import routes
+from youtube_watcher.db.models import Source, Track
+
+
+@pytest.fixture
+def library(db_session):
+    for i in range(1, 6):
+        db_session.add(Source(id=i, url=f"https://youtube.com/playlist?list={i}", name=f"List {i}", type="playlist"))
+    for i in range(60):
+        db_session.add(
+            Track(
+                youtube_id=f"vid{i:02d}",
+                title=f"Song {i}",
+                source_id=None if i % 10 == 0 else i % 5 + 1,
+                download_status="completed",
+            )
+        )
+    db_session.commit()
+    db_session.expire_all()
+    return db_session
+
+
+def _count_queries(engine, fn):
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return len(statements)
+
+
+class TestTrackListing:
+    def test_includes_source_name_and_type(self, library):
+        items = orjson.loads(routes.get_tracks(page_size=100, db=library).body)["items"]
+        by_youtube_id = {item["youtube_id"]: item for item in items}
+
+        assert by_youtube_id["vid01"]["source_name"] == "List 2"
+        assert by_youtube_id["vid01"]["source_type"] == "playlist"
+        assert by_youtube_id["vid10"]["source_name"] is None
+        assert set(by_youtube_id["vid01"]) == set(routes.TrackResponse.model_fields)
+
+    @pytest.mark.parametrize("page_size", [5, 50])
+    def test_query_count_does_not_grow_with_page_size(self, db_engine, library, page_size):
+        queries = _count_queries(db_engine, lambda: routes.get_tracks(page_size=page_size, db=library))
+
+        # One COUNT plus one page query, whatever the number of sources on the page
+        assert queries == 2
+
+    def test_year_filter_matches_dates_and_bare_years(self, db_session):
+        for youtube_id, published in [("a", "2021"), ("b", "2021-12-31"), ("c", "2020-12-31"), ("d", "2022-01-01")]:
+            db_session.add(Track(youtube_id=youtube_id, title=youtube_id, published_at=published))
+        db_session.commit()
+
+        items = orjson.loads(routes.get_tracks(year="2021", db=db_session).body)["items"]
+
+        assert sorted(item["youtube_id"] for item in items) == ["a", "b"]
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
@@ -23,7 +24,7 @@ class TestYouTubeWatcher:
         assert watcher.enable_sync_deletions is True
         assert watcher.use_trash_folder is True
         assert watcher.trash_retention_days == 7
-        assert isinstance(watcher.failed_downloads, dict)
+        assert watcher.worker_id.endswith(f":{os.getpid()}")
 
     def test_process_video_skips_invalid_entries(self, tmp_path):
         watcher = YouTubeWatcher(str(tmp_path))
@@ -48,6 +49,8 @@ class TestYouTubeWatcher:
         db_mock = MagicMock()
         # Mock para que retorne None al buscar el track (simulando que es nuevo)
         db_mock.query.return_value.filter.return_value.first.return_value = None
+        # La reserva de la descarga (UPDATE condicional) afecta a una fila
+        db_mock.connection.return_value.execute.return_value.rowcount = 1
 
         def fake_download_and_convert(data):
             return {
@@ -97,6 +100,8 @@ class TestYouTubeWatcher:
         
         db_mock = MagicMock()
         mock_session_class.return_value.__enter__.return_value = db_mock
+        # La reserva de la fuente (UPDATE condicional) afecta a una fila
+        db_mock.connection.return_value.execute.return_value.rowcount = 1
         
         # Simular una fuente activa devuelta por BD
         mock_source = Source(id=1, url="http://youtube", name="P1", status="active", type="playlist")
@@ -104,7 +109,7 @@ class TestYouTubeWatcher:
         
         # Simular que el monitor devuelve 1 video
         mock_monitor_instance = MagicMock()
-        mock_monitor_instance.get_playlist_videos.return_value = [{"id": "vid1", "title": "Song"}]
+        mock_monitor_instance.iter_playlist_videos.return_value = (v for v in [{"id": "vid1", "title": "Song"}])
         mock_monitor_class.return_value = mock_monitor_instance
         
         watcher._process_video = Mock()
@@ -0,0 +1,111 @@
+import runpy
+import signal
+from unittest.mock import patch
+
+import pytest
+
+from youtube_watcher import worker
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+class TestWatcherMode:
+    def test_defaults_to_embedded(self, monkeypatch):
+        monkeypatch.delenv("WATCHER_MODE", raising=False)
+        assert worker.watcher_mode() == "embedded"
+
+    def test_api_mode_and_unknown_values(self, monkeypatch):
+        monkeypatch.setenv("WATCHER_MODE", "API")
+        assert worker.watcher_mode() == "api"
+
+        monkeypatch.setenv("WATCHER_MODE", "both")
+        assert worker.watcher_mode() == "embedded"
+
+
+class TestCreateWatcherFromEnv:
+    def test_uses_the_environment_and_watches_the_cookies_file(self, monkeypatch, tmp_path):
+        cookies = tmp_path / "cookies.txt"
+        monkeypatch.setenv("DOWNLOAD_PATH", str(tmp_path / "dl"))
+        monkeypatch.setenv("OBSERVER_INTERVAL_MS", "5000")
+        monkeypatch.setenv("COOKIES_PATH", str(cookies))
+
+        watcher = worker.create_watcher_from_env()
+
+        assert watcher.download_path == tmp_path / "dl"
+        assert watcher.interval_ms == 5000
+        assert watcher.cookies_path is None
+        assert watcher._cookies_file == cookies
+
+    def test_the_primary_watcher_runs_the_navidrome_sync(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("DOWNLOAD_PATH", str(tmp_path / "dl"))
+        submitted = []
+        monkeypatch.setattr(
+            "youtube_watcher.jobs.job_registry.submit", lambda kind, fn, *args, **kw: submitted.append(kind)
+        )
+
+        watcher = worker.create_watcher_from_env()
+        watcher._run_leadership_callbacks()
+
+        assert submitted == ["navidrome.sync_sources"]
+
+
+class TestMain:
+    def test_sigterm_stops_the_watcher_like_ctrl_c(self, monkeypatch):
+        handlers = {}
+        monkeypatch.setattr("youtube_watcher.cli.setup_logging", lambda: None)
+        monkeypatch.setattr(worker, "run_migrations", lambda engine: None)
+        monkeypatch.setattr(worker.progress_table, "persist_to", lambda *args: None)
+        monkeypatch.setattr(worker.signal, "signal", lambda signum, handler: handlers.update({signum: handler}))
+        with patch.object(worker, "create_watcher_from_env") as create:
+            worker.main()
+
+        create.return_value.start.assert_called_once_with()
+        with pytest.raises(KeyboardInterrupt):
+            handlers[signal.SIGTERM](signal.SIGTERM, None)
+
+
+class TestCookiesReload:
+    def test_follows_uploads_and_deletions_from_another_process(self, tmp_path):
+        cookies = tmp_path / "cookies.txt"
+        watcher = YouTubeWatcher(str(tmp_path / "dl"))
+        watcher.watch_cookies_file(str(cookies))
+
+        watcher._reload_cookies_if_changed()
+        assert watcher.cookies_path is None
+
+        cookies.write_text("# Netscape HTTP Cookie File\n")
+        watcher._reload_cookies_if_changed()
+        assert watcher.cookies_path == str(cookies)
+        assert watcher.downloader.cookies_path == str(cookies)
+
+        cookies.unlink()
+        watcher._reload_cookies_if_changed()
+        assert watcher.cookies_path is None
+
+
+class TestModuleEntrypoint:
+    def test_worker_subcommand_runs_the_worker(self, monkeypatch):
+        monkeypatch.setattr("sys.argv", ["youtube_watcher", "worker"])
+        with patch.object(worker, "main") as worker_main, patch("youtube_watcher.cli.main") as cli_main:
+            runpy.run_module("youtube_watcher", run_name="__main__")
+
+        worker_main.assert_called_once_with()
+        cli_main.assert_not_called()
+
+
+class TestCliEntrypoint:
+    def test_runs_migrations_before_starting_the_watcher(self, monkeypatch, tmp_path):
+        from youtube_watcher import cli
+
+        calls = []
+        monkeypatch.setattr("sys.argv", [
+            "youtube_watcher", "--playlist-url", "https://www.youtube.com/playlist?list=PL1",
+            "--download-path", str(tmp_path),
+        ])
+        monkeypatch.setattr(cli, "run_migrations", lambda engine: calls.append("migrations"))
+        with patch.object(cli, "YouTubeWatcher") as watcher_class, \
+                patch("youtube_watcher.db.database.SessionLocal"):
+            watcher_class.side_effect = lambda **kwargs: calls.append("watcher") or watcher_class.return_value
+            cli.main()
+
+        assert calls == ["migrations", "watcher"]
+        watcher_class.return_value.start.assert_called_once()
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from youtube_watcher.db.claims import DEFAULT_LEASE, claim_source, claim_track, release_source
+from youtube_watcher.db.models import Source, Track, Worker
+from youtube_watcher.db.workers import heartbeat, list_workers, record_download
+from youtube_watcher.watcher import YouTubeWatcher
+
+
+def _source(db, url="https://www.youtube.com/playlist?list=PL1"):
+    source = Source(url=url, name="P1", type="playlist", status="active")
+    db.add(source)
+    db.commit()
+    return source
+
+
+class TestHeartbeat:
+    def test_registers_then_refreshes_the_worker(self, db_session):
+        start = datetime(2026, 1, 1, 12, 0)
+        heartbeat(db_session, "node-a:10", now=start)
+        heartbeat(db_session, "node-a:10", now=start + timedelta(seconds=30))
+
+        worker = db_session.query(Worker).one()
+        assert worker.hostname == "node-a"
+        assert worker.started_at == start
+        assert worker.heartbeat_at == start + timedelta(seconds=30)
+
+    def test_renews_the_leases_of_a_live_worker(self, db_session):
+        track = Track(youtube_id="a", title="a", download_status="pending",
+                      claimed_by="node-a:10", claimed_at=datetime.utcnow() - 2 * DEFAULT_LEASE)
+        db_session.add(track)
+        db_session.commit()
+
+        heartbeat(db_session, "node-a:10")
+
+        assert claim_track(db_session, track.id, "node-b:20") is False
+
+    def test_leases_of_a_dead_worker_are_taken_over(self, db_session):
+        track = Track(youtube_id="a", title="a", download_status="pending",
+                      claimed_by="node-a:10", claimed_at=datetime.utcnow() - 2 * DEFAULT_LEASE)
+        db_session.add(track)
+        db_session.commit()
+
+        assert claim_track(db_session, track.id, "node-b:20") is True
+
+
+class TestClaimSource:
+    def test_one_scan_per_interval_across_workers(self, db_session):
+        source = _source(db_session)
+        interval = timedelta(minutes=1)
+
+        assert claim_source(db_session, source.id, "node-a:10", interval) is True
+        assert claim_source(db_session, source.id, "node-b:20", interval) is False
+
+        release_source(db_session, source.id, "node-a:10")
+        # Released, but scanned less than an interval ago
+        assert claim_source(db_session, source.id, "node-b:20", interval) is False
+        assert claim_source(db_session, source.id, "node-b:20", timedelta(0)) is True
+
+
+class TestListWorkers:
+    def test_reports_liveness_claims_and_throughput(self, db_session):
+        now = datetime.utcnow()
+        heartbeat(db_session, "node-a:10", now=now - timedelta(hours=2))
+        heartbeat(db_session, "node-a:10", now=now)
+        heartbeat(db_session, "node-b:20", now=now - timedelta(hours=1))
+        record_download(db_session, "node-a:10", succeeded=True)
+        record_download(db_session, "node-a:10", succeeded=True)
+        record_download(db_session, "node-a:10", succeeded=False)
+        db_session.add_all([
+            Track(youtube_id="a", title="a", download_status="completed",
+                  downloaded_by="node-a:10", downloaded_at=now - timedelta(minutes=5)),
+            Track(youtube_id="b", title="b", download_status="completed",
+                  downloaded_by="node-a:10", downloaded_at=now - timedelta(hours=3)),
+            Track(youtube_id="c", title="c", download_status="pending",
+                  claimed_by="node-a:10", claimed_at=now),
+        ])
+        db_session.commit()
+
+        workers = {w["id"]: w for w in list_workers(db_session, now=now)}
+
+        assert workers["node-a:10"]["alive"] is True
+        assert workers["node-b:20"]["alive"] is False
+        assert workers["node-a:10"]["completed"] == 2
+        assert workers["node-a:10"]["failed"] == 1
+        assert workers["node-a:10"]["completed_last_hour"] == 1
+        assert workers["node-a:10"]["completed_per_hour"] == 1.0
+        assert workers["node-a:10"]["claimed_tracks"] == 1
+
+    def test_endpoint(self, api_client, db_session):
+        heartbeat(db_session, "node-a:10")
+
+        response = api_client.get("/api/workers")
+
+        assert response.status_code == 200
+        assert [w["id"] for w in response.json()] == ["node-a:10"]
+
+
+class TestSharedFailures:
+    def test_failure_backoff_is_shared_between_workers(self, db_session, tmp_path):
+        first = YouTubeWatcher(str(tmp_path))
+        first.worker_id = "node-a:10"
+        first.downloader.download_and_convert = Mock(return_value=None)
+        first._process_video({"id": "abc123", "title": "Song"}, None, db_session)
+
+        track = db_session.query(Track).one()
+        assert track.download_status == "failed"
+        assert track.retry_count == 1
+        assert track.failed_at is not None
+
+        second = YouTubeWatcher(str(tmp_path))
+        second.worker_id = "node-b:20"
+        second.downloader.download_and_convert = Mock()
+        second._process_video({"id": "abc123", "title": "Song"}, None, db_session)
+
+        second.downloader.download_and_convert.assert_not_called()
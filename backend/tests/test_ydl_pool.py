@@ -0,0 +1,134 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from youtube_watcher.playlist_monitor import PlaylistMonitor
+from youtube_watcher.ydl_pool import YdlPool, new_youtube_dl, ydl_pool
+
+
+def _build():
+    return Mock(name="YoutubeDL")
+
+
+class TestYdlPool:
+    def test_reuses_instances_per_key(self):
+        pool = YdlPool()
+
+        with pool.checkout("a", _build) as first:
+            pass
+        with pool.checkout("a", _build) as again:
+            pass
+        with pool.checkout("b", _build) as other:
+            pass
+
+        assert again is first
+        assert other is not first
+        assert pool.stats() == {"idle": 2, "keys": 2, "created": 2, "reused": 1, "recycled": 0}
+
+    def test_concurrent_checkouts_get_distinct_instances(self):
+        pool = YdlPool()
+        inside, release = threading.Barrier(2), threading.Event()
+        seen = []
+
+        def use():
+            with pool.checkout("a", _build) as ydl:
+                seen.append(ydl)
+                inside.wait(5)
+                release.wait(5)
+
+        threads = [threading.Thread(target=use) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert seen[0] is not seen[1]
+        assert pool.stats()["idle"] == 2
+
+    def test_recycles_after_max_uses(self):
+        pool = YdlPool(max_uses=2)
+
+        instances = []
+        for _ in range(3):
+            with pool.checkout("a", _build) as ydl:
+                instances.append(ydl)
+
+        assert instances[0] is instances[1] and instances[2] is not instances[0]
+        instances[0].close.assert_called_once()
+
+    def test_recycles_idle_instances_after_max_age(self, clock):
+        pool = YdlPool(max_age=60, clock=clock)
+        with pool.checkout("a", _build) as old:
+            pass
+
+        clock.now += 61
+        with pool.checkout("b", _build):
+            pass
+
+        old.close.assert_called_once()
+        assert pool.stats()["recycled"] == 1
+
+    def test_closes_instances_beyond_the_idle_limit(self):
+        pool = YdlPool(max_idle_per_key=0)
+
+        with pool.checkout("a", _build) as ydl:
+            pass
+
+        ydl.close.assert_called_once()
+        assert pool.stats()["idle"] == 0
+
+    def test_keeps_as_many_idle_instances_as_were_checked_out_at_once(self):
+        pool = YdlPool(max_idle_per_key=2)
+
+        with pool.checkout("a", _build), pool.checkout("a", _build), pool.checkout("a", _build):
+            pass
+        with pool.checkout("a", _build), pool.checkout("a", _build), pool.checkout("a", _build):
+            pass
+
+        assert pool.stats()["created"] == 3
+        assert pool.stats()["idle"] == 3
+
+
+class TestMonitorUsesThePool:
+    @patch("youtube_watcher.playlist_monitor.rate_limiter", Mock())
+    @patch("yt_dlp.YoutubeDL")
+    def test_one_instance_across_sources_and_passes(self, mock_ydl):
+        mock_ydl.return_value.extract_info.return_value = {"entries": []}
+        reused = ydl_pool.stats()["reused"]
+
+        for _ in range(2):
+            for url in ("https://pl/1", "https://pl/2", "https://pl/3"):
+                PlaylistMonitor(url).get_playlist_videos()
+
+        assert mock_ydl.call_count == 1
+        assert ydl_pool.stats()["reused"] - reused == 5
+
+
+class TestYoutubeOnlyExtractors:
+    def test_only_youtube_extractors_are_loaded(self):
+        with new_youtube_dl({"quiet": True}) as ydl:
+            names = [ie.IE_NAME for ie in ydl._ies.values()]
+
+        assert "youtube" in names and "youtube:tab" in names
+        assert all(name.startswith("youtube") for name in names)
+
+    def test_music_and_video_urls_are_supported(self):
+        with new_youtube_dl({"quiet": True}) as ydl:
+            for url in (
+                "https://www.youtube.com/watch?v=abcdefghijk",
+                "https://www.youtube.com/playlist?list=PL0123456789",
+                "https://music.youtube.com/playlist?list=OLAK5uy_abc",
+            ):
+                assert any(ie.suitable(url) for ie in ydl._ies.values()), url
+
+    def test_api_startup_does_not_import_yt_dlp(self):
+        src = Path(__file__).resolve().parents[1] / "src"
+        code = "import sys, youtube_watcher.api.main; print('yt_dlp' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=src, capture_output=True, text=True, timeout=60, check=True
+        )
+
+        assert result.stdout.strip() == "False"
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import './index.css';
 
 interface Source {
@@ -25,8 +25,24 @@ interface Track {
   artist: string | null;
 }
 
+interface Progress {
+  youtube_id: string;
+  stage: string;
+  fraction: number | null;
+  speed: number | null;
+  eta: number | null;
+}
+
 const API = import.meta.env.VITE_API_URL || '/api';
 
+const STAGE_LABELS: Record<string, string> = {
+  queued: 'En cola',
+  downloading: 'Descargando',
+  extracting: 'Extrayendo',
+  converting: 'Convirtiendo',
+  tagging: 'Etiquetando',
+};
+
 function App() {
   const [sources, setSources] = useState<Source[]>([]);
   const [tracks, setTracks] = useState<Track[]>([]);
@@ -63,6 +79,7 @@ function App() {
 
   // Global Stats
   const [stats, setStats] = useState({ completed: 0, pending: 0, failed: 0, ignored: 0 });
+  const [progress, setProgress] = useState<Record<string, Progress>>({});
 
   const fetchData = async () => {
     try {
@@ -78,31 +95,88 @@ function App() {
       if (yearFilter) queryParams.append('year', yearFilter);
       if (sourceFilter !== '') queryParams.append('source_id', sourceFilter.toString());
 
-      const [s, t, a, y, c, st] = await Promise.all([
-        fetch(`${API}/sources`).then(r => r.json()),
-        fetch(`${API}/tracks?${queryParams.toString()}`).then(r => r.json()),
-        fetch(`${API}/tracks/artists`).then(r => r.json()),
-        fetch(`${API}/tracks/years`).then(r => r.json()),
-        fetch(`${API}/config/cookies`).then(r => r.json()),
-        fetch(`${API}/tracks/stats`).then(r => r.json()),
-      ]);
-      setSources(s);
-      setTracks(t.items || []);
-      setTotalTracks(t.total || 0);
-      setTotalPages(t.pages || 1);
-      setAvailableArtists(a || []);
-      setAvailableYears(y || []);
-      setHasCookies(c.exists);
-      setStats(st || { completed: 0, pending: 0, failed: 0, ignored: 0 });
+      // One request, one consistent snapshot of everything the dashboard shows
+      const d = await fetch(`${API}/dashboard?${queryParams.toString()}`).then(r => r.json());
+      setSources(d.sources || []);
+      setTracks(d.tracks?.items || []);
+      setTotalTracks(d.tracks?.total || 0);
+      setTotalPages(d.tracks?.pages || 1);
+      setAvailableArtists(d.artists || []);
+      setAvailableYears(d.years || []);
+      setHasCookies(d.cookies?.exists ?? false);
+      setStats(d.stats || { completed: 0, pending: 0, failed: 0, ignored: 0 });
     } catch (e) { console.error(e); }
   };
 
   useEffect(() => {
     fetchData();
-    const interval = setInterval(fetchData, 15000);
+    // Live updates arrive through /events; this poll is only a safety net
+    const interval = setInterval(fetchData, 60000);
     return () => clearInterval(interval);
   }, [page, pageSize, filter, search, artistFilter, yearFilter, sourceFilter, sortBy, sortOrder]);
 
+  // ─── Live updates (Server-Sent Events) ──────
+  const fetchRef = useRef(fetchData);
+  useEffect(() => {
+    fetchRef.current = fetchData;
+  });
+
+  useEffect(() => {
+    let refetchTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefetch = () => {
+      clearTimeout(refetchTimer);
+      refetchTimer = setTimeout(() => fetchRef.current(), 500);
+    };
+
+    // A delta cannot be applied safely: the counts may come from a /dashboard
+    // snapshot that already includes it. Re-read them instead (one cheap query).
+    let statsTimer: ReturnType<typeof setTimeout> | undefined;
+    let statsRequest = 0;
+    const scheduleStatsRefetch = () => {
+      clearTimeout(statsTimer);
+      statsTimer = setTimeout(() => {
+        const request = ++statsRequest;
+        fetch(`${API}/tracks/stats`)
+          .then(res => res.json())
+          .then(counts => { if (request === statsRequest) setStats(counts); })
+          .catch(console.error);
+      }, 500);
+    };
+
+    const events = new EventSource(`${API}/events`);
+    events.addEventListener('stats.delta', scheduleStatsRefetch);
+    events.addEventListener('track.updated', (e) => {
+      const update = JSON.parse((e as MessageEvent).data) as Partial<Track>;
+      setTracks(prev => prev.map(t => (t.id === update.id ? { ...t, ...update } : t)));
+    });
+    events.addEventListener('track.progress', (e) => {
+      const update = JSON.parse((e as MessageEvent).data) as Progress;
+      setProgress(prev => {
+        const next = { ...prev };
+        if (update.stage === 'finished') delete next[update.youtube_id];
+        else next[update.youtube_id] = update;
+        return next;
+      });
+    });
+    for (const type of ['track.created', 'track.deleted', 'source.updated', 'resync']) {
+      events.addEventListener(type, scheduleRefetch);
+    }
+    // Whatever happened while disconnected is picked up on reconnection
+    events.onopen = () => {
+      scheduleRefetch();
+      fetch(`${API}/tracks/active`)
+        .then(res => res.json())
+        .then((active: Progress[]) => setProgress(Object.fromEntries(active.map(p => [p.youtube_id, p]))))
+        .catch(() => setProgress({}));
+    };
+
+    return () => {
+      clearTimeout(refetchTimer);
+      clearTimeout(statsTimer);
+      events.close();
+    };
+  }, []);
+
   // ─── Stats ──────────────────────────────────
   const activeSources = sources.filter(s => s.status === 'active').length;
 
@@ -150,6 +224,21 @@ function App() {
     fetchData();
   };
 
+  // Applies to every track matching the current filters, in a single request
+  const handleBulk = async (action: 'delete' | 'restore') => {
+    const criteria: Record<string, string | number> = { status: filter };
+    if (search) criteria.search = search;
+    if (artistFilter) criteria.artist = artistFilter;
+    if (yearFilter) criteria.year = yearFilter;
+    if (sourceFilter !== '') criteria.source_id = sourceFilter;
+    await fetch(`${API}/tracks/bulk/${action}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filter: criteria }),
+    });
+    fetchData();
+  };
+
   const handleCookieUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
     if (!e.target.files?.[0]) return;
     setUploading(true);
@@ -275,6 +364,14 @@ function App() {
                 {f.label}
               </button>
             ))}
+            {(filter === 'failed' || filter === 'ignored') && totalTracks > 0 && (
+              <button className="chip" onClick={() => handleBulk('restore')}>
+                {filter === 'failed' ? 'Reintentar todas' : 'Restaurar todas'}
+              </button>
+            )}
+            {filter === 'failed' && totalTracks > 0 && (
+              <button className="chip" onClick={() => handleBulk('delete')}>Ignorar todas</button>
+            )}
           </div>
         </div>
 
@@ -358,6 +455,18 @@ function App() {
                     <span className={`badge badge-${t.download_status}`}>
                       {badgeLabel(t.download_status)}
                     </span>
+                    {progress[t.youtube_id] && (
+                      <div className="track-progress" title={STAGE_LABELS[progress[t.youtube_id].stage]}>
+                        <div
+                          className="track-progress-bar"
+                          style={{ width: `${Math.round((progress[t.youtube_id].fraction ?? 0) * 100)}%` }}
+                        />
+                        <span className="track-progress-label">
+                          {STAGE_LABELS[progress[t.youtube_id].stage] || progress[t.youtube_id].stage}
+                          {progress[t.youtube_id].fraction != null && ` ${Math.round(progress[t.youtube_id].fraction! * 100)}%`}
+                        </span>
+                      </div>
+                    )}
                   </td>
                   <td>
                     <div className="track-date">{formatDate(t.created_at)}</div>